@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+
+import click
+from hipflask import create_app, assets
+
+
+@click.command()
+@click.option('--workers', default=multiprocessing.cpu_count(), help='The number of processes to build in.')
+@click.option('--level', default=9, help='The gzip compression level, from 1 (fastest) to 9 (smallest).')
+@click.option('--force', is_flag=True, help='Build the bundles even if their inputs are unchanged.')
+def build(workers, level, force):
+    """
+    Build the (content-hashed) asset bundles ahead of time, record them in the
+    asset manifest, and write a precompressed (gzip) variant of each static
+    file that they serve; see the hipflask.support.web.bundles module.
+    """
+
+    app = create_app()
+    try:
+        outcomes = assets.build(app, level=level, force=force, workers=workers)
+    except IOError as e:
+        raise click.ClickException(str(e))
+    for outcome in outcomes:
+        click.echo(str(outcome))
+
+
+if __name__ == '__main__':
+    build()
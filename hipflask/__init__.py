@@ -4,10 +4,15 @@ from functools import wraps
 import logging
 
 import assets
-from hipflask.support import factory
+from hipflask.support import factory, is_development
 from hipflask.support.web import *
 from hipflask.support.web.responsifiers import *
-from hipflask.support.web.resolvers import SimpleSuffixBasedViewResolver
+from hipflask.support.web.resolvers import SimpleSuffixBasedViewResolver, IndexedViewResolver, \
+    CannotFindViewException, routed_view_names
+from hipflask.support.web.caching import cache_policy, cached_response, create_response_cache
+from hipflask.support.web.compression import CompressingResponsifier, serve_precompressed_static
+from hipflask.support.web.timing import stage, install_timing
+from hipflask.support.serializers import json_serializer_for
 
 
 _logger = logging.getLogger(__name__)
@@ -17,25 +22,138 @@ def create_app(settings_override=None):
     app = factory.create_app(__name__, __path__, settings_override)
     initialise_web(app)
     assets.prepare(app)
+    index_views(app)
     return app
 
 
 def route(blueprint, *args, **kwargs):
+    """
+    Route to a handler, whose response data is then responsified.
+
+    Pass C{cache=True} (or a dict of options, or a C{CachePolicy}) to cache the
+    responses; see the hipflask.support.web.caching module.
+
+    Pass C{view_name} for a handler that always renders the same view: the
+    name is validated here, once, and the handler returns just the model
+    (a dict), which is responded to as a C{ViewResponse} of that view. It can
+    still return anything else that C{respond} takes, to do otherwise. Only
+    such views are checked at boot (see C{index_views}).
+    """
+
+    return _route(blueprint, respond, *args, **kwargs)
+
+
+def async_route(blueprint, *args, **kwargs):
+    """
+    Route to a coroutine handler; see the hipflask.support.concurrency module.
+
+    The request's thread blocks on each future that the coroutine yields, so
+    the request holds a pool thread and its own thread the while; nothing is
+    multiplexed. All this buys is running independent I/O concurrently (by
+    yielding a list of futures), at the cost of a thread hand-off per yield.
+    Do not use it on hot paths expecting more: until it yields to the server,
+    a plain C{route} is as cheap or cheaper.
+    """
+
+    assert 'view_name' not in kwargs, 'A coroutine handler cannot be routed to a view name; return a ViewResponse.'
+
+    return _route(blueprint, async_respond, *args, **kwargs)
+
+
+def _route(blueprint, responder, *args, **kwargs):
     kwargs['strict_slashes'] = kwargs.get('strict_slashes', False)
+    policy = cache_policy(kwargs.pop('cache', None))
+    view_name = kwargs.pop('view_name', None)
+    respond_with = view_responder(view_name) if view_name is not None else None
 
     def decorator(f):
         @blueprint.route(*args, **kwargs)
         @wraps(f)
         def wrapper(*the_args, **the_kwargs):
-            response_data = f(*the_args, **the_kwargs)
-            return respond(response_data, *the_args, **the_kwargs)
+            def build():
+                with stage('handler'):
+                    response_data = f(*the_args, **the_kwargs)
+                if respond_with is not None and type(response_data) is dict:
+                    response_data = respond_with(response_data)
+                return responder(response_data, *the_args, **the_kwargs)
+
+            if policy is None:
+                return build()
+            return cached_response(policy, build)
 
+        # for checking, at boot, that the view exists; see index_views
+        wrapper.view_name = view_name
         return wrapper
 
     return decorator
 
 
 def initialise_web(app):
-    html_responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver())
-    responsifiers = dict(html=html_responsifier, json=SimpleJsonResponsifier())
+    serializer = json_serializer_for(app.config.get('JSON_SERIALIZER', 'fast'))
+
+    app.view_resolver = IndexedViewResolver() if is_view_index_enabled(app) else SimpleSuffixBasedViewResolver()
+    html_responsifier = TemplatedResponsifier(app.view_resolver,
+                                              cache_size=template_cache_size(app),
+                                              cacheable_views=app.config.get('CACHEABLE_VIEWS', ()))
+    json_responsifier = StreamingJsonResponsifier(fallback=SimpleJsonResponsifier(serializer),
+                                                  serializer=serializer)
+    responsifiers = dict(html=html_responsifier, json=json_responsifier)
     app.responsifier = ContentNegotiatingResponsifier(responsifiers)
+    if app.config.get('COMPRESSION_ENABLED', False):
+        app.responsifier = CompressingResponsifier(app.responsifier,
+                                                   min_size=app.config.get('COMPRESSION_MIN_SIZE', 500),
+                                                   level=app.config.get('COMPRESSION_LEVEL', 6))
+        serve_precompressed_static(app)
+    app.response_cache = create_response_cache(app.config)
+    install_timing(app)
+
+    if isinstance(app.view_resolver, IndexedViewResolver):
+        @app.before_first_request
+        def index_views_unless_indexed():
+            # for an application that never called index_views: its views are indexed, though not checked
+            if not app.view_resolver.indexed:
+                app.view_resolver.index(app.jinja_env)
+
+
+def index_views(app):
+    """
+    Index (and compile) the templates of the supplied application, if
+    C{VIEW_INDEX_ENABLED} is set, and check that every view named by its
+    routes (see C{route}) is among them; call once every Blueprint is
+    registered, and the Jinja2 environment is complete. Otherwise, the
+    templates are indexed before the first request, but nothing is checked.
+
+    Only views named up front, with C{route(..., view_name=...)}, can be
+    checked. A view named by what a handler returns (C{('thing', model)}, or a
+    C{ViewResponse}) is found to be missing only when it is rendered.
+
+    @param app: the Flask application, initialised by C{initialise_web}; must not be C{None}.
+    @raise CannotFindViewException: if any view named by a route is missing.
+    """
+
+    resolver = app.view_resolver
+    if not isinstance(resolver, IndexedViewResolver):
+        return
+    missing = resolver.index(app.jinja_env).missing(routed_view_names(app))
+    if missing:
+        raise CannotFindViewException(
+            'Cannot find the views named [{}] by the routes of [{}].'.format(', '.join(missing), app.name))
+
+
+def is_view_index_enabled(app):
+    """
+    Index the templates up front unless in development, where they are edited on the fly.
+    """
+
+    return app.config.get('VIEW_INDEX_ENABLED', False) and not is_development(current_environment(app))
+
+
+def template_cache_size(app):
+    """
+    The number of compiled templates to cache; never cache during development
+    so that templates can be edited on the fly.
+    """
+
+    if is_development(current_environment(app)):
+        return 0
+    return app.config.get('JINJA2_CACHE_SIZE', 0)
@@ -1,35 +1,81 @@
 # -*- coding: utf-8 -*-
 
+import logging
+import os
+
 from flask_assets import Environment, Bundle
 
 from support.strings import prefix_with, has_text
+from support.web.bundles import BundleBuilder, BuildCache
+from support.web.static import AssetManifest, asset_urls, serve_immutable_static
 
 
 def prepare(app):
     web_assets = Environment(app)
 
-    web_assets.register('css_all', *prepare_css())
-    web_assets.register('js_all', *prepare_js())
+    for name, prepare_bundles in BUNDLES:
+        web_assets.register(name, *prepare_bundles())
 
     is_debugging = app.debug
+    # each output is named for a hash of its content (the %(version)s), so the URLs need no expiry query string
+    web_assets.versions = 'hash'
+    web_assets.url_expire = False
     web_assets.manifest = 'cache' if not is_debugging else False
     web_assets.cache = not is_debugging
     web_assets.debug = is_debugging
 
+    # during development, the sources are served as they are, and never from a stale build
+    app.asset_manifest = AssetManifest(config_path(app, 'BUNDLE_MANIFEST') if not is_debugging else None)
+    if not is_debugging and not web_assets.auto_build and not app.asset_manifest:
+        _logger.warning('The bundles are not built, nor built on demand; run build.py.')
+    app.jinja_env.globals['asset_urls'] = asset_urls
+    serve_immutable_static(app)
+
     return app
 
 
+def build(app, level=9, force=False, workers=1):
+    """
+    Build every registered bundle ahead of time, record the files that each
+    serves in the asset manifest, and write a precompressed (gzip) variant of
+    each of those files; see the C{hipflask.support.web.bundles} module.
+
+    @param app: the Flask application, its assets prepared; must not be C{None}.
+    @param level: the compression level, from C{1} (fastest) to C{9} (smallest).
+    @param force: build the bundles even if their inputs are unchanged.
+    @param workers: the number of processes to build in.
+    @return: a C{BuildOutcome} for each bundle (or leaf of one) built on its own.
+    @raise IOError: if any source is missing; nothing is built.
+    """
+
+    builder = BundleBuilder(app,
+                            manifest=AssetManifest(config_path(app, 'BUNDLE_MANIFEST')),
+                            cache=BuildCache(config_path(app, 'BUNDLE_BUILD_CACHE')),
+                            workers=workers,
+                            level=level)
+    outcomes = builder.build([name for name, _ in BUNDLES], force=force)
+    app.asset_manifest = builder.manifest
+    return outcomes
+
+
+def config_path(app, name):
+    path = app.config.get(name, None)
+    if path is None:
+        return None
+    return os.path.join(os.getcwd(), path)
+
+
 def prepare_css():
     folder_css = 'css'
 
     vendor = ('bootstrap.css',
               'bootstrap-theme.css')
     css_vendor = Bundle(*prefix_with(folder_css, vendor),
-                        output='{}/vendor.min.css'.format(folder_css))
+                        output='{}/vendor.min.%(version)s.css'.format(folder_css))
 
     custom = ('hipflask.css',)
     css_custom = Bundle(*prefix_with(folder_css, custom),
-                        output='{}/hipflask.min.css'.format(folder_css))
+                        output='{}/hipflask.min.%(version)s.css'.format(folder_css))
 
     return css_vendor, css_custom
 
@@ -37,10 +83,12 @@ def prepare_css():
 def prepare_js():
     custom = ['angular-lodash.js', 'hipflask.js']
     custom.extend(splat(''))
-    js_custom = Bundle(*prefix_with('js', custom))
+    js_custom = Bundle(*prefix_with('js', custom),
+                       output='js/hipflask.%(version)s.js')
 
     vendor = ('vendor.min.js',)
-    js_vendor = Bundle(*prefix_with('js/vendor', vendor))
+    js_vendor = Bundle(*prefix_with('js/vendor', vendor),
+                       output='js/vendor.min.%(version)s.js')
 
     return js_vendor, js_custom
 
@@ -64,3 +112,9 @@ def splat(module):
         '{}runs/*.js'.format(module)))
 
     return components
+
+
+BUNDLES = (('css_all', prepare_css),
+           ('js_all', prepare_js))
+
+_logger = logging.getLogger(__name__)
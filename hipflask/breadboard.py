@@ -2,22 +2,41 @@
 
 import logging
 
+from functools import partial
+
 from flask import Config
 from injector import Module, singleton, inject, provides
 from pymongo import MongoClient
 from pymongo.database import Database
+from hipflask.support.concurrency import Executor
+from hipflask.support.mongo import MongoPoolMetrics, InstrumentedPool
+
+# settings for the Mongo connection pool, mapped to the corresponding MongoClient options
+MONGO_POOL_OPTIONS = (('MONGO_MAX_POOL_SIZE', 'max_pool_size'),
+                      ('MONGO_WAIT_QUEUE_TIMEOUT_MS', 'waitQueueTimeoutMS'),
+                      ('MONGO_WAIT_QUEUE_MULTIPLE', 'waitQueueMultiple'),
+                      ('MONGO_SOCKET_TIMEOUT_MS', 'socketTimeoutMS'),
+                      ('MONGO_CONNECT_TIMEOUT_MS', 'connectTimeoutMS'),
+                      ('MONGO_READ_PREFERENCE', 'read_preference'))
 
 
 class MongoModule(Module):
-    @inject(config=Config)
+    @inject(config=Config, pool_metrics=MongoPoolMetrics)
     @provides(MongoClient, scope=singleton)
-    def provide_mongo_client(self, config):
+    def provide_mongo_client(self, config, pool_metrics):
         url = get_required_value(config, 'MONGO_URL')
         connect_eagerly = config.get('MONGO_CONNECT_EAGERLY', True)
+        options = mongo_pool_options(config)
+
+        _logger.debug('Mongo connection [url=%s, options=%s].', url, options)
 
-        _logger.debug('Mongo connection [url=%s].', url)
+        return MongoClient(url, _connect=connect_eagerly,
+                           _pool_class=partial(InstrumentedPool, metrics=pool_metrics),
+                           **options)
 
-        return MongoClient(url, connect_eagerly)
+    @provides(MongoPoolMetrics, scope=singleton)
+    def provide_mongo_pool_metrics(self):
+        return MongoPoolMetrics()
 
     @inject(config=Config, mongo_client=MongoClient)
     @provides(Database, scope=singleton)
@@ -29,6 +48,33 @@ class MongoModule(Module):
         return mongo_client[db_name]
 
 
+class ConcurrencyModule(Module):
+    @inject(config=Config)
+    @provides(Executor, scope=singleton)
+    def provide_executor(self, config):
+        workers = config.get('ASYNC_POOL_SIZE', 8)
+
+        _logger.debug('Executor [workers=%d].', workers)
+
+        return Executor(workers=workers)
+
+
+def mongo_pool_options(config):
+    """
+    Gather the Mongo connection pool options that are set in the supplied C{config}.
+
+    @param config: the configuration; must not be C{None}.
+    @return: the C{MongoClient} options; never C{None}.
+    """
+
+    options = {}
+    for key, option in MONGO_POOL_OPTIONS:
+        value = config.get(key, None)
+        if value is not None:
+            options[option] = value
+    return options
+
+
 def get_required_value(config, key):
     value = config.get(key, None)
     if value is None:
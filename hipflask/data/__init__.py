@@ -1,50 +1,272 @@
 # -*- coding: utf-8 -*-
 
+from collections import OrderedDict
+from itertools import islice
 import logging
+import os
+import struct
+import time
+
+# noinspection PyPackageRequirements
+from bson import BSON
+# noinspection PyPackageRequirements
+from bson.json_util import object_hook
 
 from flask import Config
 from injector import inject, singleton, Module, provides
 from pymongo import MongoClient
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError
 from hipflask.support import DEVELOPMENT, default
+from hipflask.support.concurrency import Executor, resolve
+from hipflask.support.mongo import munge_ids, DEFAULT_ID_MAPPER
+import simplejson as json
 from yaml import load_all
 
+try:
+    # libyaml-backed, and many times faster than the pure-Python loaders
+    from yaml import CSafeLoader as SafeLoader, CLoader as Loader
+except ImportError:
+    from yaml import SafeLoader, Loader
+
 
 class DataSetMixin(object):
-    def __init__(self, environment=DEVELOPMENT):
+    # the collection that the documents are loaded into, and the (logical) name of the file they are loaded from
+    collection_name = None
+    data_file = None
+
+    def __init__(self, environment=DEVELOPMENT, safe=True):
         super(DataSetMixin, self).__init__()
 
         self.environment = default_to_development(environment)
+        self.safe = safe
+
+    def documents(self):
+        """
+        Stream the documents of this data set, skipping any empty ones.
+        """
+
+        for document in self._load(self.data_file):
+            if document is not None:
+                yield document
 
     def _load(self, data_file):
         datafile = self._data_file(data_file)
-        with open(datafile, 'r') as stream:
-            data = load_all(stream)
-            for datum in data:
+        reader = DATA_READERS[os.path.splitext(datafile)[1]]
+        with open(datafile, 'rb') as stream:
+            for datum in reader(stream, safe=self.safe):
                 yield datum
 
     def _data_file(self, name):
+        """
+        Find the file for the named data set, in the first of the supported
+        formats that there is one for; forex, C{example.ndjson}.
+        """
+
         package = __package__.replace('.', '/')
-        return '{}/{}/{}.yaml'.format(package, self.environment, name)
+        candidates = ['{}/{}/{}{}'.format(package, self.environment, name, suffix) for suffix in DATA_READERS]
+        for candidate in candidates:
+            if os.path.exists(candidate):
+                return candidate
+        return candidates[0]
 
 
 class GoldenDataSet(DataSetMixin):
-    def __init__(self, database_dropper=None, example_data_set=None, environment=DEVELOPMENT):
+    def __init__(self, database_dropper=None, example_data_set=None, bulk_loader=None, environment=DEVELOPMENT):
         super(GoldenDataSet, self).__init__(environment=environment)
 
         self.database_dropper = database_dropper
         self.example_data_set = example_data_set
+        self.bulk_loader = bulk_loader
+
+    @property
+    def data_sets(self):
+        return [self.example_data_set]
 
     def load(self):
         self.database_dropper.drop()
 
         _logger.info('Loading data into the [%s] environment.', self.environment)
-        list(self.example_data_set.load())
+        return self.bulk_loader.load_all(
+            (data_set.collection_name, data_set.documents()) for data_set in self.data_sets)
 
 
 class ExampleDataSet(DataSetMixin):
-    def load(self):
-        for example in self._load('example'):
-            _logger.info('Loading [%s].', example)
+    collection_name = 'examples'
+    data_file = 'example'
+
+
+class LoadReport(object):
+    """
+    How many documents were loaded into a collection, and how quickly.
+    """
+
+    def __init__(self, collection_name, inserted=0, failed=0, seconds=0.0):
+        super(LoadReport, self).__init__()
+
+        self.collection_name = collection_name
+        self.inserted = inserted
+        self.failed = failed
+        self.seconds = seconds
+
+    @property
+    def rate(self):
+        """
+        The number of documents inserted per second.
+        """
+
+        return self.inserted / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self):
+        return '[{}]: [{}] inserted, [{}] failed in [{:.2f}s] ([{:.0f}] documents/sec)'.format(
+            self.collection_name, self.inserted, self.failed, self.seconds, self.rate)
+
+
+class BulkLoader(object):
+    """
+    Load documents into Mongo in batches of unordered bulk inserts.
+
+    The C{id} of each document is munged (see C{munge_ids}) before it is
+    inserted. Unordered inserts let the server carry on past a failed document
+    (forex, a duplicate key); failures are counted and logged, not raised.
+    """
+
+    def load(self, collection_name, documents):
+        """
+        Load the supplied documents into the named collection.
+
+        @param collection_name: the name of the collection; must not be C{None}.
+        @param documents: an iterable of documents; consumed just one batch at a time.
+        @return: a C{LoadReport}; never C{None}.
+        """
+
+        assert collection_name is not None, 'The collection name is required.'
+
+        collection = self.db[collection_name]
+        report = LoadReport(collection_name)
+        started = time.time()
+        for batch in batches(documents, self.batch_size):
+            munge_ids(batch, self.id_mapper)
+            inserted, failed = self._insert(collection, batch)
+            report.inserted += inserted
+            report.failed += failed
+        report.seconds = time.time() - started
+
+        _logger.info('Loaded %s.', report)
+        return report
+
+    def load_all(self, data_sets):
+        """
+        Load several collections in parallel.
+
+        @param data_sets: an iterable of C{(collection_name, documents)} pairs.
+        @return: a C{LoadReport} for each collection, in the same order; never C{None}.
+        """
+
+        executor = Executor(workers=self.workers)
+        try:
+            futures = [executor.submit(self.load, collection_name, documents)
+                       for collection_name, documents in data_sets]
+            return resolve(futures)
+        finally:
+            executor.shutdown()
+
+    # noinspection PyMethodMayBeStatic
+    def _insert(self, collection, batch):
+        bulk = collection.initialize_unordered_bulk_op()
+        for document in batch:
+            bulk.insert(document)
+        try:
+            result = bulk.execute()
+        except BulkWriteError as e:
+            result = e.details
+            write_errors = result.get('writeErrors', [])
+            _logger.warning('[%d] documents failed to load into [%s]; first error [%s].',
+                            len(write_errors), collection.name,
+                            write_errors[0].get('errmsg', None) if write_errors else None)
+        return result.get('nInserted', 0), len(result.get('writeErrors', []))
+
+    def __init__(self, db, batch_size=1000, workers=4, id_mapper=None):
+        """
+        Create a C{BulkLoader}.
+
+        @param db: the Mongo database; must not be C{None}.
+        @param batch_size: the number of documents in each bulk insert; must be greater than zero.
+        @param workers: the number of collections to load in parallel; must be greater than zero.
+        @param id_mapper: maps any C{id} to an C{ObjectId}; C{None} uses the C{DEFAULT_ID_MAPPER}.
+        """
+
+        super(BulkLoader, self).__init__()
+
+        assert db is not None, 'The database is required.'
+        assert batch_size > 0, 'The batch size must be greater than zero.'
+        assert workers > 0, 'At least one worker is required.'
+
+        self.db = db
+        self.batch_size = batch_size
+        self.workers = workers
+        self.id_mapper = DEFAULT_ID_MAPPER if id_mapper is None else id_mapper
+
+
+def read_yaml(stream, safe=True):
+    """
+    Read the documents from a YAML stream; when C{safe}, just the standard
+    YAML tags are resolved, never arbitrary Python objects.
+    """
+
+    return load_all(stream, Loader=SafeLoader if safe else Loader)
+
+
+# noinspection PyUnusedLocal
+def read_json_lines(stream, safe=True):
+    """
+    Read the documents from a stream of newline-delimited JSON, as written by
+    C{mongoexport}: MongoDB extended JSON such as C{{"$oid": ...}} is decoded.
+    """
+
+    for line in stream:
+        if line.strip():
+            yield json.loads(line, object_hook=object_hook)
+
+
+# noinspection PyUnusedLocal
+def read_bson(stream, safe=True):
+    """
+    Read the documents from a stream of concatenated BSON, as written by
+    C{mongodump}.
+    """
+
+    while True:
+        header = stream.read(4)
+        if not header:
+            return
+        if len(header) < 4:
+            raise ValueError('Truncated BSON document.')
+        length = struct.unpack('<i', header)[0]
+        body = stream.read(length - 4)
+        if len(body) < length - 4:
+            raise ValueError('Truncated BSON document.')
+        yield BSON(header + body).decode()
+
+
+# readers of data files, keyed by file suffix, in order of preference
+DATA_READERS = OrderedDict((('.yaml', read_yaml),
+                            ('.ndjson', read_json_lines),
+                            ('.jsonl', read_json_lines),
+                            ('.bson', read_bson)))
+
+
+def batches(iterable, size):
+    """
+    Group the items of the supplied iterable into lists of (at most) C{size} items.
+    """
+
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
 
 
 class DatabaseDropper(object):
@@ -62,10 +284,11 @@ class DatabaseDropper(object):
 
 
 class GoldenDataSetModule(Module):
-    @inject(example_data_set=ExampleDataSet, database_dropper=DatabaseDropper)
+    @inject(example_data_set=ExampleDataSet, database_dropper=DatabaseDropper, bulk_loader=BulkLoader)
     @provides(GoldenDataSet, scope=singleton)
-    def provide_golden_data_set(self, example_data_set, database_dropper):
-        return GoldenDataSet(example_data_set=example_data_set, database_dropper=database_dropper)
+    def provide_golden_data_set(self, example_data_set, database_dropper, bulk_loader):
+        return GoldenDataSet(example_data_set=example_data_set, database_dropper=database_dropper,
+                             bulk_loader=bulk_loader)
 
     @provides(ExampleDataSet, scope=singleton)
     def provide_example_data_set(self):
@@ -80,6 +303,16 @@ class GoldenDataSetModule(Module):
 
         return DatabaseDropper(mongo_client=mongo_client, db_name=db_name)
 
+    @inject(config=Config, db=Database)
+    @provides(BulkLoader, scope=singleton)
+    def provide_bulk_loader(self, config, db):
+        batch_size = config.get('DATA_BATCH_SIZE', 1000)
+        workers = config.get('DATA_LOAD_WORKERS', 4)
+
+        _logger.debug('Bulk loader [batch_size=%d, workers=%d].', batch_size, workers)
+
+        return BulkLoader(db, batch_size=batch_size, workers=workers)
+
 
 def default_to_development(environment):
     return (default(environment, lambda: DEVELOPMENT)).lower()
@@ -10,6 +10,6 @@ _logger = logging.getLogger(__name__)
 index = Blueprint('index', __name__)
 
 
-@route(index, '/')
+@route(index, '/', view_name='index')
 def display_homepage():
-    return 'index', {}
+    return {}
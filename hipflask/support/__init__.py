@@ -46,6 +46,8 @@ class IdBased(object):
     A mixin for classes that support an ID value.
     """
 
+    __slots__ = ('_id',)
+
     # noinspection PyShadowingBuiltins,PyUnusedLocal
     def __init__(self, id=None, *args, **kwargs):
         self._id = id
@@ -127,11 +129,14 @@ class CodedError(IdBased):
     no localised error message.
     """
 
+    # validating a big payload can create a great many errors
+    __slots__ = ('code', 'message')
+
     def __init__(self, code, message=None, **kwargs):
         super(CodedError, self).__init__(**kwargs)
 
-        self.code = code
-        self.message = safe_string(message)
+        self.code = intern_string(code)
+        self.message = intern_string(safe_string(message))
 
     def __str__(self):
         return '{} [{}, "{}"]'.format(self.__class__.__name__, self.code, self.message)
@@ -154,13 +159,15 @@ class CodedError(IdBased):
 
 
 class FieldError(object):
+    __slots__ = ('field_name', 'error')
+
     def __init__(self, field_name, error):
         super(FieldError, self).__init__()
 
         assert has_text(field_name), 'The field name is required.'
         assert error is not None, 'The error is required.'
 
-        self.field_name = safe_string(field_name)
+        self.field_name = intern_string(safe_string(field_name))
         self.error = error
 
     def __str__(self):
@@ -190,55 +197,86 @@ class CodedErrors(object):
     resource as whole or to a scope bigger than a single resource--and a
     "field" error--an error that applies at the level of a single resource or
     field.
+
+    Errors are only ever added through C{add_field_error} and
+    C{add_global_error}; C{errors} is read-only, so that the buckets that the
+    errors are classified into can never disagree with it.
     """
 
+    __slots__ = ('_errors', '_field_errors', '_global_errors', '_field_errors_by_name')
+
     def __init__(self):
         super(CodedErrors, self).__init__()
 
-        self.errors = []
+        # every error, in the order added; each is also classified, as it is added, into a bucket
+        self._errors = []
+        self._field_errors = []
+        self._global_errors = []
+        self._field_errors_by_name = {}
+
+    @property
+    def errors(self):
+        return tuple(self._errors)
 
     def contains_errors(self):
-        return len(self.errors) > 0
+        return len(self._errors) > 0
 
     @property
     def length(self):
-        return len(self.errors)
+        return len(self._errors)
 
     @property
     def field_errors(self):
-        return filter(lambda error: isinstance(error, FieldError), self.errors)
+        return list(self._field_errors)
 
     def has_field_errors(self):
-        return len(self.field_errors) > 0
+        return len(self._field_errors) > 0
 
     @property
     def global_errors(self):
-        return filter(lambda error: isinstance(error, CodedError), self.errors)
+        return list(self._global_errors)
 
     def has_global_errors(self):
-        return len(self.global_errors) > 0
+        return len(self._global_errors) > 0
 
     def add_field_error(self, field_error):
         assert field_error is not None, 'The field error is required.'
 
-        self.errors.append(field_error)
+        self._add(field_error)
         return self
 
     def add_global_error(self, global_error):
         assert global_error is not None, 'The global error is required.'
 
-        self.errors.append(global_error)
+        self._add(global_error)
         return self
 
     def field_errors_for(self, field_name):
-        return filter(lambda error: error.field_name == field_name, self.field_errors)
+        return list(self._field_errors_by_name.get(field_name, ()))
 
     def has_field_errors_for(self, field_name):
-        errors = self.field_errors_for(field_name)
-        return len(errors) > 0
+        return field_name in self._field_errors_by_name
+
+    def _add(self, error):
+        # classified by type, not by how it was added, just as the errors always have been
+        self._errors.append(error)
+        if isinstance(error, FieldError):
+            self._field_errors.append(error)
+            self._field_errors_by_name.setdefault(error.field_name, []).append(error)
+        elif isinstance(error, CodedError):
+            self._global_errors.append(error)
 
     def __str__(self):
-        return '{} [{} errors]'.format(self.__class__.__name__, len(self.errors))
+        return '{} [{} errors]'.format(self.__class__.__name__, len(self._errors))
+
+
+def intern_string(value):
+    """
+    Intern the supplied value if it is a (byte) string, so that the many
+    errors with the same code, message or field name share just the one copy.
+    """
+
+    return intern(value) if type(value) is str else value
 
 
 ERROR_SERVER_ERROR = CodedError(3, message='Gosh, something rather unexpected went wrong.')
@@ -267,5 +305,16 @@ class CallableMapperMixin(object):
     def __call__(self, *args, **kwargs):
         return self.map(*args, **kwargs)
 
+    def map_many(self, values):
+        """
+        Map each of the supplied values; subclasses can do so more efficiently
+        than one at a time.
+
+        @param values: an iterable of values; must not be C{None}.
+        @return: a list of the mapped values, in the same order; never C{None}.
+        """
+
+        return [self.map(value) for value in values]
+
     def map(self, *args, **kwargs):
         raise NotImplementedError('Abstract method.')
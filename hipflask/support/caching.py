@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Caching-related utility classes.
+"""
+
+from __future__ import absolute_import
+
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from threading import Lock
+
+
+CacheInfo = namedtuple('CacheInfo', ('hits', 'misses', 'evictions', 'maxsize', 'currsize'))
+
+
+class LruCache(object):
+    """
+    A bounded, thread-safe, least-recently-used cache.
+
+    Keeps hit, miss and eviction counters so that the effectiveness of the
+    cache can be observed at runtime.
+    """
+
+    def __init__(self, maxsize=128):
+        """
+        Create an C{LruCache}.
+
+        @param maxsize: the maximum number of entries; must be greater than zero.
+        """
+
+        super(LruCache, self).__init__()
+
+        assert maxsize > 0, 'The maximum size must be greater than zero.'
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """
+        Look up the value cached against the supplied C{key}.
+
+        @param key: the key; must be hashable.
+        @param default: returned when there is no such entry.
+        @return: the cached value, or C{default}.
+        """
+
+        with self._lock:
+            try:
+                value = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._entries[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """
+        Cache the supplied C{value} against the supplied C{key}, evicting the
+        least recently used entry if the cache is full.
+
+        @param key: the key; must be hashable.
+        @param value: the value; can be C{None}.
+        @return: the C{value}, for chaining.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def info(self):
+        """
+        Report on the effectiveness of this cache.
+
+        @return: a C{CacheInfo}; never C{None}.
+        """
+
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._entries))
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return '{} [{}]'.format(self.__class__.__name__, self.info())
+
+
+def hit_rate(info):
+    """
+    Calculate the hit rate for the supplied C{CacheInfo}.
+
+    @param info: the cache info; must not be C{None}.
+    @return: the hit rate in the range C{[0.0, 1.0]}.
+    """
+
+    lookups = info.hits + info.misses
+    return float(info.hits) / lookups if lookups else 0.0
+
+
+def memoized(maxsize=1024):
+    """
+    Decorate a single-argument function to remember its results.
+
+    Unlike an C{LruCache}, the memo takes no lock and keeps no counters, so a
+    hit costs little more than a dict lookup; suited to cheap functions that
+    are called very often with a small set of arguments. When full, the memo
+    is emptied and starts over. The decorated function has a C{cache_clear()}.
+
+    Results are remembered by the type of the argument as well as its value,
+    in a memo per type, since values of different types can be equal
+    (C{'a' == u'a'}) and yet give results of different types.
+
+    @param maxsize: the maximum number of results to remember; must be greater than zero.
+    """
+
+    assert maxsize > 0, 'The maximum size must be greater than zero.'
+
+    def decorator(f):
+        # by the type of argument; rather than keyed on (argument, type) pairs, which would be built on every call
+        memos = {}
+
+        @wraps(f)
+        def wrapper(argument):
+            try:
+                return memos[type(argument)][argument]
+            except KeyError:
+                pass
+            result = f(argument)
+            memo = memos.setdefault(type(argument), {})
+            if len(memo) >= maxsize:
+                memo.clear()
+            memo[argument] = result
+            return result
+
+        wrapper.cache_clear = memos.clear
+        return wrapper
+
+    return decorator
@@ -3,6 +3,10 @@
 Collections-related utility methods.
 """
 
+from __future__ import absolute_import
+
+from collections import Mapping
+
 
 def has_elements(l):
     return l is not None and len(l) > 0
@@ -24,3 +28,56 @@ def copy_and_append(source, updates):
     if updates:
         result.append(updates)
     return result
+
+
+class LayeredMapping(Mapping):
+    """
+    A read-only view over a stack of mappings, like Python 3's C{ChainMap}: a
+    key is looked up in each mapping in turn, so that the first to have it
+    wins. Nothing is copied; a change to any of the mappings shows through.
+    """
+
+    __slots__ = ('maps',)
+
+    def __getitem__(self, key):
+        for mapping in self.maps:
+            if key in mapping:
+                return mapping[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        for mapping in self.maps:
+            if key in mapping:
+                return True
+        return False
+
+    def get(self, key, default=None):
+        for mapping in self.maps:
+            if key in mapping:
+                return mapping[key]
+        return default
+
+    def __iter__(self):
+        seen = set()
+        for mapping in self.maps:
+            for key in mapping:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return len(set().union(*self.maps))
+
+    def __repr__(self):
+        return 'LayeredMapping({})'.format(', '.join(repr(mapping) for mapping in self.maps))
+
+    def __init__(self, *maps):
+        """
+        Create a C{LayeredMapping}.
+
+        @param maps: the mappings, the foremost first; must not be C{None}.
+        """
+
+        super(LayeredMapping, self).__init__()
+
+        self.maps = maps
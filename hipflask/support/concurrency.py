@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Coroutine-style handlers on top of a pool of threads.
+
+A coroutine is a generator that yields I{futures}--the pending results of
+work submitted to an C{Executor}--and is sent back each result as it becomes
+available. Yielding a list (or tuple) of futures waits for all of them, so
+independent pieces of (blocking) I/O run concurrently. A coroutine returns
+its result by raising C{Return}:
+
+    def display_dashboard(self):
+        users, orders = yield [self.users.find(), self.orders.find()]
+        raise Return(('dashboard', dict(users=users, orders=orders)))
+"""
+
+from inspect import isgenerator, isgeneratorfunction
+from multiprocessing.pool import ThreadPool
+import os
+import sys
+from threading import Lock
+
+
+class Return(Exception):
+    """
+    Raised by a coroutine to return its C{value}.
+    """
+
+    def __init__(self, value=None):
+        super(Return, self).__init__()
+
+        self.value = value
+
+
+class Executor(object):
+    """
+    Run functions on a pool of threads, returning futures of their results.
+
+    The pool is created on first use, and afresh in a forked process.
+    """
+
+    def submit(self, f, *args, **kwargs):
+        """
+        Submit the supplied function to be called on a thread of the pool.
+
+        @param f: the function; must not be C{None}.
+        @return: a future of the result of the function; never C{None}.
+        """
+
+        assert f is not None, 'The function is required.'
+
+        return self._thread_pool().apply_async(f, args, kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.close()
+                self._pool.join()
+                self._pool = None
+
+    def _thread_pool(self):
+        pid = os.getpid()
+        if self._pool is None or self._pid != pid:
+            with self._lock:
+                if self._pool is None or self._pid != pid:
+                    self._pool = ThreadPool(self.workers)
+                    self._pid = pid
+        return self._pool
+
+    def __init__(self, workers=8):
+        """
+        Create an C{Executor}.
+
+        @param workers: the number of threads in the pool; must be greater than zero.
+        """
+
+        super(Executor, self).__init__()
+
+        assert workers > 0, 'At least one worker is required.'
+
+        self.workers = workers
+
+        self._pool = None
+        self._pid = None
+        self._lock = Lock()
+
+
+def is_future(value):
+    return hasattr(value, 'ready') and hasattr(value, 'get')
+
+
+def is_coroutine(value):
+    return isgenerator(value)
+
+
+def is_coroutine_function(f):
+    return isgeneratorfunction(f)
+
+
+def resolve(value, timeout=None):
+    """
+    Wait for the result of the supplied future, or list of futures.
+
+    Values that are not futures are returned as they are.
+    """
+
+    if is_future(value):
+        return value.get(timeout)
+    elif isinstance(value, (list, tuple)) and any(is_future(item) for item in value):
+        return [resolve(item, timeout) for item in value]
+    return value
+
+
+def run_coroutine(coroutine, timeout=None):
+    """
+    Drive the supplied coroutine to completion, blocking the calling thread
+    on each future that it yields.
+
+    @param coroutine: the coroutine (generator); must not be C{None}.
+    @param timeout: the longest to wait for any one future, in seconds; C{None} waits indefinitely.
+    @return: the value the coroutine returned; C{None} if it just finished.
+    """
+
+    assert coroutine is not None, 'The coroutine is required.'
+
+    value, error = None, None
+    while True:
+        try:
+            if error is None:
+                yielded = coroutine.send(value)
+            else:
+                yielded = coroutine.throw(*error)
+        except Return as r:
+            return r.value
+        except StopIteration:
+            return None
+
+        try:
+            value, error = resolve(yielded, timeout), None
+        except Exception:
+            value, error = None, sys.exc_info()
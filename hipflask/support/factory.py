@@ -10,8 +10,8 @@ from flask.ext.injector import FlaskInjector
 from flask_environments import Environments
 from hipflask.support import default
 from hipflask.support.collections import has_elements
-from hipflask.support.injection import discover_injection_modules
-from hipflask.support.modules import filter_module
+from hipflask.support.injection import discover_injection_modules, is_injection_module
+from hipflask.support.modules import ModuleIndex
 
 
 def create_app(package_name, package_path, settings_override=None, settings='settings.yaml'):
@@ -31,13 +31,34 @@ def create_app(package_name, package_path, settings_override=None, settings='set
 
     logging.basicConfig(level=logging.DEBUG)
 
-    register_blueprints(app, package_name, package_path)
-    register_injection_modules(app, package_name, package_path, settings_override=settings_override)
+    module_index = create_module_index(app)
+    register_blueprints(app, package_name, package_path, module_index=module_index)
+    register_injection_modules(app, package_name, package_path, settings_override=settings_override,
+                               module_index=module_index)
 
     return app
 
 
-def register_blueprints(app, package_name, package_path):
+def create_module_index(app):
+    """
+    Create a L{ModuleIndex} that discovers both Blueprints and Injector Modules
+    in a single pass, persisting what it finds to the C{DISCOVERY_MANIFEST}.
+
+    @param app: the Flask application; must not be C{None}.
+    @return: the module index; never C{None}.
+    """
+
+    manifest = app.config.get('DISCOVERY_MANIFEST', None)
+    if manifest is not None:
+        manifest = os.path.join(os.getcwd(), manifest)
+    return ModuleIndex(dict(blueprints=is_blueprint, injection_modules=is_injection_module), manifest=manifest)
+
+
+def is_blueprint(item):
+    return isinstance(item, Blueprint)
+
+
+def register_blueprints(app, package_name, package_path, module_index=None):
     """
     Register all Blueprint instances on the supplied L{flask.Flask} application
     found in all modules for the specified package.
@@ -45,19 +66,19 @@ def register_blueprints(app, package_name, package_path):
     @param app: the Flask application; must not be C{None}.
     @param package_name: the package name.
     @param package_path: the package path.
+    @param module_index: finds the Blueprints; can be C{None}.
     """
 
-    def is_blueprint(item):
-        return isinstance(item, Blueprint)
+    module_index = default(module_index, lambda: ModuleIndex(dict(blueprints=is_blueprint)))
 
-    blueprints = list(filter_module(package_name, package_path, is_blueprint))
+    blueprints = module_index.find(package_name, package_path, 'blueprints')
     _logger.debug('Registering [%d] blueprints on [%s].', len(blueprints), app)
     for blueprint, module in blueprints:
         _logger.debug('Registering blueprint from [%s] on [%s].', module.__name__, app)
         app.register_blueprint(blueprint)
 
 
-def register_injection_modules(app, package_name, package_path, settings_override=None):
+def register_injection_modules(app, package_name, package_path, settings_override=None, module_index=None):
     """
     Register all Injector Modules on the supplied L{flask.Flask} application
     found in all modules for the specified package.
@@ -65,6 +86,7 @@ def register_injection_modules(app, package_name, package_path, settings_overrid
     @param app: the Flask application; must not be C{None}.
     @param package_name: the package name.
     @param package_path: the package path.
+    @param module_index: finds the Injector Modules; can be C{None}.
     """
 
     settings_override = default(settings_override, lambda: dict())
@@ -75,7 +97,7 @@ def register_injection_modules(app, package_name, package_path, settings_overrid
         packages.extend(extra_injection_modules)
         return packages
 
-    injection_modules = list(discover_injection_modules(assemble_packages()))
+    injection_modules = list(discover_injection_modules(assemble_packages(), module_index=module_index))
 
     if has_elements(injection_modules):
         _logger.debug('Registering [%d] injection modules on [%s].', len(injection_modules), app)
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+File-related utility methods: atomic writes, and the (versioned, JSON)
+manifests that processes leave for each other.
+"""
+
+import logging
+import os
+import tempfile
+
+import simplejson as json
+
+
+def write_atomically(path, content):
+    """
+    Write the supplied C{content} to a temporary file alongside C{path}, then
+    rename it into place, so that a concurrent reader never sees a partial file.
+
+    The temporary file is hidden (its name starts with C{.}), and removed if
+    anything goes wrong.
+
+    @param path: the (file)path; its directory must exist.
+    @param content: the content (bytes).
+    @raise IOError: if the file cannot be written.
+    @raise OSError: if the file cannot be created, or renamed into place.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as stream:
+            stream.write(content)
+        os.rename(temporary, path)
+    except (IOError, OSError):
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+        raise
+
+
+def read_manifest(path, version, key):
+    """
+    Read the content of a (JSON) manifest.
+
+    @param path: the (file)path of the manifest; can be C{None}.
+    @param version: the version of the manifest; one of any other version is ignored.
+    @param key: the key of the content.
+    @return: the content; an empty dict if there is no such (readable) manifest.
+    """
+
+    if path is None or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as stream:
+            manifest = json.load(stream)
+    except (IOError, ValueError):
+        _logger.warning('Ignoring unreadable manifest [%s].', path)
+        return {}
+    if manifest.get('version', None) != version:
+        return {}
+    return manifest.get(key, {})
+
+
+def write_manifest(path, version, key, content):
+    """
+    Write the content of a (JSON) manifest, atomically; see C{read_manifest}.
+    A manifest that cannot be written is logged, and otherwise ignored.
+    """
+
+    if path is None:
+        return
+    try:
+        write_atomically(path, json.dumps({'version': version, key: content}))
+    except (IOError, OSError):
+        _logger.warning('Cannot write manifest [%s].', path, exc_info=True)
+
+
+_logger = logging.getLogger(__name__)
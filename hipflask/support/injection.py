@@ -3,13 +3,16 @@ import inspect
 import logging
 
 from injector import Module
-from hipflask.support.modules import filter_module
+from hipflask.support.modules import ModuleIndex
 
 
-def discover_injection_modules(packages):
+def discover_injection_modules(packages, module_index=None):
+    if module_index is None:
+        module_index = ModuleIndex(dict(injection_modules=is_injection_module))
+
     for package in packages:
         name, path = package
-        for item, module in filter_module(name, path, is_injection_module):
+        for item, module in module_index.find(name, path, 'injection_modules'):
             _logger.debug('Found injection module [%s] in [%s].', item.__name__, module.__name__)
             yield item
 
@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
 
 from importlib import import_module
+import logging
+import os
 from pkgutil import iter_modules
 
+from hipflask.support.files import read_manifest, write_manifest
+
+MANIFEST_VERSION = 1
+
 
 def filter_module(package_name, package_path, predicate):
     for _, name, _ in iter_modules(package_path):
@@ -13,3 +19,126 @@ def filter_module(package_name, package_path, predicate):
             if predicate(item):
                 yield (item, module)
 
+
+def module_files(package_name, package_path):
+    """
+    Find the source file of each module in the specified package, without
+    importing any of them.
+
+    @param package_name: the package name.
+    @param package_path: the package path.
+    @return: C{(module_name, file)} pairs; never C{None}.
+    """
+
+    files = []
+    for importer, name, _ in iter_modules(package_path):
+        loader = importer.find_module(name)
+        if loader is not None:
+            files.append(('{}.{}'.format(package_name, name), loader.get_filename()))
+    return files
+
+
+def scan_modules(package_name, package_path, predicates):
+    """
+    Index the items in all modules for the specified package against each of
+    the supplied C{predicates}, importing and inspecting each module just once.
+
+    @param package_name: the package name.
+    @param package_path: the package path.
+    @param predicates: predicates keyed by category; must not be C{None}.
+    @return: the names of the matching items, keyed by category, keyed by module name; never C{None}.
+    """
+
+    index = {}
+    for module_name, _ in module_files(package_name, package_path):
+        module = import_module(module_name)
+        found = dict((category, []) for category in predicates)
+        for name in dir(module):
+            item = getattr(module, name)
+            for category, predicate in predicates.iteritems():
+                if predicate(item):
+                    found[category].append(name)
+        index[module_name] = found
+    return index
+
+
+class ModuleIndex(object):
+    """
+    Find the items in all modules for a package that match the predicate for a
+    category, forex, all Blueprints.
+
+    Each package is scanned once, for all categories at the same time, and the
+    outcome remembered. If given a C{manifest} (file)path, the outcome is also
+    persisted along with the modification time of each module's file; while
+    those files are unchanged, subsequent processes only import the modules that
+    hold matching items, and skip inspecting them.
+    """
+
+    def find(self, package_name, package_path, category):
+        """
+        Find all items that match the predicate for the specified C{category}.
+
+        @param package_name: the package name.
+        @param package_path: the package path.
+        @param category: the category; must be one of those this index was created with.
+        @return: C{(item, module)} pairs; never C{None}.
+        """
+
+        assert category in self.predicates, 'Unknown category [{}].'.format(category)
+
+        if package_name not in self._found:
+            self._found[package_name] = self._discover(package_name, package_path)
+        return list(self._found[package_name][category])
+
+    def _discover(self, package_name, package_path):
+        files = module_files(package_name, package_path)
+        modification_times = dict((name, os.path.getmtime(path)) for name, path in files)
+
+        entry = self._manifest.get(package_name, None)
+        if entry is not None and entry['mtimes'] == modification_times:
+            found = self._resolve(entry['index'])
+            if found is not None:
+                _logger.debug('Discovered [%s] from manifest [%s].', package_name, self.manifest)
+                return found
+
+        index = scan_modules(package_name, package_path, self.predicates)
+        self._manifest[package_name] = dict(mtimes=modification_times, index=index)
+        write_manifest(self.manifest, MANIFEST_VERSION, 'packages', self._manifest)
+        return self._resolve(index)
+
+    def _resolve(self, index):
+        found = dict((category, []) for category in self.predicates)
+        for module_name, names_by_category in sorted(index.iteritems()):
+            if not any(names_by_category.get(category) for category in self.predicates):
+                continue
+            module = import_module(module_name)
+            for category, predicate in self.predicates.iteritems():
+                if category not in names_by_category:
+                    return None
+                for name in names_by_category[category]:
+                    item = getattr(module, name, None)
+                    if not predicate(item):
+                        return None
+                    found[category].append((item, module))
+        return found
+
+    def __init__(self, predicates, manifest=None):
+        """
+        Create a C{ModuleIndex}.
+
+        @param predicates: predicates keyed by category; must not be empty.
+        @param manifest: the (file)path of the manifest; C{None} if not persisted.
+        """
+
+        super(ModuleIndex, self).__init__()
+
+        assert predicates, 'The predicates are required.'
+
+        self.predicates = dict(predicates)
+        self.manifest = manifest
+
+        self._found = {}
+        self._manifest = read_manifest(manifest, MANIFEST_VERSION, 'packages')
+
+
+_logger = logging.getLogger(__name__)
@@ -1,9 +1,17 @@
 # -*- coding: utf-8 -*-
 
 # noinspection PyPackageRequirements
+from binascii import hexlify, unhexlify
 import datetime
+import re
+from threading import Lock
+import time
 
 from bson.objectid import ObjectId
+from pymongo.collection import Collection
+from pymongo.command_cursor import CommandCursor
+from pymongo.cursor import Cursor
+from pymongo.pool import Pool, NO_REQUEST, NO_SOCKET_YET
 from hipflask.support import logger_for, CallableMapperMixin
 import simplejson as json
 from hipflask import CodedError, is_stringy
@@ -20,7 +28,72 @@ class MongoJsonEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+# hex digits only: with every string 24 characters long, validates a whole batch of IDs (joined) in one match
+HEX_DIGITS_PATTERN = re.compile(r'\A[0-9a-fA-F]*\Z')
+
+
+def are_hex_object_ids(strings):
+    """
+    Are all of the supplied strings the 24-digit hex form of an C{ObjectId}?
+
+    @param strings: a list of strings; must not be C{None}.
+    @return: C{True} iff every one is.
+    """
+
+    if map(len, strings).count(24) != len(strings):
+        return False
+    try:
+        # no separator: any that could be joined with could also appear in one of the strings
+        joined = ''.join(strings)
+    except UnicodeDecodeError:
+        # a (non-ASCII) byte string among unicode ones
+        return False
+    return HEX_DIGITS_PATTERN.match(joined) is not None
+
+
+def object_ids_from_hex(strings):
+    """
+    Create an C{ObjectId} from each of the supplied (valid) 24-digit hex strings,
+    decoding them all at once.
+
+    @param strings: a list of strings, for which C{are_hex_object_ids} holds.
+    @return: a list of C{ObjectId}s; never C{None}.
+    """
+
+    binary = unhexlify(''.join(strings))
+    # from the 12 bytes of each: cheaper than from its hex digits, which would be validated (and decoded) again
+    return [ObjectId(binary[offset:offset + 12]) for offset in xrange(0, len(binary), 12)]
+
+
 class ToObjectIdMapper(CallableMapperMixin):
+    def map_many(self, values):
+        """
+        Map each of the supplied values to an C{ObjectId}, validating and
+        decoding all of the (hex) strings among them at once.
+
+        @param values: an iterable of values; must not be C{None}.
+        @return: a list of C{ObjectId}s, in the same order; never C{None}.
+        """
+
+        oids = list(values)
+        positions = []
+        strings = []
+        for position, o in enumerate(oids):
+            if isinstance(o, basestring):
+                positions.append(position)
+                strings.append(o)
+            elif not isinstance(o, ObjectId):
+                oids[position] = self.map(o)
+
+        if are_hex_object_ids(strings):
+            mapped = object_ids_from_hex(strings)
+        else:
+            # the slow path reports the first invalid ID
+            mapped = [self.map(o) for o in strings]
+        for position, oid in zip(positions, mapped):
+            oids[position] = oid
+        return oids
+
     def map(self, o):
         if o is None:
             raise TypeError('Cannot map from None to ObjectId.')
@@ -34,6 +107,44 @@ class ToObjectIdMapper(CallableMapperMixin):
 
 
 class ObjectIdToStringMapper(CallableMapperMixin):
+    def map_many(self, values):
+        """
+        Map each of the supplied values to a string, encoding all of the
+        C{ObjectId}s, and validating all of the strings, among them at once.
+
+        @param values: an iterable of values; must not be C{None}.
+        @return: a list of strings (or C{None}s), in the same order; never C{None}.
+        """
+
+        strings = list(values)
+        oid_positions = []
+        binaries = []
+        string_positions = []
+        for position, o in enumerate(strings):
+            if o is None:
+                continue
+            elif isinstance(o, ObjectId):
+                oid_positions.append(position)
+                binaries.append(o.binary)
+            elif isinstance(o, basestring):
+                string_positions.append(position)
+            else:
+                strings[position] = self.map(o)
+
+        if binaries:
+            hexes = unicode(hexlify(''.join(binaries)))
+            for n, position in enumerate(oid_positions):
+                strings[position] = hexes[n * 24:n * 24 + 24]
+
+        candidates = [strings[position] for position in string_positions]
+        if are_hex_object_ids(candidates):
+            for position, o in zip(string_positions, candidates):
+                strings[position] = unicode(o)
+        else:
+            for position, o in zip(string_positions, candidates):
+                strings[position] = self.map(o)
+        return strings
+
     def map(self, o):
         if o is None:
             oid = None
@@ -49,6 +160,129 @@ class ObjectIdToStringMapper(CallableMapperMixin):
         return oid
 
 
+class MongoPoolMetrics(object):
+    """
+    Counts what goes on in a Mongo connection pool, to help in sizing it.
+
+    A I{wait} is a checkout that found the pool exhausted and so had to queue
+    for a socket; a I{timeout} is a wait that gave up.
+    """
+
+    def __init__(self):
+        super(MongoPoolMetrics, self).__init__()
+
+        self.checkouts = 0
+        self.checkins = 0
+        self.waits = 0
+        self.wait_timeouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.sockets_created = 0
+
+        self._lock = Lock()
+
+    def checked_out(self):
+        with self._lock:
+            self.checkouts += 1
+
+    def checked_in(self):
+        with self._lock:
+            self.checkins += 1
+
+    def waited(self, seconds, acquired):
+        with self._lock:
+            self.waits += 1
+            self.wait_time += seconds
+            self.max_wait_time = max(self.max_wait_time, seconds)
+            if not acquired:
+                self.wait_timeouts += 1
+
+    def socket_created(self):
+        with self._lock:
+            self.sockets_created += 1
+
+    def snapshot(self):
+        """
+        Take a (consistent) snapshot of the metrics.
+
+        @return: the metrics, keyed by name; never C{None}.
+        """
+
+        with self._lock:
+            return dict(checkouts=self.checkouts,
+                        checkins=self.checkins,
+                        in_use=self.checkouts - self.checkins,
+                        waits=self.waits,
+                        wait_timeouts=self.wait_timeouts,
+                        wait_time=self.wait_time,
+                        mean_wait_time=self.wait_time / self.waits if self.waits else 0.0,
+                        max_wait_time=self.max_wait_time,
+                        sockets_created=self.sockets_created)
+
+    def __str__(self):
+        return '{} {}'.format(self.__class__.__name__, self.snapshot())
+
+
+class InstrumentedPool(Pool):
+    """
+    A pymongo connection C{Pool} that records what goes on in it to a
+    C{MongoPoolMetrics}.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.metrics = kwargs.pop('metrics')
+
+        # Pool is an old-style class
+        Pool.__init__(self, *args, **kwargs)
+
+        self._socket_semaphore = InstrumentedSemaphore(self._socket_semaphore, self.metrics)
+
+    def connect(self):
+        sock_info = Pool.connect(self)
+        self.metrics.socket_created()
+        return sock_info
+
+    def get_socket(self, force=False):
+        sock_info = Pool.get_socket(self, force)
+        self.metrics.checked_out()
+        return sock_info
+
+    def maybe_return_socket(self, sock_info):
+        Pool.maybe_return_socket(self, sock_info)
+        if sock_info not in (NO_REQUEST, NO_SOCKET_YET):
+            self.metrics.checked_in()
+
+
+class InstrumentedSemaphore(object):
+    """
+    Wraps the semaphore that guards the sockets of a C{Pool} to record each
+    time that a thread has to wait for a socket, and for how long.
+    """
+
+    def __init__(self, semaphore, metrics):
+        super(InstrumentedSemaphore, self).__init__()
+
+        self.semaphore = semaphore
+        self.metrics = metrics
+
+    def acquire(self, blocking=True, timeout=None):
+        if self.semaphore.acquire(False):
+            return True
+        if not blocking:
+            return False
+
+        started = time.time()
+        acquired = self.semaphore.acquire(True, timeout)
+        self.metrics.waited(time.time() - started, acquired)
+        return acquired
+
+    def release(self):
+        self.semaphore.release()
+
+    def __getattr__(self, item):
+        return getattr(self.semaphore, item)
+
+
 class MongoRepositoryMixin(object):
     def __init__(self, db):
         assert db is not None, 'The Mongo DB is required.'
@@ -69,6 +303,80 @@ class MongoRepositoryMixin(object):
         return '{} {}'.format(self.__class__.__name__, self._db)
 
 
+class AsyncMongoRepositoryMixin(object):
+    """
+    The asynchronous counterpart of the C{MongoRepositoryMixin}.
+
+    Each operation on a collection is run on the C{executor}, returning a
+    future of its result for a coroutine to yield (see
+    L{hipflask.support.concurrency}). Cursors are read in full on the thread
+    of the executor, so a future of a C{find} is a future of a list.
+    """
+
+    def __init__(self, db, executor):
+        assert db is not None, 'The Mongo DB is required.'
+        assert executor is not None, 'The executor is required.'
+
+        self._db = db
+        self._executor = executor
+
+        self._logger = logger_for(self)
+
+    def __getattr__(self, item):
+        # attribute name is interpreted as collection name
+        return AsyncCollection(self._db[item], self._executor)
+
+    @property
+    def db(self):
+        return self._db
+
+    @property
+    def executor(self):
+        return self._executor
+
+    def __str__(self):
+        return '{} {}'.format(self.__class__.__name__, self._db)
+
+
+class AsyncCollection(object):
+    """
+    Wraps a Mongo collection so that each operation on it is run on an
+    C{executor}, returning a future of its result.
+    """
+
+    def __init__(self, collection, executor):
+        super(AsyncCollection, self).__init__()
+
+        self.collection = collection
+        self.executor = executor
+
+    def __getattr__(self, item):
+        attribute = getattr(self.collection, item)
+        if isinstance(attribute, Collection):
+            return AsyncCollection(attribute, self.executor)
+        elif not callable(attribute):
+            return attribute
+
+        def submit(*args, **kwargs):
+            return self.executor.submit(call_and_read, attribute, *args, **kwargs)
+
+        return submit
+
+    def __str__(self):
+        return '{} {}'.format(self.__class__.__name__, self.collection)
+
+
+def call_and_read(f, *args, **kwargs):
+    """
+    Call the supplied function, reading any cursor it returns in full.
+    """
+
+    result = f(*args, **kwargs)
+    if isinstance(result, (Cursor, CommandCursor)):
+        result = list(result)
+    return result
+
+
 class IdBased(object):
     """
     A mixin for classes that support an ID value.
@@ -120,15 +428,45 @@ def munge_id(document, id_mapper):
     a consistent interface at the MongoDB-level: the ID is always a field
     called C{_id} which follows the naming pattern of MongoDB itself.
 
-    If the supplied C{id_mapper} is C{None}, a C{ToObjectIdMapper} is used.
+    If the supplied C{id_mapper} is C{None}, the C{DEFAULT_ID_MAPPER} is used.
 
     @param document: the document to be munged; must not be C{None}.
     @param id_mapper: maps any C{id} to an C{ObjectID}; can be C{None}.
     """
 
     if id_mapper is None:
-        id_mapper = ToObjectIdMapper()
+        id_mapper = DEFAULT_ID_MAPPER
 
     _id = document.pop('id', None)
     if _id is not None:
         document['_id'] = id_mapper(_id)
+
+
+def munge_ids(documents, id_mapper=None):
+    """
+    "Munge" the C{id} of each of the supplied documents, just as C{munge_id},
+    but mapping all of the IDs at once (if the C{id_mapper} has C{map_many}).
+
+    @param documents: a list of documents to be munged; must not be C{None}.
+    @param id_mapper: maps any C{id} to an C{ObjectID}; can be C{None}.
+    """
+
+    if id_mapper is None:
+        id_mapper = DEFAULT_ID_MAPPER
+
+    munged = []
+    ids = []
+    for document in documents:
+        _id = document.pop('id', None)
+        if _id is not None:
+            munged.append(document)
+            ids.append(_id)
+
+    map_many = getattr(id_mapper, 'map_many', None)
+    mapped = map_many(ids) if map_many is not None else [id_mapper(value) for value in ids]
+    for document, _id in zip(munged, mapped):
+        document['_id'] = _id
+
+
+# stateless, so shared rather than created afresh for every document
+DEFAULT_ID_MAPPER = ToObjectIdMapper()
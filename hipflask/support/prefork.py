@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Serve a L{flask.Flask} application from pre-forked worker processes.
+
+The application is created and warmed just once, in the master process;
+each worker is then forked from the master, sharing the warmed state
+copy-on-write rather than building it all over again.
+"""
+
+import errno
+import gc
+import logging
+import os
+import signal
+
+from injector import SingletonScope, BindingKey
+from werkzeug.serving import make_server
+
+
+def warm(app, eager=()):
+    """
+    Warm the supplied application: compile every template, and resolve the
+    (singleton) C{eager} interfaces from its injector.
+
+    @param app: the Flask application; must not be C{None}.
+    @param eager: the interfaces to be resolved.
+    @return: the C{app}, for chaining.
+    """
+
+    compile_templates(app)
+    resolve_eagerly(app, eager)
+    return app
+
+
+def compile_templates(app):
+    jinja_env = app.jinja_env
+    templates = jinja_env.list_templates()
+    for name in templates:
+        jinja_env.get_template(name)
+    _logger.debug('Compiled [%d] templates.', len(templates))
+
+
+def resolve_eagerly(app, interfaces):
+    injector = app.extensions['Injector']
+    for interface in interfaces:
+        _logger.debug('Resolved [%s].', injector.get(interface))
+
+
+def forget_singletons(app, interfaces):
+    """
+    Forget the singleton instances of the supplied C{interfaces}, so that they
+    are created afresh the next time that they are injected.
+
+    @param app: the Flask application; must not be C{None}.
+    @param interfaces: the interfaces.
+    """
+
+    injector = app.extensions['Injector']
+    scope = injector.get(SingletonScope)
+    for interface in interfaces:
+        # the scope keeps no public API for this: reach into its cache of providers
+        scope._context.pop(BindingKey(interface), None)
+
+
+class PreforkServer(object):
+    """
+    A master process that binds the listening socket, then forks and supervises
+    the worker processes that serve requests from it.
+
+    Instances of the C{fork_unsafe} interfaces--forex, a C{MongoClient}, whose
+    sockets must never be shared between processes--are resolved eagerly in
+    the master to fail fast on bad configuration, released before forking,
+    and then created afresh in each worker.
+    """
+
+    def serve(self):
+        """
+        Fork the workers and supervise them until told to stop.
+        """
+
+        self.server = make_server(self.host, self.port, self.app, threaded=self.threaded)
+
+        self._release()
+        gc.collect()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        _logger.info('Serving on [%s:%d] with [%d] workers.', self.host, self.port, self.workers)
+        for _ in range(self.workers):
+            self._spawn()
+
+        self._supervise()
+
+    def _spawn(self):
+        pid = os.fork()
+        if pid:
+            self.pids.add(pid)
+            return pid
+
+        # in the worker
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        try:
+            resolve_eagerly(self.app, self.fork_unsafe)
+            self.server.serve_forever()
+        finally:
+            os._exit(0)
+
+    def _supervise(self):
+        while self.pids:
+            try:
+                pid, status = os.wait()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            self.pids.discard(pid)
+            if not self.stopping:
+                _logger.warning('Worker [%d] exited [status=%d]; replacing it.', pid, status)
+                self._spawn()
+        self.server.server_close()
+
+    # noinspection PyUnusedLocal
+    def _stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                self.pids.discard(pid)
+
+    def _release(self):
+        injector = self.app.extensions['Injector']
+        for interface in self.fork_unsafe:
+            instance = injector.get(interface)
+            # looked up on the type: a pymongo Database answers any attribute, with a Collection
+            disconnect = getattr(type(instance), 'disconnect', None)
+            if disconnect is not None:
+                disconnect(instance)
+        forget_singletons(self.app, self.fork_unsafe)
+
+    def __init__(self, app, host='0.0.0.0', port=5000, workers=4, threaded=False, fork_unsafe=()):
+        """
+        Create a C{PreforkServer}, warming the supplied application.
+
+        @param app: the Flask application; must not be C{None}.
+        @param host: the host to bind.
+        @param port: the port to bind.
+        @param workers: the number of worker processes; must be greater than zero.
+        @param threaded: serve each request in a separate thread of the worker?
+        @param fork_unsafe: the (singleton) interfaces to be created afresh in each worker.
+        """
+
+        super(PreforkServer, self).__init__()
+
+        assert app is not None, 'The app is required.'
+        assert workers > 0, 'At least one worker is required.'
+
+        self.app = warm(app, fork_unsafe)
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.threaded = threaded
+        self.fork_unsafe = tuple(fork_unsafe)
+
+        self.server = None
+        self.pids = set()
+        self.stopping = False
+
+
+_logger = logging.getLogger(__name__)
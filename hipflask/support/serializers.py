@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+JSON serialization with MongoDB-aware semantics.
+
+C{ObjectId} values are serialized as their hex string, and C{date} and
+C{datetime} values in ISO 8601 format, just as by the C{MongoJsonEncoder}.
+"""
+
+from __future__ import absolute_import
+
+import datetime
+import json
+
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+from hipflask.support.mongo import MongoJsonEncoder
+
+
+class JsonEncoders(object):
+    """
+    A type-keyed dispatch table of encoders for values that JSON does not
+    support natively.
+
+    Each encoder maps a value to something that JSON I{does} support. Values
+    are dispatched on their exact type; the encoder for a subclass of a
+    registered type is resolved (once) through its MRO and then remembered.
+    """
+
+    def __init__(self, encoders=None):
+        super(JsonEncoders, self).__init__()
+
+        self._registered = {}
+        self._resolved = {}
+        for _type, encoder in (encoders or {}).iteritems():
+            self.register(_type, encoder)
+
+    def register(self, _type, encoder):
+        """
+        Register the C{encoder} for values of the supplied C{_type}.
+
+        @param _type: the type; must not be C{None}.
+        @param encoder: a single-argument function; must not be C{None}.
+        @return: this instance, for chaining.
+        """
+
+        assert _type is not None, 'The type is required.'
+        assert encoder is not None, 'The encoder is required.'
+
+        self._registered[_type] = encoder
+        self._resolved = dict(self._registered)
+        return self
+
+    def encoder_for(self, _type):
+        """
+        Find the encoder for values of the supplied C{_type}.
+
+        @param _type: the type; must not be C{None}.
+        @return: the encoder; C{None} if there isn't one.
+        """
+
+        encoder = self._resolved.get(_type, None)
+        if encoder is None:
+            for base in _type.__mro__[1:]:
+                encoder = self._registered.get(base, None)
+                if encoder is not None:
+                    self._resolved[_type] = encoder
+                    break
+        return encoder
+
+    def __call__(self, o):
+        try:
+            encoder = self._resolved[type(o)]
+        except KeyError:
+            encoder = self.encoder_for(type(o))
+            if encoder is None:
+                raise TypeError('{!r} is not JSON serializable'.format(o))
+        return encoder(o)
+
+
+def mongo_json_encoders():
+    """
+    Build the encoders that give the same output as the C{MongoJsonEncoder}.
+
+    @return: a C{JsonEncoders}; never C{None}.
+    """
+
+    return JsonEncoders({datetime.datetime: datetime.datetime.isoformat,
+                         datetime.date: datetime.date.isoformat,
+                         ObjectId: unicode})
+
+
+class JsonSerializer(object):
+    """
+    Serialize values to JSON.
+    """
+
+    def dumps(self, o, pretty=False):
+        """
+        Serialize the supplied value to JSON.
+
+        @param o: the value to be serialized.
+        @param pretty: indent the JSON for legibility?
+        @return: the JSON; never C{None}.
+        """
+
+        raise NotImplementedError('Abstract method.')
+
+
+class SimpleJsonSerializer(JsonSerializer):
+    """
+    Serialize values to JSON using (pure) simplejson and the C{MongoJsonEncoder}.
+    """
+
+    def dumps(self, o, pretty=False):
+        encoder = self._pretty_encoder if pretty else self._encoder
+        return encoder.encode(o)
+
+    def __init__(self, encoder_class=MongoJsonEncoder):
+        super(SimpleJsonSerializer, self).__init__()
+
+        self._encoder = encoder_class()
+        self._pretty_encoder = encoder_class(indent=2)
+
+
+class FastJsonSerializer(JsonSerializer):
+    """
+    Serialize values to JSON using the C-accelerated standard library encoder,
+    dispatching values that JSON does not support natively through a table of
+    per-type encoders.
+    """
+
+    def dumps(self, o, pretty=False):
+        encoder = self._pretty_encoder if pretty else self._encoder
+        return encoder.encode(o)
+
+    def __init__(self, encoders=None):
+        super(FastJsonSerializer, self).__init__()
+
+        self.encoders = mongo_json_encoders() if encoders is None else encoders
+
+        self._encoder = json.JSONEncoder(default=self.encoders, check_circular=False, separators=(',', ':'))
+        self._pretty_encoder = json.JSONEncoder(default=self.encoders, indent=2)
+
+
+JSON_SERIALIZERS = dict(fast=FastJsonSerializer, simple=SimpleJsonSerializer)
+
+
+def json_serializer_for(name):
+    """
+    Create the JSON serializer with the supplied C{name}; forex, C{fast}.
+
+    @param name: the name of the serializer; must not be C{None}.
+    @return: a C{JsonSerializer}; never C{None}.
+    """
+
+    if name not in JSON_SERIALIZERS:
+        raise ValueError('No JSON serializer named [{}]; choose from [{}].'.format(
+            name, ', '.join(sorted(JSON_SERIALIZERS))))
+    return JSON_SERIALIZERS[name]()
@@ -5,6 +5,8 @@ String-related utility methods.
 
 import re
 
+from hipflask.support.caching import memoized
+
 
 MODULE_SEPARATOR = '.'
 
@@ -48,36 +50,96 @@ camelcase_pattern = re.compile(r'([A-Z])')
 underscore_pattern = re.compile(r'_([a-z])')
 
 
+# the same few hundred keys recur, across millions of documents
+KEY_CONVERSION_CACHE_SIZE = 4096
+
+
+@memoized(maxsize=KEY_CONVERSION_CACHE_SIZE)
 def camelcase_to_underscore(name):
     return camelcase_pattern.sub(lambda x: '_' + x.group(1).lower(), name)
 
 
+@memoized(maxsize=KEY_CONVERSION_CACHE_SIZE)
 def underscore_to_camelcase(name):
     return underscore_pattern.sub(lambda x: x.group(1).upper(), name)
 
 
-def convert_keys(d, convert, skip_conversion=None):
-    if skip_conversion is None:
-        skip_conversion = lambda key: False
+def convert_keys(d, convert, skip_conversion=None, in_place=False):
+    """
+    Convert the keys of the supplied dict, and of every dict nested in it,
+    either directly or in a list (or tuple); forex, with C{camelcase_to_underscore}.
+
+    Lists and tuples become lists. Keys for which C{skip_conversion} holds are
+    kept as they are, but their values are still converted. A dict that recurs
+    (shared by several parents, or in a cycle) is converted once, and so is
+    its copy: it recurs in the converted dict just as it does in the original.
+
+    @param d: the dict; must not be C{None}.
+    @param convert: converts a key; must not be C{None}.
+    @param skip_conversion: a predicate on keys; can be C{None}.
+    @param in_place: convert the dicts (and lists) themselves, rather than copies of them?
+    @return: the converted dict; never C{None}.
+    """
 
-    def convert_keys_(av):
-        if isinstance(av, dict):
-            return convert_keys(av, convert, skip_conversion=skip_conversion)
+    converted = d if in_place else {}
+    # an explicit stack of (source, sink) dicts, so that there is no limit on the depth of nesting
+    stack = [(d, converted)]
+    push = stack.append
+    pop = stack.pop
+    seen = set() if in_place else None
+    # the copy of each dict, by the id of the original
+    copies = None if in_place else {id(d): converted}
+    while stack:
+        source, sink = pop()
+        if in_place:
+            # a dict shared by several parents is only converted once
+            if id(source) in seen:
+                continue
+            seen.add(id(source))
+            items = source.items()
+            source.clear()
         else:
-            return av
-
-    sink = {}
-    for k, v in d.iteritems():
-        the_key = k
-        if not skip_conversion(k):
-            the_key = convert(k)
-        if isinstance(v, dict):
-            sink[the_key] = convert_keys(v, convert, skip_conversion=skip_conversion)
-        elif isinstance(v, (list, tuple)):
-            sink[the_key] = map(convert_keys_, v)
-        else:
-            sink[the_key] = v
-    return sink
+            items = source.iteritems()
+        for k, v in items:
+            if skip_conversion is None or not skip_conversion(k):
+                k = convert(k)
+            if isinstance(v, dict):
+                if in_place:
+                    push((v, v))
+                else:
+                    target = copies.get(id(v))
+                    if target is None:
+                        target = copies[id(v)] = {}
+                        push((v, target))
+                    v = target
+            elif isinstance(v, (list, tuple)):
+                v = v if in_place and isinstance(v, list) else list(v)
+                for i, element in enumerate(v):
+                    if isinstance(element, dict):
+                        if in_place:
+                            push((element, element))
+                        else:
+                            target = copies.get(id(element))
+                            if target is None:
+                                target = copies[id(element)] = {}
+                                push((element, target))
+                            v[i] = target
+            sink[k] = v
+    return converted
+
+
+def convert_keys_many(documents, convert, skip_conversion=None, in_place=False):
+    """
+    Convert the keys of each of the supplied documents, lazily; forex, as they
+    are read from a cursor.
+
+    @param documents: an iterable of dicts; must not be C{None}.
+    @return: a generator of the converted dicts; never C{None}.
+    @see: C{convert_keys}
+    """
+
+    for document in documents:
+        yield convert_keys(document, convert, skip_conversion=skip_conversion, in_place=in_place)
 
 
 class UnknownEncodingException(Exception):
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Translate the keys of documents of a known shape, forex, from camelCase to
+snake_case.
+
+A shape describes the keys of a document, once: each key maps to C{None} for
+a scalar value, to a (nested) shape for a dict value, or to a list holding a
+single shape for a list of dicts:
+
+    ORDER = {'orderId': None,
+             'shippingAddress': {'postCode': None},
+             'lineItems': [{'productId': None, 'unitPrice': None}]}
+
+Compiling a shape works out the translated key for every key up front, and
+binds a translator for every nested dict (or list of dicts), so translating a
+document is then a matter of looking up each key; no key is converted again,
+and a scalar value is only checked for being a container. Keys that are not
+in the shape, and values that do not fit it (forex, C{None} where a dict is
+expected, or a dict where a scalar is), fall back to the generic
+C{convert_keys}, and so are translated just the same.
+"""
+
+from hipflask.support.strings import convert_keys
+
+
+def compile_translator(shape, convert, skip_conversion=None):
+    """
+    Compile a translator for documents of the supplied shape.
+
+    @param shape: the shape; must not be C{None}.
+    @param convert: converts a key; must not be C{None}.
+    @param skip_conversion: a predicate on keys that are to be kept as they are; can be C{None}.
+    @return: a function of a document (dict) to its translated copy; never C{None}.
+    """
+
+    assert shape is not None, 'The shape is required.'
+    assert convert is not None, 'The conversion is required.'
+
+    def convert_value(value):
+        if isinstance(value, dict):
+            return convert_keys(value, convert, skip_conversion=skip_conversion)
+        elif isinstance(value, (list, tuple)):
+            return [convert_value(element) if isinstance(element, dict) else element for element in value]
+        return value
+
+    def translate_dict(translator):
+        def translate(value):
+            return translator(value) if type(value) is dict else convert_value(value)
+        return translate
+
+    def translate_list(translator):
+        def translate(value):
+            if type(value) is not list and type(value) is not tuple:
+                return convert_value(value)
+            translated = []
+            for element in value:
+                if type(element) is dict:
+                    element = translator(element)
+                elif isinstance(element, dict):
+                    element = convert_value(element)
+                translated.append(element)
+            return translated
+        return translate
+
+    plan = {}
+    for key, nested in shape.iteritems():
+        target = key if skip_conversion is not None and skip_conversion(key) else convert(key)
+        if nested is None:
+            handler = None
+        elif isinstance(nested, dict):
+            handler = translate_dict(compile_translator(nested, convert, skip_conversion))
+        elif isinstance(nested, list) and len(nested) == 1 and isinstance(nested[0], dict):
+            handler = translate_list(compile_translator(nested[0], convert, skip_conversion))
+        else:
+            raise ValueError('Cannot compile shape for key [{}]: [{!r}].'.format(key, nested))
+        plan[key] = (target, handler)
+
+    def translator(document):
+        sink = {}
+        for key, value in document.iteritems():
+            try:
+                target, handler = plan[key]
+            except KeyError:
+                # not in the shape
+                if skip_conversion is None or not skip_conversion(key):
+                    key = convert(key)
+                sink[key] = convert_value(value)
+                continue
+            if handler is not None:
+                value = handler(value)
+            elif isinstance(value, (dict, list, tuple)):
+                # a scalar in the shape (as sampled), but not in this document
+                value = convert_value(value)
+            sink[target] = value
+        return sink
+
+    return translator
+
+
+def shape_of(document):
+    """
+    Infer the shape of the supplied (sample) document.
+
+    The shape of a list of dicts is that of all of its dicts taken together.
+
+    @param document: the document; must not be C{None}.
+    @return: the shape; never C{None}.
+    """
+
+    shape = {}
+    for key, value in document.iteritems():
+        if isinstance(value, dict):
+            shape[key] = shape_of(value)
+        elif isinstance(value, (list, tuple)) and any(isinstance(element, dict) for element in value):
+            merged = {}
+            for element in value:
+                if isinstance(element, dict):
+                    _merge(merged, shape_of(element))
+            shape[key] = [merged]
+        else:
+            shape[key] = None
+    return shape
+
+
+def _merge(shape, other):
+    for key, nested in other.iteritems():
+        existing = shape.get(key, None)
+        if isinstance(existing, dict) and isinstance(nested, dict):
+            _merge(existing, nested)
+        elif isinstance(existing, list) and isinstance(nested, list):
+            _merge(existing[0], nested[0])
+        elif existing is None:
+            shape[key] = nested
+
+
+class KeyTranslators(object):
+    """
+    A registry of translators, compiled from named shapes, that all convert
+    keys in the same way.
+    """
+
+    def register(self, name, shape):
+        """
+        Register (and compile) the supplied shape.
+
+        @param name: the name of the shape; forex, C{order}.
+        @param shape: the shape; must not be C{None}.
+        @return: the compiled translator; never C{None}.
+        """
+
+        translator = self._translators[name] = compile_translator(shape, self.convert, self.skip_conversion)
+        return translator
+
+    def translate(self, name, document):
+        """
+        Translate the supplied document with the translator for the named shape,
+        or with the generic C{convert_keys} if no such shape is registered.
+        """
+
+        translator = self._translators.get(name, None)
+        if translator is None:
+            return convert_keys(document, self.convert, skip_conversion=self.skip_conversion)
+        return translator(document)
+
+    def __contains__(self, name):
+        return name in self._translators
+
+    def __getitem__(self, name):
+        return self._translators[name]
+
+    def __init__(self, convert, skip_conversion=None):
+        """
+        Create a C{KeyTranslators}.
+
+        @param convert: converts a key; must not be C{None}.
+        @param skip_conversion: a predicate on keys that are to be kept as they are; can be C{None}.
+        """
+
+        super(KeyTranslators, self).__init__()
+
+        assert convert is not None, 'The conversion is required.'
+
+        self.convert = convert
+        self.skip_conversion = skip_conversion
+
+        self._translators = {}
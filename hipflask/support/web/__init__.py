@@ -6,7 +6,12 @@ Web- and Flask-related extensions.
 from httplib import OK
 
 from hipflask.support import CodedError, HipflaskException
-from hipflask.support.strings import is_stringy, has_text
+from hipflask.support.concurrency import is_coroutine, run_coroutine
+from hipflask.support.strings import is_stringy
+from hipflask.support.web.models import ViewResponse, view_responder, required_view_name
+from hipflask.support.web.conditional import validators_for, automatic_etag_for, is_not_modified, \
+    not_modified_response, set_validators
+from hipflask.support.web.timing import stage
 from werkzeug.wrappers import Response
 from flask import request, current_app
 
@@ -84,7 +89,8 @@ def set_header_content_type(response, content_type):
 
 def respond(response_data, *args, **kwargs):
     """
-    Create a C{Response}.
+    Create a C{Response}; or a C{304 Not Modified} response, when the client's
+    copy is current (see the hipflask.support.web.conditional module).
 
     @param response_data: metadata about the response such as the view to be rendered.
     @param args: other positional arguments.
@@ -95,16 +101,50 @@ def respond(response_data, *args, **kwargs):
     if isinstance(response_data, Response):
         response = response_data
     else:
-        (view_name, model, status_code) = deconstruct(response_data)
+        with stage('deconstruct'):
+            (view_name, model, status_code) = deconstruct(response_data)
+        with stage('conditional'):
+            validators = validators_for(response_data, view_name, status_code)
+        if validators is not None and is_not_modified(*validators):
+            # the client's copy is current: nothing need be rendered
+            return not_modified_response(*validators)
+
         responsifier = current_app.responsifier
         response = responsifier.responsify(model,
                                            status_code=status_code,
                                            view_name=view_name,
                                            *args, **kwargs)
         response.status_code = status_code
+        if validators is None or validators[0] is None:
+            with stage('conditional'):
+                etag = automatic_etag_for(response)
+            if etag is not None:
+                validators = (etag, None if validators is None else validators[1])
+                if is_not_modified(*validators):
+                    # rendered to be digested, but the client's copy is current: nothing need be sent
+                    return not_modified_response(*validators)
+        if validators is not None:
+            set_validators(response, *validators)
     return response
 
 
+def async_respond(response_data, *args, **kwargs):
+    """
+    Create a C{Response} from what a coroutine handler returns, driving the
+    coroutine to completion first.
+
+    @param response_data: a coroutine, or metadata about the response such as the view to be rendered.
+    @param args: other positional arguments.
+    @param kwargs: other named arguments.
+    @return: a C{Response}; never C{None}.
+    """
+
+    if is_coroutine(response_data):
+        with stage('handler'):
+            response_data = run_coroutine(response_data, timeout=current_app.config.get('ASYNC_TIMEOUT', None))
+    return respond(response_data, *args, **kwargs)
+
+
 def deconstruct(response_data):
     """
     Deconstruct the supplied C{response_data} into its constituent web-related elements.
@@ -113,13 +153,21 @@ def deconstruct(response_data):
 
         C{(<view_name(string)>, <model(dict)>, <(HTTP) status_code(int)>)}
 
+    The deconstructor is looked up by the exact type of the C{response_data};
+    only a subclass (of C{dict}, say) falls back to C{isinstance} checks.
+
     @param response_data: that which is returned by a Controller; must not be C{None}.
     @return: the constituent web-related elements as a tuple; never C{None}.
     """
 
     assert response_data is not None, 'The response data is required.'
 
-    if is_stringy(response_data):
+    deconstructor = _DECONSTRUCTORS.get(type(response_data), None)
+    if deconstructor is not None:
+        return deconstructor(response_data)
+    elif isinstance(response_data, ViewResponse):
+        return deconstruct_view_response(response_data)
+    elif is_stringy(response_data):
         return deconstruct_string(response_data)
     elif isinstance(response_data, (tuple, list)):
         return deconstruct_list(response_data)
@@ -127,6 +175,10 @@ def deconstruct(response_data):
         return deconstruct_dict(response_data)
 
 
+def deconstruct_view_response(response_data):
+    return response_data.deconstructed
+
+
 def deconstruct_string(response_data):
     view_name = required_view_name(response_data)
     return view_name, {}, OK
@@ -162,9 +214,9 @@ def deconstruct_dict(response_data):
     return view_name, model, status_code
 
 
-def required_view_name(view_name):
-    if not is_stringy(view_name):
-        raise HipflaskException('Required view name must be a string.')
-    if not has_text(view_name):
-        raise HipflaskException('Required view name is empty.')
-    return view_name
+_DECONSTRUCTORS = {ViewResponse: deconstruct_view_response,
+                   str: deconstruct_string,
+                   unicode: deconstruct_string,
+                   tuple: deconstruct_list,
+                   list: deconstruct_list,
+                   dict: deconstruct_dict}
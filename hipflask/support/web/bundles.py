@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Build Flask-Assets bundles ahead of time, rather than the first time a
+request touches them.
+
+The unit of work is a bundle that is built into an output of its own (each
+leaf of a container bundle, say); the units are built in parallel, across a
+pool of processes forked from the builder. A unit whose inputs--its sources,
+output and filters--hash to the same digest as at the last build, and whose
+files are all still there, is not built again.
+
+Every source must exist before anything is built: a missing file fails the
+whole build, up front.
+"""
+
+from hashlib import sha1
+import logging
+import multiprocessing
+import os
+
+from hipflask.support.files import read_manifest, write_manifest
+from hipflask.support.web.compression import write_precompressed
+from hipflask.support.web.static import AssetManifest
+from webassets.bundle import wrap
+
+BUILD_CACHE_VERSION = 1
+
+
+class BuildCache(object):
+    """
+    The digest of the inputs, and the (built) files, of each unit, persisted as JSON.
+    """
+
+    def get(self, unit_key):
+        return self._units.get(unit_key, None)
+
+    def put(self, unit_key, digest, files):
+        self._units[unit_key] = dict(digest=digest, files=list(files))
+
+    def save(self):
+        write_manifest(self.path, BUILD_CACHE_VERSION, 'units', self._units)
+
+    def __init__(self, path=None):
+        """
+        Create a C{BuildCache}, loading what is already recorded at the supplied C{path}.
+
+        @param path: the (file)path of the cache; C{None} if not persisted.
+        """
+
+        super(BuildCache, self).__init__()
+
+        self.path = path
+
+        self._units = read_manifest(path, BUILD_CACHE_VERSION, 'units')
+
+
+class BuildOutcome(object):
+    """
+    The outcome of building a unit: its files (relative to the static folder), and whether it was built at all.
+    """
+
+    def __init__(self, name, files, built):
+        super(BuildOutcome, self).__init__()
+
+        self.name = name
+        self.files = files
+        self.built = built
+
+    def __str__(self):
+        return '{} [{}]: {}'.format('Built' if self.built else 'Unchanged', self.name, ', '.join(self.files))
+
+
+class BundleBuilder(object):
+    """
+    Build the named bundles of an application, record their files in its
+    C{AssetManifest}, and write a precompressed (gzip) variant of each file.
+    """
+
+    def build(self, names, force=False):
+        """
+        Build the named bundles.
+
+        @param names: the logical names of the bundles; forex, C{css_all}.
+        @param force: build every unit, changed or not.
+        @return: a C{BuildOutcome} for each unit, in order.
+        @raise IOError: if any source is missing; nothing is built.
+        """
+
+        units = [unit for name in names for unit in self._units_of(name)]
+        missing = [path for unit in units for path in unit.missing()]
+        if missing:
+            raise IOError('Cannot build the bundles; missing [{}].'.format(', '.join(missing)))
+
+        digests = [unit.digest() for unit in units]
+        stale = [(index, unit) for index, (unit, digest) in enumerate(zip(units, digests))
+                 if force or not self._is_current(unit.key, digest)]
+        _logger.debug('Building [%d] of [%d] bundle units.', len(stale), len(units))
+        built = dict(zip([index for index, _ in stale], self._build_all([unit.address for _, unit in stale])))
+
+        outcomes = []
+        files_by_name = {}
+        for index, (unit, digest) in enumerate(zip(units, digests)):
+            if index in built:
+                files = [os.path.relpath(path, self.static_folder).replace(os.sep, '/') for path in built[index]]
+                self.cache.put(unit.key, digest, files)
+            else:
+                files = self.cache.get(unit.key)['files']
+            files_by_name.setdefault(unit.name, []).extend(files)
+            outcomes.append(BuildOutcome(unit.name, files, index in built))
+
+        for name in names:
+            self.manifest.record(name, files_by_name.get(name, []))
+        self.manifest.save()
+        self.cache.save()
+        return outcomes
+
+    def _units_of(self, name):
+        bundle = self.environment[name]
+        leaves = list(bundle.iterbuild(wrap(bundle.env, bundle)))
+        if any(filters for _, filters, _ in leaves):
+            # a container that passes filters down cannot have its leaves built on their own
+            return [BuildUnit(name, None, leaves)]
+        return [BuildUnit(name, index, [leaf]) for index, leaf in enumerate(leaves)]
+
+    def _is_current(self, unit_key, digest):
+        entry = self.cache.get(unit_key)
+        if entry is None or entry['digest'] != digest:
+            return False
+        paths = [os.path.join(self.static_folder, filename) for filename in entry['files']]
+        return all(os.path.isfile(path) and os.path.isfile(path + '.gz') for path in paths)
+
+    def _build_all(self, addresses):
+        global _builder
+        if self.workers <= 1 or len(addresses) <= 1:
+            return [self.build_unit(address) for address in addresses]
+        # the workers are forked, and find the builder (and so the application) where it was left for them
+        _builder = self
+        pool = multiprocessing.Pool(min(self.workers, len(addresses)))
+        try:
+            return pool.map(_build_unit, addresses)
+        finally:
+            pool.close()
+            pool.join()
+            _builder = None
+
+    def build_unit(self, address):
+        """
+        Build the addressed unit, and precompress its files.
+
+        @param address: C{(name, index)}; an index of C{None} for the whole bundle.
+        @return: the absolute paths of the files that the unit serves.
+        """
+
+        name, index = address
+        bundle = self.environment[name]
+        with self.app.app_context():
+            if index is None:
+                leaves = list(bundle.iterbuild(wrap(bundle.env, bundle)))
+                if any(leaf.output for leaf, _, _ in leaves):
+                    bundle.build(force=True)
+            else:
+                leaf, _, ctx = list(bundle.iterbuild(wrap(bundle.env, bundle)))[index]
+                leaves = [(leaf, [], ctx)]
+                if leaf.output:
+                    with leaf.bind(bundle.env):
+                        leaf.build(force=True)
+            paths = served_files(leaves)
+            for path in paths:
+                write_precompressed(path, self.level)
+        return paths
+
+    def __init__(self, app, manifest=None, cache=None, workers=1, level=9):
+        """
+        Create a C{BundleBuilder}.
+
+        @param app: the Flask application, its assets prepared; must not be C{None}.
+        @param manifest: records the files of each bundle; C{None} for one that is not persisted.
+        @param cache: remembers the inputs of each unit; C{None} for one that is not persisted.
+        @param workers: the number of processes to build in.
+        @param level: the gzip compression level, from C{1} (fastest) to C{9} (smallest).
+        """
+
+        super(BundleBuilder, self).__init__()
+
+        assert app is not None, 'The application is required.'
+
+        self.app = app
+        self.environment = app.jinja_env.assets_environment
+        self.static_folder = app.static_folder
+        self.manifest = manifest if manifest is not None else AssetManifest()
+        self.cache = cache if cache is not None else BuildCache()
+        self.workers = workers
+        self.level = level
+
+
+class BuildUnit(object):
+    """
+    A bundle, or a leaf of one, that is built on its own.
+    """
+
+    def missing(self):
+        """
+        Find the sources of this unit that do not exist.
+        """
+
+        return [path for leaf, _, ctx in self.leaves for item, path in leaf.resolve_contents(ctx)
+                if isinstance(path, basestring) and not is_url(item) and not os.path.isfile(path)]
+
+    def digest(self):
+        """
+        Digest the inputs of this unit: the output, filters and content of each source of each leaf.
+        """
+
+        digest = sha1()
+        for leaf, filters, ctx in self.leaves:
+            digest.update(repr((leaf.output, [repr(f) for f in leaf.filters], [repr(f) for f in filters])))
+            for item, path in leaf.resolve_contents(ctx, force=True):
+                if not isinstance(path, basestring) or is_url(item):
+                    digest.update(repr(item))
+                    continue
+                digest.update(path.encode('utf-8'))
+                with open(path, 'rb') as stream:
+                    for chunk in iter(lambda: stream.read(65536), b''):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    @property
+    def address(self):
+        return self.name, self.index
+
+    @property
+    def key(self):
+        return self.name if self.index is None else '{}/{}'.format(self.name, self.index)
+
+    def __init__(self, name, index, leaves):
+        super(BuildUnit, self).__init__()
+
+        self.name = name
+        self.index = index
+        self.leaves = leaves
+
+
+def served_files(leaves):
+    """
+    Find the absolute paths of the files that the supplied (built) leaves serve.
+
+    The files of a leaf with an output are built into that output; those of a
+    leaf without one are served as they are.
+
+    @param leaves: C{(bundle, filters, ctx)} tuples, as iterated by C{Bundle.iterbuild}.
+    """
+
+    paths = []
+    for leaf, _, ctx in leaves:
+        if leaf.output:
+            paths.append(leaf.resolve_output(ctx))
+        else:
+            paths.extend(path for _, path in leaf.resolve_contents(ctx))
+    return paths
+
+
+def is_url(item):
+    return isinstance(item, basestring) and '://' in item
+
+
+def _build_unit(address):
+    return _builder.build_unit(address)
+
+
+_builder = None
+
+_logger = logging.getLogger(__name__)
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+Cache fully built responses, for the routes that opt in:
+
+    @route(blueprint, '/things/<name>', cache=CachePolicy(ttl=60, tags=('thing:{name}',)))
+    def display_thing(name):
+        ...
+
+A cached response is served without calling the handler, and so without
+touching Mongo or rendering anything. Only successful (C{200}) responses to
+C{GET} (and C{HEAD}) requests are cached, and never those that are streamed,
+private, or that set a cookie.
+
+Responses are keyed on the URL, the view args, the negotiated content type
+(and content encoding) and the values of the request headers in the policy's C{vary} list. Each
+entry lives for the policy's C{ttl}, or until any of its tags is invalidated:
+
+    current_app.response_cache.invalidate('thing:foo')
+"""
+
+from __future__ import absolute_import
+
+from hashlib import sha1
+from httplib import OK
+import logging
+import marshal
+import os
+import stat
+from threading import Lock
+import time
+
+from flask import request, current_app
+from hipflask.support.caching import LruCache, CacheInfo
+from hipflask.support.files import write_atomically
+from hipflask.support.web.timing import stage
+
+METHODS_CACHEABLE = ('GET', 'HEAD')
+HEADER_CACHE_STATUS = 'X-Cache'
+
+
+class CachePolicy(object):
+    """
+    How the responses of a route are cached.
+    """
+
+    def __init__(self, ttl=None, tags=(), vary=()):
+        """
+        Create a C{CachePolicy}.
+
+        @param ttl: how long (in seconds) to keep each response; C{None} for the default of the cache.
+        @param tags: the tags of each response, formatted with the view args; forex, C{thing:{name}}.
+        @param vary: the names of the request headers that the responses vary on, besides C{Accept}.
+        """
+
+        super(CachePolicy, self).__init__()
+
+        self.ttl = ttl
+        self.tags = tuple(tags)
+        self.vary = tuple(vary)
+
+    def tags_for(self, view_args):
+        return [tag.format(**view_args) for tag in self.tags]
+
+
+def cache_policy(cache):
+    """
+    Make a C{CachePolicy} from the C{cache} option of a route.
+
+    @param cache: C{None} or C{False} not to cache, C{True} for the defaults, a dict of options, or a C{CachePolicy}.
+    @return: the C{CachePolicy}; C{None} not to cache.
+    """
+
+    if cache is None or cache is False:
+        return None
+    elif cache is True:
+        return CachePolicy()
+    elif isinstance(cache, dict):
+        return CachePolicy(**cache)
+    return cache
+
+
+def cached_response(policy, build):
+    """
+    Serve the cached response for the current request, or else build (and
+    maybe cache) it.
+
+    @param policy: the C{CachePolicy}; must not be C{None}.
+    @param build: a nullary function that builds the response; must not be C{None}.
+    @return: the response; never C{None}.
+    """
+
+    cache = getattr(current_app, 'response_cache', None)
+    if cache is None or request.method not in METHODS_CACHEABLE:
+        return build()
+
+    with stage('cache'):
+        key = cache.key_for(policy)
+        response = cache.get(key)
+    if response is not None:
+        response.headers[HEADER_CACHE_STATUS] = 'HIT'
+        return response.make_conditional(request)
+
+    response = build()
+    if is_cacheable(response):
+        cache.put(key, response, policy)
+        response.headers[HEADER_CACHE_STATUS] = 'MISS'
+    return response
+
+
+def is_cacheable(response):
+    return (response.status_code == OK
+            and not response.is_streamed
+            and not response.direct_passthrough
+            and 'Set-Cookie' not in response.headers
+            and not response.cache_control.private
+            and not response.cache_control.no_store)
+
+
+class ResponseCache(object):
+    """
+    A cache of responses, in front of a backend that stores them.
+    """
+
+    def key_for(self, policy):
+        """
+        Build the key for the current request.
+
+        @param policy: the C{CachePolicy}; must not be C{None}.
+        @return: the key; a hex digest.
+        """
+
+        responsifier = getattr(current_app, 'responsifier', None)
+        accept = request.headers.get('Accept', None)
+        if hasattr(responsifier, 'negotiate_content_type'):
+            content_type = responsifier.negotiate_content_type(accept)
+        else:
+            content_type = accept
+        if hasattr(responsifier, 'negotiate_encoding'):
+            encoding = responsifier.negotiate_encoding(request.headers.get('Accept-Encoding', None))
+        else:
+            encoding = None
+        parts = (request.url,
+                 sorted((request.view_args or {}).iteritems()),
+                 content_type,
+                 encoding,
+                 [request.headers.get(header, None) for header in policy.vary])
+        return sha1(repr(parts)).hexdigest()
+
+    def get(self, key):
+        """
+        Look up the response cached against the supplied C{key}.
+
+        @param key: the key.
+        @return: a fresh copy of the response; C{None} if there is no such response, or it is stale.
+        """
+
+        entry = self.backend.get(key)
+        if entry is not None:
+            expires, tag_versions, status, headers, body = entry
+            if expires > self.clock() and all(self.backend.version_of(tag) == version
+                                              for tag, version in tag_versions):
+                self.hits += 1
+                return current_app.response_class(body, status=status, headers=headers)
+            self.backend.discard(key)
+        self.misses += 1
+        return None
+
+    def put(self, key, response, policy):
+        """
+        Cache the supplied C{response} against the supplied C{key}.
+
+        @param key: the key.
+        @param response: the response; must not be streamed.
+        @param policy: the C{CachePolicy}; must not be C{None}.
+        """
+
+        ttl = self.ttl if policy.ttl is None else policy.ttl
+        tags = policy.tags_for(request.view_args or {})
+        tag_versions = [(tag, self.backend.version_of(tag)) for tag in tags]
+        headers = [(name, value) for name, value in response.headers if name != HEADER_CACHE_STATUS]
+        entry = (self.clock() + ttl, tag_versions, response.status_code, headers, response.get_data())
+        self.backend.put(key, entry)
+
+    def invalidate(self, *tags):
+        """
+        Invalidate every response that is tagged with any of the supplied C{tags}.
+        """
+
+        for tag in tags:
+            self.backend.invalidate(tag)
+        _logger.debug('Invalidated tags [%s].', ', '.join(tags))
+
+    def clear(self):
+        self.backend.clear()
+
+    def info(self):
+        """
+        Report on the effectiveness of this cache.
+
+        @return: a C{CacheInfo}; never C{None}.
+        """
+
+        return CacheInfo(self.hits, self.misses, self.backend.evictions, self.backend.maxsize, len(self.backend))
+
+    def __init__(self, backend, ttl=60, clock=time.time):
+        """
+        Create a C{ResponseCache}.
+
+        @param backend: stores the responses; must not be C{None}.
+        @param ttl: how long (in seconds) to keep each response, unless its policy says otherwise.
+        @param clock: tells the time, in seconds.
+        """
+
+        super(ResponseCache, self).__init__()
+
+        assert backend is not None, 'The backend is required.'
+
+        self.backend = backend
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+
+
+class MemoryBackend(object):
+    """
+    Store responses in a bounded, least-recently-used cache in (each) process.
+    """
+
+    def get(self, key):
+        return self._entries.get(key)
+
+    def put(self, key, entry):
+        self._entries.put(key, entry)
+
+    def discard(self, key):
+        self._entries.discard(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def version_of(self, tag):
+        return self._versions.get(tag, 0)
+
+    def invalidate(self, tag):
+        with self._lock:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    @property
+    def evictions(self):
+        return self._entries.evictions
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __init__(self, maxsize=1024):
+        super(MemoryBackend, self).__init__()
+
+        self.maxsize = maxsize
+
+        self._entries = LruCache(maxsize)
+        # kept apart from the entries, so that a tag's version is never evicted
+        self._versions = {}
+        self._lock = Lock()
+
+
+class SharedMemoryBackend(object):
+    """
+    Store responses as files in a (shared memory) directory, forex under
+    C{/dev/shm}, so that every process on a host--every pre-forked worker,
+    say--shares them.
+
+    Each entry, and each tag's version, is written to a temporary file and then
+    renamed into place, so no process ever reads a partial one. The least
+    recently used entries are pruned, every so often, once there are more than
+    C{maxsize} of them.
+
+    Entries are marshalled, not pickled, so that reading one never runs code;
+    an entry is made of plain values only. The directory is private to the
+    user of the process: one that anybody else owns, or can write to, is
+    refused.
+    """
+
+    def get(self, key):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as stream:
+                entry = marshal.load(stream)
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            return None
+        try:
+            # touched, so that pruning can tell the least recently used
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key, entry):
+        self._write(self._entry_path(key), marshal.dumps(entry))
+        self._puts += 1
+        if self._puts % self._prune_every == 0:
+            self.prune()
+
+    def discard(self, key):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        for name in self._entry_names():
+            self.discard(name)
+
+    def version_of(self, tag):
+        try:
+            with open(self._tag_path(tag), 'rb') as stream:
+                return int(stream.read() or 0)
+        except (IOError, OSError, ValueError):
+            return 0
+
+    def invalidate(self, tag):
+        # best effort: two processes that invalidate the same tag at once may bump it only once, which still does
+        self._write(self._tag_path(tag), str(self.version_of(tag) + 1))
+
+    def prune(self):
+        """
+        Remove the least recently used entries beyond C{maxsize}.
+        """
+
+        names = self._entry_names()
+        excess = len(names) - self.maxsize
+        if excess <= 0:
+            return
+        used = []
+        for name in names:
+            try:
+                used.append((os.path.getmtime(os.path.join(self.directory, name)), name))
+            except OSError:
+                pass
+        for _, name in sorted(used)[:excess]:
+            self.discard(name)
+            self.evictions += 1
+
+    def _entry_names(self):
+        return [name for name in os.listdir(self.directory) if not name.startswith(('tag-', '.'))]
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _tag_path(self, tag):
+        return os.path.join(self.directory, 'tag-' + sha1(tag.encode('utf-8')).hexdigest())
+
+    # noinspection PyMethodMayBeStatic
+    def _write(self, path, content):
+        try:
+            # the temporary file is hidden, so never read as an entry
+            write_atomically(path, content)
+        except (IOError, OSError):
+            _logger.warning('Cannot write [%s].', path, exc_info=True)
+
+    def __len__(self):
+        return len(self._entry_names())
+
+    def __init__(self, directory='/dev/shm/hipflask', maxsize=1024):
+        """
+        Create a C{SharedMemoryBackend}.
+
+        @param directory: the directory of the entries; created (private to this user) if need be.
+        @param maxsize: the number of entries to keep; must be greater than zero.
+        @raise OSError: if the directory is owned by another user, or anybody else can write to it.
+        """
+
+        super(SharedMemoryBackend, self).__init__()
+
+        assert maxsize > 0, 'The maximum size must be greater than zero.'
+
+        self.directory = directory
+        self.maxsize = maxsize
+        self.evictions = 0
+
+        self._puts = 0
+        self._prune_every = max(1, maxsize // 10)
+        if not os.path.isdir(directory):
+            os.makedirs(directory, 0o700)
+        status = os.stat(directory)
+        if status.st_uid != os.getuid() or status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise OSError('Refusing the response cache directory [{}]; it must be owned by this user, '
+                          'and writable by no one else.'.format(directory))
+
+
+def create_response_cache(config):
+    """
+    Create the response cache set up in the supplied C{config}.
+
+    @param config: the configuration; must not be C{None}.
+    @return: a C{ResponseCache}; C{None} if there is no C{RESPONSE_CACHE_BACKEND}.
+    """
+
+    name = config.get('RESPONSE_CACHE_BACKEND', None)
+    if name is None:
+        return None
+    maxsize = config.get('RESPONSE_CACHE_SIZE', 1024)
+    if name == 'memory':
+        backend = MemoryBackend(maxsize=maxsize)
+    elif name == 'shm':
+        backend = SharedMemoryBackend(config.get('RESPONSE_CACHE_DIRECTORY', '/dev/shm/hipflask'), maxsize=maxsize)
+    else:
+        raise ValueError('No response cache backend named [{}]; choose from [memory, shm].'.format(name))
+    return ResponseCache(backend, ttl=config.get('RESPONSE_CACHE_TTL', 60))
+
+
+_logger = logging.getLogger(__name__)
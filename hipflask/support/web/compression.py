@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Compress responses with gzip or deflate, as negotiated against the
+C{Accept-Encoding} header of the request.
+
+Responses are compressed in the responsifier pipeline, by wrapping the
+responsifier in a C{CompressingResponsifier}; streamed responses are
+compressed as they stream. Static files are not compressed on the fly at all:
+those with a precompressed C{.gz} variant alongside them (see C{build.py})
+are served from that instead.
+"""
+
+import mimetypes
+import os
+import zlib
+
+from flask import request, send_file, safe_join
+from hipflask.support.caching import LruCache
+from hipflask.support.web.timing import stage
+from werkzeug.http import parse_accept_header
+
+ENCODING_GZIP = 'gzip'
+ENCODING_DEFLATE = 'deflate'
+
+# in order of preference, all else being equal
+ENCODINGS = (ENCODING_GZIP, ENCODING_DEFLATE)
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/javascript', 'application/xml', 'image/svg+xml')
+
+
+def best_encoding(accept_encoding, encodings=ENCODINGS):
+    """
+    Find the best of the supplied C{encodings} for the supplied (raw) C{Accept-Encoding} header.
+
+    @param accept_encoding: the C{Accept-Encoding} header; can be C{None}.
+    @param encodings: the supported encodings, in order of preference.
+    @return: the encoding; C{None} if none of them is acceptable.
+    """
+
+    accepts = parse_accept_header(accept_encoding)
+    best, best_quality = None, 0
+    for encoding in encodings:
+        quality = accepts[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def is_compressible(mimetype):
+    return mimetype is not None and (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def compressor_for(encoding, level=6):
+    """
+    Create a (streaming) compressor for the supplied C{encoding}.
+
+    HTTP's C{deflate} is the zlib format; C{gzip} wraps the same in a gzip header and trailer.
+    """
+
+    window_bits = zlib.MAX_WBITS | 16 if encoding == ENCODING_GZIP else zlib.MAX_WBITS
+    return zlib.compressobj(level, zlib.DEFLATED, window_bits)
+
+
+def compressed(chunks, compressor):
+    """
+    Compress the supplied C{chunks}, as they are iterated.
+    """
+
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def compress_response(response, encoding, min_size=500, level=6):
+    """
+    Compress the supplied C{response} with the supplied C{encoding}.
+
+    Responses that are already encoded, that are not of a compressible type,
+    or (unless streamed) that are smaller than C{min_size} bytes, are left as
+    they are. The C{ETag} of a compressed response is weakened, since its bytes
+    depend on the encoding.
+
+    @param response: the response; must not be C{None}.
+    @param encoding: the encoding; C{None} to leave the response as it is.
+    @return: the C{response}, for chaining.
+    """
+
+    if response.direct_passthrough or not is_compressible(response.mimetype):
+        return response
+    response.vary.add('Accept-Encoding')
+    if encoding is None or 'Content-Encoding' in response.headers:
+        return response
+
+    compressor = compressor_for(encoding, level)
+    if response.is_streamed:
+        response.response = compressed(response.response, compressor)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        response.set_data(compressor.compress(data) + compressor.flush())
+
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+class CompressingResponsifier(object):
+    """
+    Create a C{Response} with the supplied C{responsifier}, then compress it.
+
+    The outcome of negotiating each distinct (raw) C{Accept-Encoding} header is
+    remembered in a bounded cache.
+    """
+
+    def responsify(self, *args, **kwargs):
+        response = self.responsifier.responsify(*args, **kwargs)
+        encoding = self.negotiate_encoding(request.headers.get('Accept-Encoding', None))
+        with stage('compress'):
+            return compress_response(response, encoding, min_size=self.min_size, level=self.level)
+
+    def negotiate_encoding(self, accept_encoding):
+        """
+        Find the encoding for the supplied (raw) C{Accept-Encoding} header.
+
+        @return: the encoding; C{None} for none.
+        """
+
+        encoding = self.negotiated.get(accept_encoding, _UNNEGOTIATED)
+        if encoding is _UNNEGOTIATED:
+            encoding = self.negotiated.put(accept_encoding, best_encoding(accept_encoding))
+        return encoding
+
+    def negotiate_content_type(self, accept_header):
+        return self.responsifier.negotiate_content_type(accept_header)
+
+    def __init__(self, responsifier, min_size=500, level=6, cache_size=64):
+        """
+        Create a C{CompressingResponsifier}.
+
+        @param responsifier: creates the responses; must not be C{None}.
+        @param min_size: the smallest (non-streamed) response to compress, in bytes.
+        @param level: the compression level, from C{1} (fastest) to C{9} (smallest).
+        @param cache_size: the number of distinct C{Accept-Encoding} headers to remember.
+        """
+
+        super(CompressingResponsifier, self).__init__()
+
+        assert responsifier is not None, 'The responsifier is required.'
+
+        self.responsifier = responsifier
+        self.min_size = min_size
+        self.level = level
+        self.negotiated = LruCache(cache_size)
+
+
+def serve_precompressed_static(app):
+    """
+    Serve the C{.gz} variant of a static file, when there is one, to the
+    clients that accept gzip. Whenever there is one, the response (either
+    variant) varies on C{Accept-Encoding}.
+
+    @param app: the Flask application; must not be C{None}.
+    """
+
+    send_static_file = app.view_functions.get('static', None)
+    if send_static_file is None:
+        return
+
+    def send_precompressed_static_file(filename):
+        path = safe_join(app.static_folder, filename + '.gz')
+        if not os.path.isfile(path):
+            return send_static_file(filename)
+
+        if parse_accept_header(request.headers.get('Accept-Encoding', None))[ENCODING_GZIP] > 0:
+            mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            response = send_file(path, mimetype=mimetype, conditional=True,
+                                 cache_timeout=app.get_send_file_max_age(filename))
+            response.headers['Content-Encoding'] = ENCODING_GZIP
+        else:
+            # so that a shared cache does not serve this to the clients that do accept gzip
+            response = send_static_file(filename)
+        response.vary.add('Accept-Encoding')
+        return response
+
+    app.view_functions['static'] = send_precompressed_static_file
+
+
+def write_precompressed(path, level=9):
+    """
+    Write the C{.gz} variant of the file at the supplied C{path}.
+
+    @return: the path of the variant.
+    """
+
+    gz_path = path + '.gz'
+    compressor = compressor_for(ENCODING_GZIP, level)
+    with open(path, 'rb') as source:
+        with open(gz_path, 'wb') as target:
+            for chunk in iter(lambda: source.read(65536), b''):
+                target.write(compressor.compress(chunk))
+            target.write(compressor.flush())
+    return gz_path
+
+
+_UNNEGOTIATED = object()
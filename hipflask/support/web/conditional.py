@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Conditional C{GET}: answer C{304 Not Modified}, without rendering anything,
+when the client's copy of a response is still current.
+
+The validators of a response are its C{ETag} and C{Last-Modified}. A handler
+that knows the version of what it responds with can say so (in a dict, as
+here, or a C{ViewResponse}), and spare even the digesting of the model:
+
+    return dict(view_name='thing', model=thing, version=thing['revision'],
+                last_modified=thing['updated'])
+
+Otherwise, if C{AUTOMATIC_ETAGS} is set, the C{ETag} of a response is a
+digest of its rendered body (unless it is streamed): the response is rendered
+(once, as ever), but only sent if the client's copy is not current. Being
+digested from what is sent, it reflects the template, the context processors
+and the asset manifest as much as the model. Either way, the C{ETag} depends
+on the negotiated content type, so the C{Vary} header names C{Accept}.
+"""
+
+import datetime
+from hashlib import sha1
+from httplib import OK, NOT_MODIFIED
+
+from flask import request, current_app
+from hipflask.support.web.models import ViewResponse
+
+METHODS_CONDITIONAL = ('GET', 'HEAD')
+
+
+def validators_for(response_data, view_name, status_code):
+    """
+    Work out the validators that the handler supplied for the response to the
+    current request, before anything is rendered; see C{automatic_etag_for}.
+
+    @param response_data: that which is returned by a handler; must not be C{None}.
+    @param view_name: the view name.
+    @param status_code: the (HTTP) status code.
+    @return: C{(etag, last_modified)}; C{None} if the handler supplied neither.
+    """
+
+    if status_code != OK or request.method not in METHODS_CONDITIONAL:
+        return None
+
+    version = last_modified = None
+    if isinstance(response_data, ViewResponse):
+        version, last_modified = response_data.version, response_data.last_modified
+    elif isinstance(response_data, dict):
+        version = response_data.get('version', None)
+        last_modified = response_data.get('last_modified', None)
+
+    if version is None and last_modified is None:
+        return None
+    etag = etag_for(view_name, version) if version is not None else None
+    return etag, as_http_date(last_modified)
+
+
+def automatic_etag_for(response):
+    """
+    Digest the rendered body of the supplied C{response} into an C{ETag}, if
+    C{AUTOMATIC_ETAGS} is set.
+
+    @param response: the (rendered) response; must not be C{None}.
+    @return: the C{ETag}; C{None} if there is none, or the response is streamed.
+    """
+
+    if not current_app.config.get('AUTOMATIC_ETAGS', False) \
+            or request.method not in METHODS_CONDITIONAL \
+            or response.status_code != OK \
+            or response.is_streamed \
+            or response.direct_passthrough:
+        return None
+    return sha1(response.get_data()).hexdigest()
+
+
+def etag_for(view_name, version):
+    """
+    Build an C{ETag} for the supplied version of a view, in the negotiated content type.
+    """
+
+    return sha1(repr((view_name, negotiated_content_type(), version))).hexdigest()
+
+
+def negotiated_content_type():
+    accept = request.headers.get('Accept', None)
+    responsifier = getattr(current_app, 'responsifier', None)
+    if hasattr(responsifier, 'negotiate_content_type'):
+        return responsifier.negotiate_content_type(accept)
+    return accept
+
+
+def as_http_date(value):
+    """
+    Convert the supplied C{datetime} to naive UTC, truncated to the second, as
+    HTTP dates are.
+    """
+
+    if value is None:
+        return None
+    return datetime.datetime(*value.utctimetuple()[:6])
+
+
+def is_not_modified(etag, last_modified):
+    """
+    Is the client's copy of the response to the current request still current?
+
+    C{If-None-Match} takes precedence over C{If-Modified-Since}.
+    """
+
+    if request.if_none_match:
+        return etag is not None and request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def not_modified_response(etag, last_modified):
+    return set_validators(current_app.response_class(status=NOT_MODIFIED), etag, last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    """
+    Set the supplied validators on the C{response}.
+
+    @return: the C{response}, for chaining.
+    """
+
+    if etag is not None:
+        # a compressed response is not byte-for-byte the same as an uncompressed one
+        response.set_etag(etag, weak='Content-Encoding' in response.headers)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.vary.add('Accept')
+    return response
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers for the view models that handlers return.
+"""
+
+from hashlib import sha1
+from httplib import OK
+
+from hipflask.support import HipflaskException
+from hipflask.support.strings import is_stringy
+import simplejson as json
+
+
+class ViewResponse(object):
+    """
+    What a handler returns, already deconstructed: the view name (validated
+    once, on construction), the model and the (HTTP) status code; and,
+    optionally, the validators of a conditional response (see the
+    hipflask.support.web.conditional module).
+
+    Responding to a C{ViewResponse} costs one attribute access, where a
+    string, tuple or dict must be inspected (and its view name validated)
+    on every request.
+    """
+
+    __slots__ = ('deconstructed', 'version', 'last_modified')
+
+    @property
+    def view_name(self):
+        return self.deconstructed[0]
+
+    @property
+    def model(self):
+        return self.deconstructed[1]
+
+    @property
+    def status_code(self):
+        return self.deconstructed[2]
+
+    def __init__(self, view_name, model=None, status_code=OK, version=None, last_modified=None, validated=False):
+        """
+        Create a C{ViewResponse}.
+
+        @param view_name: the name of the view to be rendered; must not be C{None} or blank.
+        @param model: the model; C{None} for an empty one.
+        @param status_code: the (HTTP) status code; C{None} for C{200 OK}.
+        @param version: the version of the model, from which its ETag is worked out; can be C{None}.
+        @param last_modified: when the model was last modified; can be C{None}.
+        @param validated: whether the C{view_name} has already been validated (see C{view_responder}).
+        @raise HipflaskException: if the view name is not a string, or is blank.
+        """
+
+        if not validated:
+            view_name = required_view_name(view_name)
+        self.deconstructed = (view_name,
+                              model if model is not None else {},
+                              status_code if status_code is not None else OK)
+        self.version = version
+        self.last_modified = last_modified
+
+    def __repr__(self):
+        return 'ViewResponse({!r}, status_code={!r})'.format(self.view_name, self.status_code)
+
+
+def view_responder(view_name):
+    """
+    Validate the supplied C{view_name} once, up front, and create a function
+    that wraps a model in a C{ViewResponse} of that view; for the handlers
+    of a route that always render the same view.
+
+    @param view_name: the name of the view; must not be C{None} or blank.
+    @return: a function of C{(model, status_code=OK)}; never C{None}.
+    @raise HipflaskException: if the view name is not a string, or is blank.
+    """
+
+    view_name = required_view_name(view_name)
+
+    def respond_with(model, status_code=OK):
+        return ViewResponse(view_name, model, status_code, validated=True)
+
+    return respond_with
+
+
+def required_view_name(view_name):
+    if not is_stringy(view_name):
+        raise HipflaskException('Required view name must be a string.')
+    # rather than has_text, whose strip() copies the name
+    if not view_name or view_name.isspace():
+        raise HipflaskException('Required view name is empty.')
+    return view_name
+
+
+def is_streamable(value):
+    """
+    Is the supplied C{value} an iterable that must be streamed, such as a
+    generator or a pymongo cursor, as opposed to a plain JSON container?
+    """
+
+    return hasattr(value, '__iter__') \
+        and not isinstance(value, (dict, list, tuple)) \
+        and not is_stringy(value)
+
+
+def has_streamable_values(view_model):
+    return any(is_streamable(value) for value in view_model.itervalues())
+
+
+def model_digest(view_model):
+    """
+    Digest the supplied C{view_model}, for use as a cache key.
+
+    Only a model of plain JSON values is digested; anything else (an object
+    whose C{repr} is all that tells it apart, say) fails closed.
+
+    @param view_model: the model; must not be C{None}.
+    @return: the digest; C{None} if the model cannot be digested.
+    """
+
+    try:
+        content = json.dumps(view_model, sort_keys=True)
+    except (TypeError, ValueError):
+        return None
+    return sha1(content).hexdigest()
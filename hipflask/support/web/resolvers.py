@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import logging
+
 from hipflask import has_text, has_elements, HipflaskException
 
 
@@ -106,3 +108,116 @@ class SimpleSuffixBasedViewResolver(object):
 
         self.suffix = suffix
         self.view_name_key = view_name_key
+
+
+class IndexedViewResolver(object):
+    """
+    Resolve a logical view name to a (file)path through an index of the
+    templates, built (and each template compiled) just once; see C{index}.
+
+    The logical view name of a template is its name less the suffix. Forex,
+    'users/login.html' is indexed as 'users/login' with a suffix of '.html'.
+    The index is frozen once built, so a view that is missing from it is
+    missing for good (until it is indexed again), and each lookup is a dict hit.
+    """
+
+    # noinspection PyUnusedLocal
+    def resolve_view(self, *args, **kwargs):
+        """
+        Resolve the logical view name to a (file)path, through the index.
+
+        @param args: ignored.
+        @param kwargs: contains the logical view name.
+        @return: the resolved (file)path.
+        """
+
+        try:
+            return self.views[kwargs[self.view_name_key]]
+        except KeyError:
+            raise self._cannot_find(kwargs.get(self.view_name_key, None))
+
+    def template_for(self, logical_view_name):
+        """
+        Look up the compiled template of the supplied C{logical_view_name}.
+
+        @param logical_view_name: the logical view name.
+        @return: the compiled template; never C{None}.
+        """
+
+        try:
+            return self.templates[logical_view_name]
+        except KeyError:
+            raise self._cannot_find(logical_view_name)
+
+    def index(self, jinja_env):
+        """
+        Index (and compile) every template that the supplied environment's loader can list, and has the suffix.
+
+        @param jinja_env: the (Jinja2) environment; its loader must be able to list its templates.
+        @return: this C{IndexedViewResolver}, for chaining.
+        @raise TemplateSyntaxError: if any indexed template does not compile.
+        """
+
+        names = jinja_env.list_templates(filter_func=lambda name: name.endswith(self.suffix))
+        views = dict((name[:-len(self.suffix)], name) for name in names)
+        templates = dict((view_name, jinja_env.get_template(name)) for view_name, name in views.iteritems())
+        # the new index replaces the old in one go
+        self.views, self.templates = views, templates
+        self.indexed = True
+        _logger.debug('Indexed [%d] views.', len(views))
+        return self
+
+    def missing(self, logical_view_names):
+        """
+        Find those of the supplied C{logical_view_names} that are not in the index.
+
+        @return: the missing names, sorted; never C{None}.
+        """
+
+        return sorted(set(name for name in logical_view_names if name not in self.views))
+
+    def _cannot_find(self, logical_view_name):
+        if has_text(logical_view_name):
+            return CannotFindViewException.for_view_name(logical_view_name)
+        return CannotFindViewException.for_missing_view_name()
+
+    def __contains__(self, logical_view_name):
+        return logical_view_name in self.views
+
+    def __len__(self):
+        return len(self.views)
+
+    def __init__(self, suffix='.html', view_name_key='view_name'):
+        """
+        Create an (empty) C{IndexedViewResolver}.
+
+        @param suffix: the suffix of the templates to be indexed; must not be C{None}.
+        @param view_name_key: the name of the logical view name in the model; must not be C{None}.
+        """
+
+        super(IndexedViewResolver, self).__init__()
+
+        assert has_text(suffix), 'The suffix is required.'
+        assert has_text(view_name_key), 'The view name key is required.'
+
+        self.suffix = suffix
+        self.view_name_key = view_name_key
+
+        self.views = {}
+        self.templates = {}
+        self.indexed = False
+
+
+def routed_view_names(app):
+    """
+    Find the logical view names of the routes of the supplied application that
+    name their view up front (see C{hipflask.route}).
+
+    @param app: the Flask application; must not be C{None}.
+    @return: the logical view names; never C{None}.
+    """
+
+    return set(f.view_name for f in app.view_functions.itervalues() if getattr(f, 'view_name', None) is not None)
+
+
+_logger = logging.getLogger(__name__)
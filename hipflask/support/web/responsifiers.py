@@ -1,76 +1,364 @@
 # -*- coding: utf-8 -*-
 from httplib import UNSUPPORTED_MEDIA_TYPE
+import sys
 
-from hipflask.support.collections import copy_and_update, has_elements
+from hipflask.support.caching import LruCache
+from hipflask.support.collections import LayeredMapping, has_elements
+from hipflask.support.serializers import FastJsonSerializer
+from hipflask.support.strings import has_text
+from hipflask.support.web import CONTENT_TYPE_APPLICATION_JSON
+from hipflask.support.web.models import is_streamable, has_streamable_values, model_digest
+from hipflask.support.web.timing import stage
 from werkzeug.datastructures import MIMEAccept
 from werkzeug.http import parse_accept_header
-from flask import request, render_template, jsonify, make_response
+from flask import request, make_response, current_app, template_rendered, signals_available
+import jinja2
+from jinja2.utils import concat
 from werkzeug.exceptions import abort
 
+# Template.new_context(..., shared=True) and Environment.handle_exception, as Template.render uses them, are internals
+# of Jinja2, known to hold from 2.7 until 3.0; any other version renders through Template.render, copying the context
+LAYERED_RENDERING = (2, 7) <= tuple(int(part) for part in jinja2.__version__.split('.')[:2]) < (3, 0)
+
 
 class SimpleJsonResponsifier(object):
     """
     Create a C{Response} by rendering the model directly to JSON.
     """
 
-    # noinspection PyUnusedLocal,PyMethodMayBeStatic
+    # noinspection PyUnusedLocal
+    def responsify(self, *args, **kwargs):
+        view_model = args[0]
+        pretty = current_app.config.get('JSONIFY_PRETTYPRINT_REGULAR', False) and not request.is_xhr
+        with stage('render'):
+            content = self.serializer.dumps(view_model, pretty=pretty)
+        return current_app.response_class(content, mimetype=CONTENT_TYPE_APPLICATION_JSON)
+
+    def __init__(self, serializer=None):
+        """
+        Create a C{SimpleJsonResponsifier}.
+
+        @param serializer: the JSON serializer; defaults to a C{FastJsonSerializer}.
+        """
+
+        super(SimpleJsonResponsifier, self).__init__()
+
+        self.serializer = FastJsonSerializer() if serializer is None else serializer
+
+
+class StreamingJsonResponsifier(object):
+    """
+    Create a C{Response} by encoding the model to JSON incrementally.
+
+    Values in the model that are iterators--such as generators or pymongo
+    cursors--are serialized one item at a time as JSON arrays, so that they are
+    never materialised in full. Models without any such values are delegated
+    to the C{fallback} responsifier, if there is one.
+    """
+
     def responsify(self, *args, **kwargs):
         view_model = args[0]
-        return jsonify(**view_model)
+        if self.fallback is not None and not has_streamable_values(view_model):
+            return self.fallback.responsify(*args, **kwargs)
+
+        content = buffered(self.iterencode(view_model), self.chunk_size)
+        return current_app.response_class(content, mimetype=CONTENT_TYPE_APPLICATION_JSON)
+
+    def iterencode(self, view_model):
+        """
+        Encode the supplied C{view_model} as a JSON object, piece by piece.
+
+        @param view_model: the model; must not be C{None}.
+        @return: a generator of JSON fragments; never C{None}.
+        """
+
+        dumps = self.serializer.dumps
+
+        yield '{'
+        for index, (key, value) in enumerate(view_model.iteritems()):
+            if index:
+                yield ','
+            yield dumps(key)
+            yield ':'
+            if is_streamable(value):
+                yield '['
+                for item_index, item in enumerate(value):
+                    if item_index:
+                        yield ','
+                    yield dumps(item)
+                yield ']'
+            else:
+                yield dumps(value)
+        yield '}'
+
+    def __init__(self, fallback=None, serializer=None, chunk_size=8192):
+        """
+        Create a C{StreamingJsonResponsifier}.
+
+        @param fallback: responsifies models without streamable values; can be C{None}.
+        @param serializer: the JSON serializer; defaults to a C{FastJsonSerializer}.
+        @param chunk_size: the (approximate) size of each chunk written to the response.
+        """
+
+        super(StreamingJsonResponsifier, self).__init__()
+
+        assert chunk_size > 0, 'The chunk size must be greater than zero.'
+
+        self.fallback = fallback
+        self.serializer = FastJsonSerializer() if serializer is None else serializer
+        self.chunk_size = chunk_size
+
+
+def buffered(fragments, chunk_size):
+    """
+    Coalesce the supplied (small) C{fragments} into chunks of roughly C{chunk_size}.
+    """
+
+    chunk = []
+    size = 0
+    for fragment in fragments:
+        chunk.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
 
 
 class TemplatedResponsifier(object):
     """
     Create a C{Response} by rendering a (Jinja2) template.
+
+    When given a (non-zero) C{cache_size}, the compiled template for each
+    logical view name is remembered, skipping view resolution and template
+    lookup on subsequent requests. A view resolver that has the compiled
+    templates already (an C{IndexedViewResolver}, say) is asked for them
+    directly. The rendered output of views named in
+    C{cacheable_views} is remembered too, keyed on a digest of the view model;
+    such views must render the same content for the same model. A model that
+    is not plain JSON cannot be digested, and so is rendered afresh every time.
     """
 
     def responsify(self, *args, **kwargs):
-        view = self.view_resolver.resolve_view(*args, **kwargs)
-        view_model = self.view_model(*args, **kwargs)
-        content = render_template(view, **view_model)
+        logical_view_name = kwargs.get(self.view_name_key, None)
+        with stage('resolve'):
+            if self.templates is None and not self.indexed:
+                view = self.view_resolver.resolve_view(*args, **kwargs)
+                template = current_app.jinja_env.get_or_select_template(view)
+            else:
+                template = self.template_for(logical_view_name, *args, **kwargs)
+        with stage('view_model'):
+            view_model = self.view_model(*args, **kwargs)
+        with stage('render'):
+            content = self.render(logical_view_name, template, view_model)
         return make_response(content)
 
     # noinspection PyMethodMayBeStatic
     def view_model(self, *args, **kwargs):
-        return copy_and_update(args[0], **kwargs)
+        """
+        Layer the (named) arguments over the model, without copying either.
+
+        @return: a read-only mapping; never C{None}.
+        """
+
+        return LayeredMapping(kwargs, args[0])
+
+    def template_for(self, logical_view_name, *args, **kwargs):
+        """
+        Find the compiled template for the supplied C{logical_view_name},
+        resolving and loading it on first use.
+
+        @param logical_view_name: the logical view name.
+        @return: the compiled template; never C{None}.
+        """
+
+        if self.indexed:
+            return self.view_resolver.template_for(logical_view_name)
+        template = self.templates.get(logical_view_name) if has_text(logical_view_name) else None
+        if template is None:
+            view = self.view_resolver.resolve_view(*args, **kwargs)
+            template = self.templates.put(logical_view_name, current_app.jinja_env.get_or_select_template(view))
+        return template
+
+    def render(self, logical_view_name, template, view_model):
+        """
+        Render the supplied template, with the supplied C{view_model} layered
+        over what the context processors supply, over the template's globals;
+        the layers are read through, not merged into one context (but see
+        C{LAYERED_RENDERING}).
+        """
+
+        digest = None
+        if self.rendered is not None and logical_view_name in self.cacheable_views:
+            digest = model_digest(dict(view_model))
+            if digest is not None:
+                content = self.rendered.get((logical_view_name, digest))
+                if content is not None:
+                    return content
+
+        app = current_app._get_current_object()
+        processed = template_context(app)
+        if LAYERED_RENDERING:
+            context = LayeredMapping(view_model, processed, template.globals)
+            try:
+                content = concat(template.root_render_func(template.new_context(context, shared=True)))
+            except Exception:
+                # as Template.render does, for the template's lines in the traceback
+                content = template.environment.handle_exception(sys.exc_info(), True)
+        else:
+            content = template.render(LayeredMapping(view_model, processed))
+        if signals_available and template_rendered.has_receivers_for(app):
+            # subscribers expect a dict, as render_template sends them; copied only for them
+            template_rendered.send(app, template=template, context=dict(LayeredMapping(view_model, processed)))
+
+        if digest is not None:
+            self.rendered.put((logical_view_name, digest), content)
+        return content
+
+    def cache_info(self):
+        """
+        Report on the effectiveness of the template and rendered output caches.
+
+        @return: a C{CacheInfo} for each cache, keyed by name; C{None} if caching is disabled.
+        """
+
+        if self.templates is None:
+            return None
+        return dict(templates=self.templates.info(), rendered=self.rendered.info())
+
+    def __init__(self, view_resolver, cache_size=0, cacheable_views=()):
+        """
+        Create a C{TemplatedResponsifier}.
+
+        @param view_resolver: resolves logical view names to templates; must not be C{None}.
+        @param cache_size: the number of templates (and rendered views) to cache; zero disables caching.
+        @param cacheable_views: the logical names of views whose rendered output can be cached.
+        """
 
-    def __init__(self, view_resolver):
         super(TemplatedResponsifier, self).__init__()
 
-        assert view_resolver, 'The view resolver is required.'
+        assert view_resolver is not None, 'The view resolver is required.'
         self.view_resolver = view_resolver
+        self.view_name_key = getattr(view_resolver, 'view_name_key', 'view_name')
+        self.indexed = hasattr(view_resolver, 'template_for')
+
+        self.templates = LruCache(cache_size) if cache_size > 0 else None
+        self.rendered = LruCache(cache_size) if cache_size > 0 else None
+        self.cacheable_views = frozenset(cacheable_views or ())
+
+
+def template_context(app):
+    """
+    Collect what the template context processors of the supplied application
+    supply (for the current blueprint, too), without merging in a view model.
+
+    @param app: the Flask application; must not be C{None}.
+    @return: the context; never C{None}.
+    """
+
+    context = {}
+    # into an empty dict, so nothing of the model is copied
+    app.update_template_context(context)
+    return context
 
 
 class ContentNegotiatingResponsifier(object):
+    """
+    Create a C{Response} by delegating to the responsifier registered for the
+    content type that best matches the C{Accept} header of the request.
+
+    The registry of media types is built once, and the outcome of negotiating
+    each distinct (raw) C{Accept} header is remembered in a bounded cache.
+    """
+
+    JSON_CONTENT_TYPE = ('application/json', 'text/javascript')
+    HTML_CONTENT_TYPE = ('text/html', 'application/xhtml+xml', 'application/xhtml+xml')
+    TEXT_CONTENT_TYPE = ('text/plain',)
+
+    MEDIA_TYPES = (('html', HTML_CONTENT_TYPE),
+                   ('json', JSON_CONTENT_TYPE),
+                   ('json', TEXT_CONTENT_TYPE))
+
     def responsify(self, *args, **kwargs):
-        content_type = self.best_content_type(request.headers['Accept'])
-        responsifier = self.find_responsifier_for(content_type)
+        with stage('negotiate'):
+            responsifier = self.negotiate(request.headers['Accept'])
 
         if responsifier:
             return responsifier.responsify(*args, **kwargs)
         else:
             abort(UNSUPPORTED_MEDIA_TYPE)
 
+    def negotiate(self, accept_header):
+        """
+        Find the responsifier for the supplied (raw) C{Accept} header.
+
+        @param accept_header: the C{Accept} header.
+        @return: the responsifier; C{None} if there isn't one for the best content type.
+        """
+
+        return self.negotiation(accept_header)[1]
+
+    def negotiate_content_type(self, accept_header):
+        """
+        Find the content type to respond with for the supplied (raw) C{Accept} header.
+
+        @param accept_header: the C{Accept} header.
+        @return: the content type; C{None} if there is no responsifier for the best content type.
+        """
+
+        return self.negotiation(accept_header)[0]
+
+    def negotiation(self, accept_header):
+        negotiated = self.negotiated.get(accept_header, None)
+        if negotiated is None:
+            content_type = self.best_content_type(accept_header)
+            responsifier = self.find_responsifier_for(content_type)
+            negotiated = (content_type if responsifier is not None else None, responsifier)
+            self.negotiated.put(accept_header, negotiated)
+        return negotiated
+
     # noinspection PyMethodMayBeStatic
     def best_content_type(self, accept_header):
         accepts = parse_accept_header(accept_header, cls=MIMEAccept)
         return accepts.best
 
-    JSON_CONTENT_TYPE = ('application/json', 'text/javascript')
-    HTML_CONTENT_TYPE = ('text/html', 'application/xhtml+xml', 'application/xhtml+xml')
-
     def find_responsifier_for(self, best_type):
-        responsifier = None
-        if best_type in self.HTML_CONTENT_TYPE:
-            responsifier = self.responsifiers['html']
-        elif best_type in self.JSON_CONTENT_TYPE:
-            responsifier = self.responsifiers['json']
-        elif best_type == 'text/plain':
-            responsifier = self.responsifiers['json']
-        return responsifier
-
-    def __init__(self, responsifiers):
+        return self.registry.get(best_type, None)
+
+    def cache_info(self):
+        return self.negotiated.info()
+
+    def __init__(self, responsifiers, cache_size=64):
+        """
+        Create a C{ContentNegotiatingResponsifier}.
+
+        @param responsifiers: responsifiers keyed by kind (C{html}, C{json}); must not be empty.
+        @param cache_size: the number of distinct C{Accept} headers to remember.
+        """
+
         super(ContentNegotiatingResponsifier, self).__init__()
 
         assert has_elements(responsifiers), 'The responsifiers are required.'
         self.responsifiers = dict(responsifiers)
+        self.registry = build_media_type_registry(self.MEDIA_TYPES, self.responsifiers)
+        self.negotiated = LruCache(cache_size)
+
+
+def build_media_type_registry(media_types, responsifiers):
+    """
+    Map each media type directly to the responsifier registered for its kind.
+
+    @param media_types: C{(kind, (media_type, ...))} pairs; must not be C{None}.
+    @param responsifiers: responsifiers keyed by kind; must not be C{None}.
+    @return: responsifiers keyed by media type; never C{None}.
+    """
+
+    registry = {}
+    for kind, content_types in media_types:
+        if kind in responsifiers:
+            for content_type in content_types:
+                registry.setdefault(content_type, responsifiers[kind])
+    return registry
+
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Serve the (content-hashed) files of asset bundles so that browsers can cache
+them for good.
+
+Each bundle is built into a file named for a hash of its content (see
+C{hipflask.assets}), and the build records the files of each bundle, by its
+logical name, in an C{AssetManifest}. Templates resolve a bundle's URLs
+through the manifest:
+
+    {% for url in asset_urls('css_all') %}
+      <link rel="stylesheet" href="{{ url }}">
+    {% endfor %}
+
+and the files in the manifest are served with a far-future, immutable
+C{Cache-Control}; a changed file gets a new name, and so a new URL.
+"""
+
+import time
+
+from flask import current_app, url_for
+from hipflask.support.files import read_manifest, write_manifest
+
+MANIFEST_VERSION = 1
+
+# a year, in seconds
+FAR_FUTURE = 365 * 24 * 60 * 60
+
+
+class AssetManifest(object):
+    """
+    The files (relative to the static folder) of each bundle, by its logical
+    name, persisted as JSON.
+    """
+
+    def files_for(self, name):
+        """
+        Look up the files of the named bundle.
+
+        @return: the files; C{None} if the bundle is not in this manifest.
+        """
+
+        return self._bundles.get(name, None)
+
+    def record(self, name, files):
+        """
+        Record the files of the named bundle; see C{save}.
+        """
+
+        self._bundles[name] = list(files)
+        self._files.update(files)
+
+    def save(self):
+        write_manifest(self.path, MANIFEST_VERSION, 'bundles', self._bundles)
+
+    def __contains__(self, filename):
+        return filename in self._files
+
+    def __len__(self):
+        return len(self._bundles)
+
+    def __init__(self, path=None):
+        """
+        Create an C{AssetManifest}, loading what is already recorded at the supplied C{path}.
+
+        @param path: the (file)path of the manifest; C{None} if not persisted.
+        """
+
+        super(AssetManifest, self).__init__()
+
+        self.path = path
+
+        self._bundles = read_manifest(path, MANIFEST_VERSION, 'bundles')
+        self._files = set(filename for files in self._bundles.itervalues() for filename in files)
+
+
+def asset_urls(name):
+    """
+    Resolve the URLs of the named bundle, through the manifest of the current
+    application; a bundle that is not in the manifest (forex, during
+    development) is resolved by Flask-Assets instead.
+
+    @param name: the logical name of the bundle; forex, C{css_all}.
+    @return: the URLs; never C{None}.
+    """
+
+    manifest = getattr(current_app, 'asset_manifest', None)
+    files = manifest.files_for(name) if manifest is not None else None
+    if files is None:
+        return current_app.jinja_env.assets_environment[name].urls()
+    return [url_for('static', filename=filename) for filename in files]
+
+
+def serve_immutable_static(app, max_age=FAR_FUTURE):
+    """
+    Serve the static files in the manifest of the supplied application with a
+    far-future, immutable C{Cache-Control}.
+
+    @param app: the Flask application; must not be C{None}.
+    @param max_age: how long (in seconds) the files can be cached.
+    """
+
+    send_static_file = app.view_functions.get('static', None)
+    if send_static_file is None:
+        return
+
+    def send_immutable_static_file(filename):
+        response = send_static_file(filename)
+        manifest = getattr(app, 'asset_manifest', None)
+        if manifest is not None and filename in manifest and response.status_code < 300:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+            # a bare directive; werkzeug knows nothing of immutable
+            response.cache_control['immutable'] = None
+            response.expires = int(time.time() + max_age)
+        return response
+
+    app.view_functions['static'] = send_immutable_static_file
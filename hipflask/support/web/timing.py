@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Time the stages of responding to each request--the handler, deconstructing
+its response data, negotiating the content type, resolving the view, building
+the view model, rendering--and aggregate the timings into histograms, per
+endpoint and content type.
+
+Code on the hot path marks out a stage with:
+
+    with stage('render'):
+        ...
+
+which costs next to nothing unless C{TIMING_ENABLED} is set for the
+application (see C{install_timing}). When it is, each response carries its
+timings in a C{Server-Timing} header. If C{TIMING_ENDPOINT_ENABLED} is set
+too, the histograms can be read at C{TIMING_ENDPOINT}; from the loopback
+address only, which is no guard at all behind a reverse proxy on the same
+host, so it is not set by default.
+
+The timing of a streamed response covers only the setting up of the stream,
+not the streaming.
+"""
+
+from bisect import bisect_left
+from threading import Lock, local
+import time
+
+from flask import Blueprint, current_app, jsonify, request
+from werkzeug.exceptions import abort
+
+HEADER_SERVER_TIMING = 'Server-Timing'
+
+STAGE_TOTAL = 'total'
+
+# the upper bounds of the buckets, in milliseconds; the last bucket is unbounded
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def stage(name):
+    """
+    Time a stage of responding to the current request, if timing is enabled
+    for its application; only then does the request have timings.
+
+    @param name: the name of the stage; forex, C{render}.
+    @return: a context manager; never C{None}.
+    """
+
+    timings = getattr(_local, 'timings', None)
+    if timings is None:
+        return _UNTIMED
+    return _Stage(timings, name)
+
+
+def current_timings():
+    """
+    @return: the C{RequestTimings} of the current request; C{None} if timing is not enabled.
+    """
+
+    return getattr(_local, 'timings', None)
+
+
+class RequestTimings(object):
+    """
+    The time spent in each stage of responding to a request, in seconds.
+
+    A stage that is entered more than once is timed in total.
+    """
+
+    __slots__ = ('started', 'stages', 'names')
+
+    def add(self, name, seconds):
+        if name not in self.stages:
+            self.names.append(name)
+            self.stages[name] = seconds
+        else:
+            self.stages[name] += seconds
+
+    def elapsed(self):
+        return time.time() - self.started
+
+    def server_timing(self):
+        """
+        Format these timings as a C{Server-Timing} header value, in milliseconds.
+        """
+
+        return ', '.join('{};dur={:.3f}'.format(name, seconds * 1000) for name, seconds in self.items())
+
+    def items(self):
+        """
+        @return: C{(name, seconds)} for each stage, in the order they were first entered.
+        """
+
+        return [(name, self.stages[name]) for name in self.names]
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = {}
+        self.names = []
+
+
+class Histogram(object):
+    """
+    A histogram of durations, over fixed buckets (see C{BUCKETS_MS}).
+    """
+
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def add(self, seconds):
+        milliseconds = seconds * 1000
+        self.counts[bisect_left(BUCKETS_MS, milliseconds)] += 1
+        self.count += 1
+        self.sum += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    def quantile(self, q):
+        """
+        Estimate the supplied quantile, as the upper bound of the bucket that it falls in.
+
+        @param q: the quantile, from C{0} to C{1}.
+        @return: the estimate, in milliseconds; C{None} if there are no durations.
+        """
+
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def snapshot(self):
+        return dict(count=self.count,
+                    mean=self.sum / self.count if self.count else 0.0,
+                    max=self.max,
+                    p50=self.quantile(0.5),
+                    p95=self.quantile(0.95),
+                    p99=self.quantile(0.99),
+                    buckets=zip([str(bound) for bound in BUCKETS_MS] + ['+Inf'], self.counts))
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class TimingHistograms(object):
+    """
+    Histograms of the timings of each stage, per endpoint and content type.
+    """
+
+    def record(self, endpoint, content_type, timings):
+        """
+        Record the supplied C{RequestTimings}.
+        """
+
+        with self._lock:
+            stages = self._histograms.setdefault((endpoint, content_type), {})
+            for name, seconds in timings.stages.iteritems():
+                histogram = stages.get(name, None)
+                if histogram is None:
+                    histogram = stages[name] = Histogram()
+                histogram.add(seconds)
+
+    def snapshot(self):
+        """
+        Take a (consistent) snapshot of the histograms.
+
+        @return: a list of dicts, one per endpoint and content type; never C{None}.
+        """
+
+        with self._lock:
+            return [dict(endpoint=endpoint,
+                         content_type=content_type,
+                         stages=dict((name, histogram.snapshot()) for name, histogram in stages.iteritems()))
+                    for (endpoint, content_type), stages in sorted(self._histograms.iteritems())]
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def __init__(self):
+        super(TimingHistograms, self).__init__()
+
+        self._histograms = {}
+        self._lock = Lock()
+
+
+def install_timing(app):
+    """
+    Time each request to the supplied application, if C{TIMING_ENABLED} is set.
+
+    @param app: the Flask application; must not be C{None}.
+    @return: the C{TimingHistograms}; C{None} if timing is not enabled.
+    """
+
+    if not app.config.get('TIMING_ENABLED', False):
+        return None
+
+    histograms = app.timing_histograms = TimingHistograms()
+    server_timing = app.config.get('TIMING_SERVER_TIMING_HEADER', True)
+
+    @app.before_request
+    def start_timing():
+        _local.timings = RequestTimings()
+
+    @app.after_request
+    def finish_timing(response):
+        timings = current_timings()
+        if timings is not None:
+            timings.add(STAGE_TOTAL, timings.elapsed())
+            histograms.record(request.endpoint, response.mimetype, timings)
+            if server_timing:
+                response.headers[HEADER_SERVER_TIMING] = timings.server_timing()
+        return response
+
+    @app.teardown_request
+    def stop_timing(exception=None):
+        _local.timings = None
+
+    endpoint = app.config.get('TIMING_ENDPOINT', None)
+    if endpoint is not None and app.config.get('TIMING_ENDPOINT_ENABLED', False):
+        app.register_blueprint(timing_blueprint(endpoint))
+    return histograms
+
+
+def timing_blueprint(endpoint):
+    """
+    Create a Blueprint that serves the timing histograms (as JSON) at the supplied C{endpoint}, to the
+    C{TIMING_ENDPOINT_ADDRESSES} only.
+    """
+
+    blueprint = Blueprint('timing', __name__)
+
+    @blueprint.route(endpoint)
+    def display_timings():
+        if request.remote_addr not in current_app.config.get('TIMING_ENDPOINT_ADDRESSES', ('127.0.0.1', '::1')):
+            abort(404)
+        return jsonify(buckets_ms=BUCKETS_MS, timings=current_app.timing_histograms.snapshot())
+
+    return blueprint
+
+
+class _Stage(object):
+    __slots__ = ('timings', 'name', 'started')
+
+    def __enter__(self):
+        self.started = time.time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.add(self.name, time.time() - self.started)
+        return False
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+
+class _Untimed(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_UNTIMED = _Untimed()
+
+# the timings of the current request, set (and cleared) by the application only if it is timed
+_local = local()
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+
+import click
+from pymongo import MongoClient
+from pymongo.database import Database
+
+from hipflask import create_app
+from hipflask.support.mongo import MongoPoolMetrics
+from hipflask.support.prefork import PreforkServer
+
+
+@click.command()
+@click.option('--host', default='0.0.0.0', help='The host to bind.')
+@click.option('--port', default=5000, help='The port to bind.')
+@click.option('--workers', default=4, help='The number of worker processes.')
+@click.option('--threaded', is_flag=True, help='Serve each request in a separate thread.')
+def serve(host, port, workers, threaded):
+    """
+    Serve the application from worker processes forked from a warmed master;
+    see the hipflask.support.prefork module.
+    """
+
+    application = create_app()
+    server = PreforkServer(application, host=host, port=port, workers=workers, threaded=threaded,
+                           fork_unsafe=(MongoPoolMetrics, MongoClient, Database))
+    server.serve()
+
+
+if __name__ == '__main__':
+    serve()
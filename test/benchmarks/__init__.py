@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmarks; run a module directly, forex:
+
+    $ python -m test.benchmarks.negotiation_benchmarks
+"""
+
+from timeit import repeat
+
+
+def measure(f, number=10000, repetitions=3):
+    """
+    Time the supplied (nullary) function.
+
+    @param f: the function to be timed; must not be C{None}.
+    @param number: the number of calls per repetition.
+    @param repetitions: the number of repetitions; the best is reported.
+    @return: the best time per call, in microseconds.
+    """
+
+    best = min(repeat(f, number=number, repeat=repetitions))
+    return best / number * 1e6
+
+
+def compare(title, candidates, number=10000, repetitions=3):
+    """
+    Time and report on each of the supplied candidates, relative to the first.
+
+    @param title: the title of the comparison.
+    @param candidates: C{(name, function)} pairs; the first is the baseline.
+    @param number: the number of calls per repetition.
+    @param repetitions: the number of repetitions.
+    @return: the time per call, in microseconds, keyed by candidate name.
+    """
+
+    results = []
+    for name, f in candidates:
+        results.append((name, measure(f, number=number, repetitions=repetitions)))
+
+    baseline = results[0][1]
+    print(title)
+    for name, per_call in results:
+        print('  {:<32} {:>10.2f}us {:>8.2f}x'.format(name, per_call, baseline / per_call))
+    return dict(results)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the parse throughput and peak memory of the data set formats (see
+C{hipflask.data}) on a generated fixture of (roughly) the given size, in MiB:
+
+    $ python -m test.benchmarks.data_benchmarks 2048
+
+Each format is parsed in a process of its own, so that its peak RSS is its own.
+"""
+
+import datetime
+import logging
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# noinspection PyPackageRequirements
+from bson import BSON
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+import simplejson as json
+import yaml
+from hipflask.data import read_yaml, read_json_lines, read_bson
+
+DEFAULT_SIZE_MIB = 64
+
+PARSERS = (('yaml (pure Python)', '.yaml', lambda stream: yaml.load_all(stream, Loader=yaml.SafeLoader)),
+           ('yaml (libyaml)', '.yaml', read_yaml),
+           ('ndjson', '.ndjson', read_json_lines),
+           ('bson', '.bson', read_bson))
+
+
+def example(n):
+    return dict(id=str(ObjectId()),
+                name='Example {}'.format(n),
+                description='An example document, number {}, for the data loading benchmark.'.format(n),
+                tags=['alpha', 'beta', 'gamma'],
+                dimensions=dict(width=n % 100, height=n % 37, depth=1.5),
+                created=datetime.datetime(2014, 1, 1).isoformat())
+
+
+def generate(directory, size_mib):
+    """
+    Write the same documents as YAML, newline-delimited JSON and BSON, until the
+    YAML file reaches C{size_mib}.
+
+    @return: the number of documents written.
+    """
+
+    limit = size_mib * 1024 * 1024
+    paths = dict((suffix, os.path.join(directory, 'fixture' + suffix)) for suffix in ('.yaml', '.ndjson', '.bson'))
+    streams = dict((suffix, open(path, 'wb')) for suffix, path in paths.items())
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    count = 0
+    try:
+        while streams['.yaml'].tell() < limit:
+            document = example(count)
+            streams['.yaml'].write(yaml.dump(document, Dumper=dumper, explicit_start=True))
+            streams['.ndjson'].write(json.dumps(document) + '\n')
+            streams['.bson'].write(BSON.encode(document))
+            count += 1
+    finally:
+        for stream in streams.values():
+            stream.close()
+    return count
+
+
+def parse(name, path):
+    """
+    Parse the fixture at C{path} (in this process) and print the seconds taken
+    and peak RSS in KiB.
+    """
+
+    parser = dict((parser_name, f) for parser_name, _, f in PARSERS)[name]
+    started = time.time()
+    count = 0
+    with open(path, 'rb') as stream:
+        for _ in parser(stream):
+            count += 1
+    seconds = time.time() - started
+    print('{} {} {}'.format(count, seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss))
+
+
+def main(size_mib=DEFAULT_SIZE_MIB):
+    logging.disable(logging.CRITICAL)
+
+    directory = tempfile.mkdtemp(prefix='data_benchmarks')
+    try:
+        count = generate(directory, size_mib)
+        print('Parsing {} documents'.format(count))
+        baseline = None
+        for name, suffix, _ in PARSERS:
+            path = os.path.join(directory, 'fixture' + suffix)
+            output = subprocess.check_output([sys.executable, '-m', 'test.benchmarks.data_benchmarks',
+                                              'parse', name, path])
+            parsed, seconds, peak = output.split()
+            rate = int(parsed) / float(seconds)
+            baseline = baseline or rate
+            print('  {:<20} {:>8.1f}MiB {:>10.0f} docs/s {:>8.2f}x   peak RSS {:>8}KiB'.format(
+                name, os.path.getsize(path) / 1048576.0, rate, rate / baseline, peak))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == 'parse':
+        parse(sys.argv[2], sys.argv[3])
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MIB)
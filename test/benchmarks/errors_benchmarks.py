@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the time and memory taken to collect, then query, the errors of a
+validation with 100k errors: the previous, dict-backed C{CodedError},
+C{FieldError} and C{CodedErrors} against the slotted, bucketed ones.
+
+Memory is the shallow size of every object (and of its C{__dict__}, if any),
+plus that of the error strings.
+"""
+
+import sys
+import time
+
+from hipflask.support import CodedError, FieldError, CodedErrors, safe_string, has_text
+
+COUNT = 100000
+FIELDS = 50
+
+
+class PreviousIdBased(object):
+    # noinspection PyShadowingBuiltins,PyUnusedLocal
+    def __init__(self, id=None, *args, **kwargs):
+        self._id = id
+
+
+class PreviousCodedError(PreviousIdBased):
+    def __init__(self, code, message=None, **kwargs):
+        super(PreviousCodedError, self).__init__(**kwargs)
+
+        self.code = code
+        self.message = safe_string(message)
+
+
+class PreviousFieldError(object):
+    def __init__(self, field_name, error):
+        super(PreviousFieldError, self).__init__()
+
+        assert has_text(field_name), 'The field name is required.'
+        assert error is not None, 'The error is required.'
+
+        self.field_name = safe_string(field_name)
+        self.error = error
+
+
+class PreviousCodedErrors(object):
+    def __init__(self):
+        self.errors = []
+
+    @property
+    def field_errors(self):
+        return filter(lambda error: isinstance(error, PreviousFieldError), self.errors)
+
+    def has_field_errors(self):
+        return len(self.field_errors) > 0
+
+    def add_field_error(self, field_error):
+        assert field_error is not None, 'The field error is required.'
+
+        self.errors.append(field_error)
+        return self
+
+    def field_errors_for(self, field_name):
+        return filter(lambda error: error.field_name == field_name, self.field_errors)
+
+    def has_field_errors_for(self, field_name):
+        return len(self.field_errors_for(field_name)) > 0
+
+
+def validate(coded_error, field_error, coded_errors):
+    errors = coded_errors()
+    for n in xrange(COUNT):
+        field_name = u'field{}'.format(n % FIELDS)
+        errors.add_field_error(field_error(field_name, coded_error(u'invalid', message=u'The value is invalid.')))
+    return errors
+
+
+def query(errors):
+    for n in xrange(FIELDS):
+        errors.has_field_errors_for('field{}'.format(n))
+    errors.has_field_errors()
+
+
+def size_of(errors):
+    seen = set()
+    # the list that each keeps, rather than the (read-only) tuple that CodedErrors hands out
+    stored = getattr(errors, '_errors', None) or errors.errors
+    total = sys.getsizeof(stored)
+    for field_error in stored:
+        for o in (field_error, field_error.error, field_error.field_name, field_error.error.message):
+            if id(o) not in seen:
+                seen.add(id(o))
+                total += sys.getsizeof(o) + (sys.getsizeof(o.__dict__) if hasattr(o, '__dict__') else 0)
+    return total
+
+
+def measure(title, coded_error, field_error, coded_errors):
+    started = time.time()
+    errors = validate(coded_error, field_error, coded_errors)
+    collected = time.time()
+    query(errors)
+    queried = time.time()
+    print('  {:<10} collect {:>8.1f}ms   query {:>8.1f}ms   {:>8.1f}MiB'.format(
+        title, (collected - started) * 1000, (queried - collected) * 1000, size_of(errors) / 1048576.0))
+
+
+def main():
+    print('Validation with {} errors over {} fields'.format(COUNT, FIELDS))
+    measure('previous', PreviousCodedError, PreviousFieldError, PreviousCodedErrors)
+    measure('slotted', CodedError, FieldError, CodedErrors)
+
+
+if __name__ == '__main__':
+    main()
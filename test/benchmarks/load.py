@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Load-test the application that C{create_app} builds, under the pre-forking
+server (see C{hipflask.support.prefork}), with synthetic traffic:
+
+    $ python -m test.benchmarks.load --environment PRODUCTION --workers 4 --clients 8 --duration 20
+
+Each client process replays a traffic profile--a weighted mix of requests,
+varying the C{Accept} header (HTML or JSON) and the size of the payload--for
+the duration. Besides the routes registered by the application, a C{load}
+blueprint serves C{/_load/things?count=N}: N documents read from Mongo, which
+is an in-memory stand-in unless C{--mongo} names a (local) mongod to use.
+
+The report gives the p50/p95/p99 latency and the throughput, per request and
+overall, and the RSS of each worker (read from C{/proc}, so this runs on Linux
+only). A profile is one of C{PROFILES}, or a JSON file of the same shape:
+
+    [{"name": "things.json", "weight": 3, "path": "/_load/things?count=100", "accept": "application/json"}, ...]
+"""
+
+from contextlib import closing
+import datetime
+import httplib
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+import click
+from flask import Blueprint, current_app, request
+from injector import InstanceProvider
+from jinja2 import ChoiceLoader, DictLoader
+from pymongo import MongoClient
+from pymongo.database import Database
+import simplejson as json
+from hipflask import create_app, route, index_views
+from hipflask.support.mongo import MongoPoolMetrics, ObjectIdToStringMapper
+from hipflask.support.prefork import PreforkServer
+from test.benchmarks.standins import StandInDatabase
+
+HTML = 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+JSON = 'application/json, text/plain, */*'
+
+COLLECTION = 'load_things'
+
+TEMPLATES = {'load/things.html': '<ul>{% for thing in things %}<li>{{ thing.id }}: {{ thing.name }} '
+                                 '({{ thing.weight }})</li>{% endfor %}</ul>'}
+
+
+def request_spec(name, weight, path, accept):
+    return dict(name=name, weight=weight, path=path, accept=accept)
+
+
+PROFILES = {
+    # mostly small JSON, as from the single page app, with the odd full page
+    'app': [request_spec('things.json.small', 6, '/_load/things?count=10', JSON),
+            request_spec('things.json.large', 2, '/_load/things?count=500', JSON),
+            request_spec('things.html.small', 1, '/_load/things?count=10', HTML),
+            request_spec('index.html', 1, '/', HTML)],
+    # HTML and JSON in equal measure, over every payload size
+    'mixed': [request_spec('things.{}.{}'.format(kind, count), 1, '/_load/things?count={}'.format(count), accept)
+              for kind, accept in (('html', HTML), ('json', JSON))
+              for count in (1, 50, 1000)],
+}
+
+
+def routes_profile(app):
+    """
+    A profile of every (argument-less) C{GET} route of the supplied application, in HTML and JSON alike.
+    """
+
+    return [request_spec('{}.{}'.format(rule.endpoint, kind), 1, rule.rule, accept)
+            for rule in app.url_map.iter_rules()
+            if 'GET' in rule.methods and not rule.arguments and rule.endpoint != 'static'
+            for kind, accept in (('html', HTML), ('json', JSON))]
+
+
+def load_blueprint():
+    blueprint = Blueprint('load', __name__)
+    to_string = ObjectIdToStringMapper()
+
+    @route(blueprint, '/_load/things', view_name='load/things')
+    def display_things():
+        count = request.args.get('count', 10, type=int)
+        database = current_app.extensions['Injector'].get(Database)
+        things = list(database[COLLECTION].find(limit=count))
+        for identifier, thing in zip(to_string.map_many([t.pop('_id') for t in things]), things):
+            thing['id'] = identifier
+        return dict(things=things)
+
+    return blueprint
+
+
+def things(count, seed=0):
+    rng = random.Random(seed)
+    for n in xrange(count):
+        yield dict(_id=ObjectId('{:024x}'.format(rng.getrandbits(96))),
+                   name='Thing {}'.format(n),
+                   weight=rng.randint(1, 1000),
+                   created=datetime.datetime(2014, 1, 1) + datetime.timedelta(minutes=n),
+                   tags=['alpha', 'beta'])
+
+
+def prepare_app(mongo, documents):
+    """
+    Create the application, with the C{load} blueprint, and Mongo seeded with C{documents} things.
+
+    @param mongo: the URL of a mongod; C{None} for an in-memory stand-in.
+    @return: C{(app, fork_unsafe)}.
+    """
+
+    settings = dict(MONGO_URL=mongo) if mongo is not None else None
+    app = create_app(settings_override=settings)
+    app.register_blueprint(load_blueprint())
+    app.jinja_env.loader = ChoiceLoader([DictLoader(TEMPLATES), app.jinja_env.loader])
+    index_views(app)
+
+    injector = app.extensions['Injector']
+    if mongo is None:
+        injector.binder.bind(Database, to=InstanceProvider(StandInDatabase()))
+        fork_unsafe = ()
+    else:
+        fork_unsafe = (MongoPoolMetrics, MongoClient, Database)
+    collection = injector.get(Database)[COLLECTION]
+    collection.drop()
+    collection.insert(list(things(documents)))
+    return app, fork_unsafe
+
+
+def free_port():
+    with closing(socket.socket(socket.AF_INET, socket.SOCK_STREAM)) as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def start_server(app, port, workers, threaded, fork_unsafe, timeout=30):
+    """
+    Fork a C{PreforkServer} master, and wait for it to accept connections.
+
+    @return: the pid of the master.
+    """
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            PreforkServer(app, host='127.0.0.1', port=port, workers=workers, threaded=threaded,
+                          fork_unsafe=fork_unsafe).serve()
+        finally:
+            os._exit(0)
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return pid
+        except socket.error:
+            time.sleep(0.05)
+    stop_server(pid)
+    raise click.ClickException('The server did not start within {}s.'.format(timeout))
+
+
+def stop_server(pid):
+    os.kill(pid, signal.SIGTERM)
+    os.waitpid(pid, 0)
+
+
+def worker_memory(master_pid):
+    """
+    Read the memory of each worker of the supplied master.
+
+    @return: C{(pid, rss, peak_rss)} in KiB, for each worker.
+    """
+
+    workers = []
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open('/proc/{}/status'.format(name)) as stream:
+                status = dict(line.split(':', 1) for line in stream if ':' in line)
+        except IOError:
+            continue
+        if int(status.get('PPid', '0')) == master_pid:
+            workers.append((int(name), int(status['VmRSS'].split()[0]), int(status['VmHWM'].split()[0])))
+    return sorted(workers)
+
+
+def run_client(arguments):
+    """
+    Replay the profile against the server until the deadline.
+
+    @return: C{(name, seconds, status)} for each request.
+    """
+
+    port, profile, deadline, seed = arguments
+    rng = random.Random(seed)
+    weights = [spec['weight'] for spec in profile]
+    total = float(sum(weights))
+    outcomes = []
+    while time.time() < deadline:
+        point = rng.random() * total
+        for spec, weight in zip(profile, weights):
+            point -= weight
+            if point < 0:
+                break
+        started = time.time()
+        try:
+            connection = httplib.HTTPConnection('127.0.0.1', port, timeout=30)
+            connection.request('GET', spec['path'], headers={'Accept': spec['accept']})
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+            connection.close()
+        except (socket.error, httplib.HTTPException):
+            status = 0
+        outcomes.append((spec['name'], time.time() - started, status))
+    return outcomes
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarise(outcomes, seconds):
+    """
+    Summarise the supplied C{(name, seconds, status)} outcomes, per request name and overall.
+
+    @return: the summaries, keyed by request name (and C{all}); latencies in milliseconds.
+    """
+
+    by_name = {'all': outcomes}
+    for outcome in outcomes:
+        by_name.setdefault(outcome[0], []).append(outcome)
+
+    summaries = {}
+    for name, named in by_name.iteritems():
+        latencies = sorted(latency * 1000 for _, latency, _ in named)
+        summaries[name] = dict(requests=len(named),
+                               errors=sum(1 for _, _, status in named if not 200 <= status < 400),
+                               throughput=len(named) / seconds,
+                               p50=percentile(latencies, 0.5),
+                               p95=percentile(latencies, 0.95),
+                               p99=percentile(latencies, 0.99))
+    return summaries
+
+
+def report(summaries, memory):
+    print('  {:<32} {:>9} {:>7} {:>10} {:>9} {:>9} {:>9}'.format(
+        'request', 'requests', 'errors', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms'))
+    for name in sorted(summaries, key=lambda n: (n == 'all', n)):
+        s = summaries[name]
+        print('  {:<32} {:>9} {:>7} {:>10.1f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+            name, s['requests'], s['errors'], s['throughput'], s['p50'], s['p95'], s['p99']))
+    for pid, rss, peak in memory:
+        print('  worker [{}] RSS {:>8}KiB (peak {}KiB)'.format(pid, rss, peak))
+
+
+def read_profile(profile, app):
+    if profile in PROFILES:
+        return PROFILES[profile]
+    if profile == 'routes':
+        return routes_profile(app)
+    with open(profile, 'r') as stream:
+        return json.load(stream)
+
+
+@click.command()
+@click.option('--environment', default='PRODUCTION', help='The settings profile; forex, PRODUCTION.')
+@click.option('--workers', default=4, help='The number of server worker processes.')
+@click.option('--threaded', is_flag=True, help='Serve each request in a separate thread of the worker.')
+@click.option('--clients', default=8, help='The number of client processes, each with one request in flight.')
+@click.option('--duration', default=10, help='How long to load the server for, in seconds.')
+@click.option('--profile', default='app', help='The traffic profile: app, mixed, routes, or a JSON file.')
+@click.option('--mongo', default=None, help='The URL of the mongod to use; an in-memory stand-in by default.')
+@click.option('--documents', default=1000, help='The number of documents to seed Mongo with.')
+@click.option('--output', default=None, help='Write the report (as JSON) to this file.')
+def main(environment, workers, threaded, clients, duration, profile, mongo, documents, output):
+    """
+    Load-test the application under the pre-forking server.
+    """
+
+    logging.disable(logging.CRITICAL)
+    # read by flask-environments, in create_app
+    os.environ['FLASK_ENV'] = environment
+
+    app, fork_unsafe = prepare_app(mongo, documents)
+    traffic = read_profile(profile, app)
+    port = free_port()
+    master = start_server(app, port, workers, threaded, fork_unsafe)
+    try:
+        started = time.time()
+        deadline = started + duration
+        pool = multiprocessing.Pool(clients)
+        try:
+            outcomes = [outcome for outcomes in pool.map(run_client, [(port, traffic, deadline, seed)
+                                                                      for seed in range(clients)])
+                        for outcome in outcomes]
+        finally:
+            pool.close()
+            pool.join()
+        seconds = time.time() - started
+        memory = worker_memory(master)
+    finally:
+        stop_server(master)
+
+    summaries = summarise(outcomes, seconds)
+    print('[{}] with [{}] workers{}, [{}] clients, for {:.1f}s; profile [{}], Mongo [{}]'.format(
+        environment, workers, ' (threaded)' if threaded else '', clients, seconds, profile, mongo or 'stand-in'))
+    report(summaries, memory)
+    if output is not None:
+        with open(output, 'w') as stream:
+            json.dump(dict(environment=environment, workers=workers, threaded=threaded, clients=clients,
+                           seconds=seconds, profile=traffic, mongo=mongo, summaries=summaries,
+                           workers_memory=[dict(pid=pid, rss=rss, peak_rss=peak) for pid, rss, peak in memory]),
+                      stream, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Compare mapping batches of IDs one at a time against C{map_many}, and munging
+the IDs of documents one at a time against C{munge_ids}.
+"""
+
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+from hipflask.support.mongo import ToObjectIdMapper, ObjectIdToStringMapper, munge_id, munge_ids
+from test.benchmarks import compare
+
+COUNT = 10000
+
+
+def previous_munge_id(document):
+    # as it was: a fresh mapper for every document
+    munge_id(document, ToObjectIdMapper())
+
+
+def main():
+    oids = [ObjectId() for _ in xrange(COUNT)]
+    strings = [unicode(oid) for oid in oids]
+    to_object_id = ToObjectIdMapper()
+    to_string = ObjectIdToStringMapper()
+
+    compare('Mapping {} strings to ObjectIds'.format(COUNT),
+            (('map, per item', lambda: [to_object_id(s) for s in strings]),
+             ('map_many', lambda: to_object_id.map_many(strings))),
+            number=20)
+    compare('Mapping {} ObjectIds to strings'.format(COUNT),
+            (('map, per item', lambda: [to_string(oid) for oid in oids]),
+             ('map_many', lambda: to_string.map_many(oids))),
+            number=20)
+    compare('Mapping {} strings to (validated) strings'.format(COUNT),
+            (('map, per item', lambda: [to_string(s) for s in strings]),
+             ('map_many', lambda: to_string.map_many(strings))),
+            number=20)
+
+    def documents():
+        return [dict(id=s, name='foo') for s in strings]
+
+    def munge_each():
+        for document in documents():
+            previous_munge_id(document)
+
+    compare('Munging the IDs of {} documents'.format(COUNT),
+            (('munge_id, per document', munge_each),
+             ('munge_ids', lambda: munge_ids(documents()))),
+            number=20)
+
+
+if __name__ == '__main__':
+    main()
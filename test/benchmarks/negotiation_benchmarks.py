@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+Compare C{Accept} header negotiation with and without the negotiation cache.
+"""
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from hipflask.support.web.responsifiers import ContentNegotiatingResponsifier
+from test.benchmarks import compare
+
+ACCEPT_HEADERS = ('application/json, text/plain, */*',
+                  'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                  'application/json')
+
+
+def uncached(responsifiers):
+    json_content_type = ContentNegotiatingResponsifier.JSON_CONTENT_TYPE
+    html_content_type = ContentNegotiatingResponsifier.HTML_CONTENT_TYPE
+
+    def negotiate():
+        for accept_header in ACCEPT_HEADERS:
+            best_type = parse_accept_header(accept_header, cls=MIMEAccept).best
+            if best_type in html_content_type:
+                responsifiers['html']
+            elif best_type in json_content_type:
+                responsifiers['json']
+            elif best_type == 'text/plain':
+                responsifiers['json']
+
+    return negotiate
+
+
+def cached(responsifiers):
+    responsifier = ContentNegotiatingResponsifier(responsifiers)
+
+    def negotiate():
+        for accept_header in ACCEPT_HEADERS:
+            responsifier.negotiate(accept_header)
+
+    return negotiate
+
+
+def main():
+    responsifiers = dict(html=object(), json=object())
+    compare('Negotiating {} Accept headers'.format(len(ACCEPT_HEADERS)),
+            (('parse and walk (previous)', uncached(responsifiers)),
+             ('negotiation cache', cached(responsifiers))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Compare worker startup latency and memory: a C{create_app} per process versus
+workers forked from a warmed master (see C{hipflask.support.prefork}).
+
+Memory is read from C{/proc}, so this runs on Linux only. PSS (proportional
+set size) shares the pages common to several processes between them, which
+shows what copy-on-write saves; RSS counts them in full for every process.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import time
+
+from hipflask import create_app
+from hipflask.support.prefork import warm
+
+WORKERS = 4
+
+PER_PROCESS = '''
+import logging, time
+started = time.time()
+logging.disable(logging.CRITICAL)
+from hipflask import create_app
+from hipflask.support.prefork import warm
+from test.benchmarks.prefork_benchmarks import memory_usage
+warm(create_app())
+print('{} {} {}'.format(time.time() - started, *memory_usage()))
+'''
+
+
+def memory_usage():
+    """
+    Measure the memory used by the current process.
+
+    @return: C{(rss, pss)} in KiB.
+    """
+
+    rss = pss = 0
+    with open('/proc/self/smaps') as smaps:
+        for line in smaps:
+            if line.startswith('Rss:'):
+                rss += int(line.split()[1])
+            elif line.startswith('Pss:'):
+                pss += int(line.split()[1])
+    return rss, pss
+
+
+def per_process():
+    results = []
+    for _ in range(WORKERS):
+        output = subprocess.check_output([sys.executable, '-c', PER_PROCESS])
+        seconds, rss, pss = output.split()
+        results.append((float(seconds), int(rss), int(pss)))
+    return results
+
+
+def forked():
+    started = time.time()
+    app = warm(create_app())
+    master_seconds = time.time() - started
+
+    pids = []
+    readers = []
+    for _ in range(WORKERS):
+        reader, writer = os.pipe()
+        forked_at = time.time()
+        pid = os.fork()
+        if pid == 0:
+            os.close(reader)
+            warm(app)
+            seconds = time.time() - forked_at
+            rss, pss = memory_usage()
+            # hold on until every worker has measured, so that pages stay shared
+            os.write(writer, '{} {} {}\n'.format(seconds, rss, pss))
+            time.sleep(1)
+            os._exit(0)
+        os.close(writer)
+        pids.append(pid)
+        readers.append(reader)
+
+    results = []
+    for reader in readers:
+        seconds, rss, pss = os.read(reader, 128).split()
+        results.append((float(seconds), int(rss), int(pss)))
+        os.close(reader)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    return master_seconds, results
+
+
+def report(title, results):
+    count = float(len(results))
+    print('{:<28} startup {:>8.1f}ms   RSS {:>8.0f}KiB   PSS {:>8.0f}KiB'.format(
+        title,
+        sum(r[0] for r in results) / count * 1000,
+        sum(r[1] for r in results) / count,
+        sum(r[2] for r in results) / count))
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+
+    print('Mean per worker, over {} workers'.format(WORKERS))
+    report('create_app per process', per_process())
+    master_seconds, results = forked()
+    report('forked from warmed master', results)
+    print('(the master took {:.1f}ms to create and warm the app, once)'.format(master_seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
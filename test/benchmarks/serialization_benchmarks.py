@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the throughput of the JSON serializer backends on Mongo-like documents.
+"""
+
+import datetime
+
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+from hipflask.support.mongo import MongoJsonEncoder
+from hipflask.support.serializers import SimpleJsonSerializer, FastJsonSerializer
+from test.benchmarks import compare
+
+
+def documents(count):
+    now = datetime.datetime(2014, 7, 1, 12, 30, 5)
+    return [dict(_id=ObjectId(),
+                 name=u'Document {}'.format(n),
+                 created=now,
+                 born=now.date(),
+                 tags=['foo', 'bar'],
+                 owner=dict(_id=ObjectId(), score=1.5),
+                 count=n) for n in xrange(count)]
+
+
+def main():
+    model = dict(documents=documents(1000))
+    mongo_json_encoder = MongoJsonEncoder()
+    simple = SimpleJsonSerializer()
+    fast = FastJsonSerializer()
+
+    compare('Serializing 1000 documents',
+            (('MongoJsonEncoder (previous)', lambda: mongo_json_encoder.encode(model)),
+             ('SimpleJsonSerializer', lambda: simple.dumps(model)),
+             ('FastJsonSerializer', lambda: fast.dumps(model))),
+            number=20)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory stand-ins for pymongo, so that benchmarks need no mongod.
+"""
+
+
+class StandInCollection(object):
+    """
+    Stands in for a pymongo C{Collection}: finds copies of documents held in memory.
+    """
+
+    def find(self, spec=None, limit=0):
+        documents = self.documents[:limit] if limit else self.documents
+        return (dict(document) for document in documents)
+
+    def find_one(self, spec=None):
+        return dict(self.documents[0]) if self.documents else None
+
+    def insert(self, documents):
+        self.documents.extend(dict(document) for document in documents)
+
+    def drop(self):
+        del self.documents[:]
+
+    def __init__(self, documents=()):
+        super(StandInCollection, self).__init__()
+
+        self.documents = list(documents)
+
+
+class StandInDatabase(object):
+    """
+    Stands in for a pymongo C{Database}: a collection (created on first use) per name.
+    """
+
+    def __getitem__(self, name):
+        collection = self.collections.get(name, None)
+        if collection is None:
+            collection = self.collections[name] = StandInCollection()
+        return collection
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __init__(self):
+        super(StandInDatabase, self).__init__()
+
+        self.collections = {}
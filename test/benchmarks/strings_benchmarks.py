@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the throughput of converting the keys of API payloads: the previous,
+recursive C{convert_keys} against the iterative one, copying and in place.
+"""
+
+import copy
+import re
+
+from hipflask.support.strings import convert_keys, camelcase_to_underscore
+from test.benchmarks import compare
+
+camelcase_pattern = re.compile(r'([A-Z])')
+
+
+def previous_camelcase_to_underscore(name):
+    return camelcase_pattern.sub(lambda x: '_' + x.group(1).lower(), name)
+
+
+def previous_convert_keys(d, convert, skip_conversion=None):
+    if skip_conversion is None:
+        skip_conversion = lambda key: False
+
+    def convert_keys_(av):
+        if isinstance(av, dict):
+            return previous_convert_keys(av, convert, skip_conversion=skip_conversion)
+        else:
+            return av
+
+    sink = {}
+    for k, v in d.iteritems():
+        the_key = k
+        if not skip_conversion(k):
+            the_key = convert(k)
+        if isinstance(v, dict):
+            sink[the_key] = previous_convert_keys(v, convert, skip_conversion=skip_conversion)
+        elif isinstance(v, (list, tuple)):
+            sink[the_key] = map(convert_keys_, v)
+        else:
+            sink[the_key] = v
+    return sink
+
+
+def documents(count):
+    return [{'orderId': n,
+             'customerName': 'Customer {}'.format(n),
+             'shippingAddress': {'streetName': 'High Street', 'postCode': 'E1', 'countryCode': 'GB'},
+             'lineItems': [{'productId': i, 'unitPrice': 9.99, 'quantityOrdered': 2} for i in range(5)],
+             'isGift': False} for n in xrange(count)]
+
+
+def main():
+    payload = dict(orderHistory=documents(100))
+    copies = [copy.deepcopy(payload) for _ in range(200)]
+
+    compare('Converting the keys of 100 orders',
+            (('recursive (previous)', lambda: previous_convert_keys(payload, previous_camelcase_to_underscore)),
+             ('iterative, memoized', lambda: convert_keys(payload, camelcase_to_underscore)),
+             ('iterative, in place', lambda: convert_keys(copies.pop(), camelcase_to_underscore, in_place=True))),
+            number=50)
+
+
+if __name__ == '__main__':
+    main()
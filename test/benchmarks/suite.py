@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+"""
+The benchmark suite: time the request path (routing to a handler over a Mongo
+stand-in, and responding in HTML and JSON) and the support layers beneath it,
+write the results as JSON, and compare them against a stored baseline.
+
+Run it from the project root:
+
+    $ python -m test.benchmarks.suite --output results.json
+    $ python -m test.benchmarks.suite --baseline test/benchmarks/baseline.json
+
+A benchmark regresses when it is slower than its baseline by more than its
+threshold (C{--threshold}, unless overridden in C{THRESHOLDS}); the suite then
+exits with a status of C{1}. The baseline only means anything on the machine
+that recorded it, so record a fresh one (C{--save-baseline}) after changing
+machines. The data is generated from a fixed seed, and each benchmark reports
+the best of its repetitions, after a collection.
+"""
+
+import datetime
+import gc
+import logging
+import os
+import platform
+import random
+import sys
+import time
+
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+import click
+from flask import Flask, Blueprint
+from jinja2 import DictLoader
+import simplejson as json
+from hipflask import route, initialise_web, ViewResponse
+from hipflask.support import CodedError, CodedErrors, FieldError
+from hipflask.support.mongo import MongoJsonEncoder, ToObjectIdMapper, ObjectIdToStringMapper
+from hipflask.support.strings import camelcase_to_underscore, convert_keys
+from hipflask.support.web import deconstruct, respond
+from hipflask.support.web.responsifiers import ContentNegotiatingResponsifier
+from test.benchmarks import measure
+from test.benchmarks.standins import StandInCollection
+
+RESULTS_VERSION = 1
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# the proportion by which a benchmark may be slower than its baseline
+DEFAULT_THRESHOLD = 0.25
+
+# the noisier benchmarks, which are given more leeway
+THRESHOLDS = {'route.html': 0.35,
+              'route.json': 0.35,
+              'route.json.view_name': 0.35,
+              'factory.create_app': 0.5}
+
+HTML = {'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'}
+JSON = {'Accept': 'application/json, text/plain, */*'}
+
+ACCEPT_HEADERS = (HTML['Accept'], JSON['Accept'], 'application/json', 'text/plain', '*/*')
+
+TEMPLATES = {'things.html': '<ul>{% for thing in things %}<li>{{ thing.id }}: {{ thing.name }}</li>{% endfor %}</ul>'}
+
+
+def object_id(rng):
+    return ObjectId('{:024x}'.format(rng.getrandbits(96)))
+
+
+def thing(rng, n):
+    return dict(_id=object_id(rng), name='Thing {}'.format(n), weight=rng.randint(1, 1000),
+                created=datetime.datetime(2014, 1, 1) + datetime.timedelta(minutes=n),
+                tags=['alpha', 'beta'], dimensions=dict(width=rng.random(), height=rng.random()))
+
+
+def camelcase_document(rng, n):
+    return dict(documentId=str(n), displayName='Thing {}'.format(n),
+                shippingAddress=dict(postCode='AB1 2CD', streetName='High Street', houseNumber=n),
+                lineItems=[dict(productId=str(i), unitPrice=rng.random(), quantityOrdered=i) for i in range(5)])
+
+
+def routed_app(collection):
+    app = Flask(__name__)
+    app.jinja_loader = DictLoader(TEMPLATES)
+    blueprint = Blueprint('suite', __name__)
+    to_string = ObjectIdToStringMapper()
+
+    @route(blueprint, '/things')
+    def display_things():
+        return 'things', find_things()
+
+    @route(blueprint, '/things/viewed', view_name='things')
+    def display_viewed_things():
+        return find_things()
+
+    def find_things():
+        things = list(collection.find(limit=20))
+        for identifier, document in zip(to_string.map_many([t.pop('_id') for t in things]), things):
+            document['id'] = identifier
+        return dict(things=things)
+
+    app.register_blueprint(blueprint)
+    initialise_web(app)
+    return app
+
+
+def benchmarks():
+    """
+    Set up every benchmark.
+
+    @return: C{(name, function, number)} triples, in order.
+    """
+
+    rng = random.Random(0)
+    collection = StandInCollection(thing(rng, n) for n in range(100))
+    app = routed_app(collection)
+    client = app.test_client()
+
+    model = dict(things=[dict(document, id=str(document['_id'])) for document in collection.find(limit=20)])
+    for document in model['things']:
+        del document['_id']
+
+    def respond_with(headers, response_data=('things', model)):
+        def f():
+            with app.test_request_context('/things', headers=headers):
+                respond(response_data)
+        return f
+
+    # a model of many (unused) keys, besides the things
+    large_model = dict(model, **dict(('key_{}'.format(n), n) for n in range(1000)))
+
+    viewed, viewed_with_status, viewed_with_model = \
+        ViewResponse('things'), ViewResponse('things', model, 200), ViewResponse('things', model)
+
+    negotiator = ContentNegotiatingResponsifier(dict(html=object(), json=object()))
+
+    def negotiate():
+        for accept_header in ACCEPT_HEADERS:
+            negotiator.negotiate(accept_header)
+
+    camelcase_documents = [camelcase_document(rng, n) for n in range(20)]
+    documents = list(collection.find())
+    oids = [object_id(rng) for _ in range(1000)]
+    hex_strings = [str(oid) for oid in oids]
+    to_object_id = ToObjectIdMapper()
+    to_string = ObjectIdToStringMapper()
+
+    def coded_errors():
+        errors = CodedErrors()
+        for n in range(50):
+            errors.add_field_error(FieldError('field{}'.format(n % 10), CodedError(n, message='Error {}.'.format(n))))
+            errors.add_global_error(CodedError(n, message='Global error {}.'.format(n)))
+        errors.has_field_errors_for('field3')
+        errors.field_errors
+        errors.global_errors
+
+    def create_app():
+        from hipflask import create_app as create
+        create()
+
+    return (('route.html', lambda: client.get('/things', headers=HTML), 500),
+            ('route.json', lambda: client.get('/things', headers=JSON), 500),
+            ('route.json.view_name', lambda: client.get('/things/viewed', headers=JSON), 500),
+            ('respond.html', respond_with(HTML), 1000),
+            ('respond.json', respond_with(JSON), 1000),
+            ('respond.json.view_response', respond_with(JSON, ViewResponse('things', model)), 1000),
+            ('respond.html.large_model', respond_with(HTML, ('things', large_model)), 1000),
+            ('deconstruct', lambda: (deconstruct('things'), deconstruct(('things', model, 200)),
+                                     deconstruct(dict(view_name='things', model=model))), 100000),
+            # the same three, already deconstructed
+            ('deconstruct.view_response', lambda: (deconstruct(viewed), deconstruct(viewed_with_status),
+                                                   deconstruct(viewed_with_model)), 100000),
+            ('negotiation', negotiate, 100000),
+            ('convert_keys', lambda: [convert_keys(d, camelcase_to_underscore) for d in camelcase_documents], 1000),
+            ('mongo_json_encoder', lambda: json.dumps(documents, cls=MongoJsonEncoder), 200),
+            ('object_ids.to_object_id', lambda: to_object_id.map_many(hex_strings), 200),
+            ('object_ids.to_string', lambda: to_string.map_many(oids), 200),
+            ('coded_errors', coded_errors, 2000),
+            ('factory.create_app', create_app, 5))
+
+
+def run(selected=None, repetitions=5):
+    """
+    Run the (selected) benchmarks.
+
+    @param selected: the names of (or prefixes of the names of) the benchmarks to run; C{None} for all.
+    @param repetitions: the number of repetitions of each; the best is reported.
+    @return: the results, in microseconds per call, keyed by benchmark name; never C{None}.
+    """
+
+    results = {}
+    for name, f, number in benchmarks():
+        if selected and not any(name == prefix or name.startswith(prefix + '.') for prefix in selected):
+            continue
+        f()
+        gc.collect()
+        results[name] = measure(f, number=number, repetitions=repetitions)
+    return results
+
+
+def as_document(results):
+    return dict(version=RESULTS_VERSION,
+                recorded=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                python=platform.python_version(),
+                platform=platform.platform(),
+                results=results)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the supplied results against the supplied baseline.
+
+    @param results: microseconds per call, keyed by benchmark name.
+    @param baseline: likewise; can be empty.
+    @param threshold: the proportion by which a benchmark may be slower than its baseline, unless in C{THRESHOLDS}.
+    @return: C{(name, result, baseline, ratio, regressed)} for each result; the baseline (and ratio) C{None} if there
+        isn't one.
+    """
+
+    comparisons = []
+    for name in sorted(results):
+        result, expected = results[name], baseline.get(name, None)
+        if expected is None:
+            comparisons.append((name, result, None, None, False))
+            continue
+        ratio = result / expected
+        comparisons.append((name, result, expected, ratio, ratio > 1 + THRESHOLDS.get(name, threshold)))
+    return comparisons
+
+
+def report(comparisons):
+    for name, result, expected, ratio, regressed in comparisons:
+        if expected is None:
+            print('  {:<28} {:>12.2f}us {:>12} {:>8}'.format(name, result, '-', 'new'))
+        else:
+            print('  {:<28} {:>12.2f}us {:>10.2f}us {:>7.2f}x{}'.format(
+                name, result, expected, ratio, '  REGRESSED' if regressed else ''))
+
+
+def read_results(path):
+    with open(path, 'r') as stream:
+        document = json.load(stream)
+    if document.get('version', None) != RESULTS_VERSION:
+        raise click.ClickException('Cannot read results [{}] of version [{}].'.format(path, document.get('version')))
+    return document['results']
+
+
+def write_results(path, results):
+    with open(path, 'w') as stream:
+        json.dump(as_document(results), stream, indent=2, sort_keys=True)
+        stream.write('\n')
+
+
+@click.command()
+@click.option('--output', default=None, help='Write the results (as JSON) to this file.')
+@click.option('--baseline', default=DEFAULT_BASELINE, help='Compare the results against those in this file.')
+@click.option('--threshold', default=DEFAULT_THRESHOLD, help='The proportion by which a benchmark may regress.')
+@click.option('--repetitions', default=5, help='The repetitions of each benchmark; the best is reported.')
+@click.option('--save-baseline', is_flag=True, help='Record the results as the baseline, rather than compare.')
+@click.argument('selected', nargs=-1)
+def main(output, baseline, threshold, repetitions, save_baseline, selected):
+    """
+    Run the benchmark suite, or those benchmarks named (or prefixed) by SELECTED.
+    """
+
+    logging.disable(logging.CRITICAL)
+
+    results = run(selected, repetitions=repetitions)
+    if output is not None:
+        write_results(output, results)
+    if save_baseline:
+        write_results(baseline, results)
+        print('Recorded the baseline [{}].'.format(baseline))
+        return
+
+    expected = read_results(baseline) if os.path.exists(baseline) else {}
+    comparisons = compare(results, expected, threshold=threshold)
+    print('Benchmarks (against [{}])'.format(baseline))
+    report(comparisons)
+    regressions = [name for name, _, _, _, regressed in comparisons if regressed]
+    if regressions:
+        print('Regressed: {}.'.format(', '.join(regressions)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Compare translating the keys of wide and of deeply nested documents with a
+compiled translator against the generic C{convert_keys}.
+"""
+
+from hipflask.support.strings import convert_keys, camelcase_to_underscore
+from hipflask.support.translators import compile_translator, shape_of
+from test.benchmarks import compare
+
+
+def wide(width):
+    return dict(('fieldNumber{}'.format(n), n) for n in range(width))
+
+
+def deep(depth):
+    document = leaf = {}
+    for n in range(depth):
+        leaf['someValue'] = n
+        leaf['otherValues'] = [{'itemValue': n}, {'itemValue': n + 1}]
+        leaf['childNode'] = {}
+        leaf = leaf['childNode']
+    return document
+
+
+def main():
+    for title, document in (('Translating a wide document (200 keys)', wide(200)),
+                            ('Translating a deeply nested document (depth 50)', deep(50))):
+        translator = compile_translator(shape_of(document), camelcase_to_underscore)
+        compare(title,
+                (('convert_keys', lambda: convert_keys(document, camelcase_to_underscore)),
+                 ('compiled translator', lambda: translator(document))),
+                number=2000)
+
+
+if __name__ == '__main__':
+    main()
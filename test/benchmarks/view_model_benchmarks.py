@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Compare rendering a template with a merged (copied) view model, as before,
+with rendering it through a C{LayeredMapping} over the model, on large models.
+
+The memory reported is the size of the dicts that each way allocates (and
+throws away) per render, before any rendering proper.
+"""
+
+import sys
+
+from flask import Flask
+from jinja2 import DictLoader
+from hipflask.support.collections import copy_and_update
+from hipflask.support.web.resolvers import IndexedViewResolver
+from hipflask.support.web.responsifiers import TemplatedResponsifier, template_context
+from test.benchmarks import compare
+
+TEMPLATES = {'large.html': '{{ title }}: {{ key_0 }} .. {{ key_99 }}'}
+
+SIZES = (100, 1000, 10000)
+
+
+def large_model(size):
+    return dict(('key_{}'.format(n), n) for n in xrange(size))
+
+
+def copied(app, template, model):
+    def render():
+        # the previous way: copy_and_update, then Flask.update_template_context, then Template.render
+        view_model = copy_and_update(model, title='Large', view_name='large')
+        app.update_template_context(view_model)
+        template.render(view_model)
+
+    return render
+
+
+def layered(responsifier, model):
+    def render():
+        view_model = responsifier.view_model(model, title='Large', view_name='large')
+        responsifier.render('large', responsifier.template_for('large'), view_model)
+
+    return render
+
+
+def copied_bytes(app, model):
+    view_model = copy_and_update(model, title='Large', view_name='large')
+    # update_template_context copies the model once, and Template.render twice (into a dict, then with the globals)
+    merged = dict(view_model, **template_context(app))
+    return sys.getsizeof(view_model) * 2 + sys.getsizeof(merged) + sys.getsizeof(dict(app.jinja_env.globals, **merged))
+
+
+def layered_bytes(app, responsifier, model):
+    view_model = responsifier.view_model(model, title='Large', view_name='large')
+    return sys.getsizeof(view_model) + sys.getsizeof(view_model.maps[0]) + sys.getsizeof(template_context(app))
+
+
+def main():
+    app = Flask(__name__)
+    app.jinja_loader = DictLoader(TEMPLATES)
+    responsifier = TemplatedResponsifier(IndexedViewResolver().index(app.jinja_env))
+    template = app.jinja_env.get_template('large.html')
+
+    with app.test_request_context():
+        for size in SIZES:
+            model = large_model(size)
+            compare('Rendering a model of {} keys'.format(size),
+                    (('copied (previous)', copied(app, template, model)),
+                     ('layered', layered(responsifier, model))),
+                    number=max(10, 100000 // size))
+            print('  {:<32} {:>10}B'.format('copied (previous), allocated', copied_bytes(app, model)))
+            print('  {:<32} {:>10}B'.format('layered, allocated', layered_bytes(app, responsifier, model)))
+
+
+if __name__ == '__main__':
+    main()
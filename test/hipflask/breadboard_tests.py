@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from hamcrest import *
+from hipflask.breadboard import mongo_pool_options
+
+
+class MongoPoolOptionsTests(unittest.TestCase):
+    def test_maps_settings_to_options(self):
+        config = dict(MONGO_MAX_POOL_SIZE=10, MONGO_WAIT_QUEUE_TIMEOUT_MS=1000, MONGO_READ_PREFERENCE='nearest')
+        options = mongo_pool_options(config)
+
+        assert_that(options, is_(dict(max_pool_size=10, waitQueueTimeoutMS=1000, read_preference='nearest')))
+
+    def test_skips_unset_settings(self):
+        options = mongo_pool_options(dict(MONGO_SOCKET_TIMEOUT_MS=None))
+        assert_that(options, is_({}))
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+from io import BytesIO
+import unittest
+
+# noinspection PyPackageRequirements
+from bson import BSON
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+from hamcrest import *
+from pymongo.errors import BulkWriteError
+from yaml.constructor import ConstructorError
+from hipflask.data import BulkLoader, GoldenDataSet, DataSetMixin, ExampleDataSet, batches, read_yaml, \
+    read_json_lines, read_bson
+
+OBJECT_ID_STRING = '52b06645a337b7276fee4a8f'
+
+
+class StubBulkOperation(object):
+    def __init__(self, collection):
+        self.collection = collection
+        self.documents = []
+
+    def insert(self, document):
+        self.documents.append(document)
+
+    def execute(self):
+        self.collection.batches.append(self.documents)
+        duplicates = [document for document in self.documents if document.get('duplicate', False)]
+        inserted = len(self.documents) - len(duplicates)
+        if duplicates:
+            raise BulkWriteError(dict(nInserted=inserted,
+                                      writeErrors=[dict(errmsg='duplicate key') for _ in duplicates]))
+        return dict(nInserted=inserted, writeErrors=[])
+
+
+class StubCollection(object):
+    def __init__(self, name):
+        self.name = name
+        self.batches = []
+
+    def initialize_unordered_bulk_op(self):
+        return StubBulkOperation(self)
+
+
+class StubDatabase(dict):
+    def __missing__(self, name):
+        collection = self[name] = StubCollection(name)
+        return collection
+
+
+class StubDataSet(DataSetMixin):
+    def __init__(self, collection_name, documents):
+        super(StubDataSet, self).__init__()
+
+        self.collection_name = collection_name
+        self._documents = documents
+
+    def documents(self):
+        return iter(self._documents)
+
+
+class StubDatabaseDropper(object):
+    dropped = False
+
+    def drop(self):
+        self.dropped = True
+
+
+class ReaderTests(unittest.TestCase):
+    def test_read_yaml(self):
+        documents = read_yaml(BytesIO(b'name: one\n---\nname: two\n'))
+        assert_that(list(documents), is_([dict(name='one'), dict(name='two')]))
+
+    def test_read_yaml_safely_refuses_python_objects(self):
+        documents = read_yaml(BytesIO(b'!!python/object/apply:os.getcwd []\n'))
+        self.assertRaises(ConstructorError, list, documents)
+
+    def test_read_json_lines(self):
+        stream = BytesIO(b'{"name": "one"}\n\n{"_id": {"$oid": "%s"}}\n' % OBJECT_ID_STRING.encode())
+        documents = list(read_json_lines(stream))
+        assert_that(documents, is_([dict(name='one'), dict(_id=ObjectId(OBJECT_ID_STRING))]))
+
+    def test_read_bson(self):
+        stream = BytesIO(BSON.encode(dict(name='one')) + BSON.encode(dict(name='two')))
+        assert_that(list(read_bson(stream)), is_([dict(name='one'), dict(name='two')]))
+
+    def test_read_bson_truncated(self):
+        stream = BytesIO(BSON.encode(dict(name='one'))[:-2])
+        self.assertRaises(ValueError, list, read_bson(stream))
+
+    def test_data_file_picks_an_existing_format(self):
+        data_set = ExampleDataSet()
+        assert_that(data_set._data_file('example'), is_('hipflask/data/development/example.yaml'))
+
+    def test_data_file_defaults_to_yaml(self):
+        data_set = ExampleDataSet()
+        assert_that(data_set._data_file('missing'), is_('hipflask/data/development/missing.yaml'))
+
+
+class BatchesTests(unittest.TestCase):
+    def test_groups_items(self):
+        assert_that(list(batches(range(5), 2)), is_([[0, 1], [2, 3], [4]]))
+
+    def test_nothing_to_group(self):
+        assert_that(list(batches([], 2)), is_([]))
+
+
+class BulkLoaderTests(unittest.TestCase):
+    def setUp(self):
+        super(BulkLoaderTests, self).setUp()
+        self.db = StubDatabase()
+        self.loader = BulkLoader(self.db, batch_size=2, workers=2)
+
+    def test_load_inserts_in_batches(self):
+        report = self.loader.load('examples', (dict(n=n) for n in range(5)))
+
+        assert_that([len(batch) for batch in self.db['examples'].batches], is_([2, 2, 1]))
+        assert_that(report.collection_name, is_('examples'))
+        assert_that(report.inserted, is_(5))
+        assert_that(report.failed, is_(0))
+
+    def test_load_munges_ids(self):
+        self.loader.load('examples', [dict(id=OBJECT_ID_STRING)])
+
+        document = self.db['examples'].batches[0][0]
+        assert_that(document, is_(dict(_id=ObjectId(OBJECT_ID_STRING))))
+
+    def test_load_counts_failures(self):
+        report = self.loader.load('examples', [dict(n=1), dict(n=2, duplicate=True), dict(n=3)])
+
+        assert_that(report.inserted, is_(2))
+        assert_that(report.failed, is_(1))
+
+    def test_load_all_loads_each_collection(self):
+        reports = self.loader.load_all([('examples', [dict(n=1)]), ('samples', [dict(n=1), dict(n=2)])])
+
+        assert_that([report.collection_name for report in reports], is_(['examples', 'samples']))
+        assert_that([report.inserted for report in reports], is_([1, 2]))
+
+    def test_report_rate(self):
+        report = self.loader.load('examples', [dict(n=1)])
+        report.inserted, report.seconds = 100, 2.0
+
+        assert_that(report.rate, is_(50.0))
+        assert_that(str(report), contains_string('[50] documents/sec'))
+
+
+class GoldenDataSetTests(unittest.TestCase):
+    def test_load_drops_then_loads(self):
+        db = StubDatabase()
+        dropper = StubDatabaseDropper()
+        data_set = GoldenDataSet(database_dropper=dropper,
+                                 example_data_set=StubDataSet('examples', [dict(n=1)]),
+                                 bulk_loader=BulkLoader(db))
+
+        reports = data_set.load()
+
+        assert_that(dropper.dropped, is_(True))
+        assert_that([report.inserted for report in reports], is_([1]))
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import hashlib
+import unittest
+import zlib
+
+from flask import Flask, Blueprint
+from hamcrest import *
+import simplejson as json
+from hipflask import route, async_route, initialise_web, index_views, ViewResponse
+from hipflask.support import HipflaskException
+from hipflask.support.concurrency import Executor, Return
+from hipflask.support.web.resolvers import CannotFindViewException
+from jinja2 import DictLoader
+
+JSON = {'Accept': 'application/json'}
+HTML = {'Accept': 'text/html'}
+
+
+class RoutesTestCase(unittest.TestCase):
+    def setUp(self):
+        super(RoutesTestCase, self).setUp()
+        self.app = Flask(__name__)
+        self.blueprint = Blueprint('routes_tests', __name__)
+
+    def client(self):
+        self.app.register_blueprint(self.blueprint)
+        initialise_web(self.app)
+        return self.app.test_client()
+
+
+class RouteTests(RoutesTestCase):
+    def test_route(self):
+        @route(self.blueprint, '/things/<name>')
+        def display_thing(name):
+            return 'thing', dict(thing=name)
+
+        response = self.client().get('/things/foo/', headers=JSON)
+
+        assert_that(response.status_code, is_(200))
+        assert_that(json.loads(response.data), is_(dict(thing='foo')))
+
+    def test_view_response(self):
+        @route(self.blueprint, '/things/<name>')
+        def display_thing(name):
+            return ViewResponse('thing', dict(thing=name), 201)
+
+        response = self.client().get('/things/foo', headers=JSON)
+
+        assert_that(response.status_code, is_(201))
+        assert_that(json.loads(response.data), is_(dict(thing='foo')))
+
+
+class ViewNameRouteTests(RoutesTestCase):
+    def test_model_only(self):
+        @route(self.blueprint, '/things/<name>', view_name='thing')
+        def display_thing(name):
+            return dict(thing=name)
+
+        response = self.client().get('/things/foo', headers=JSON)
+
+        assert_that(response.status_code, is_(200))
+        assert_that(json.loads(response.data), is_(dict(thing='foo')))
+
+    def test_otherwise(self):
+        @route(self.blueprint, '/things/<name>', view_name='thing')
+        def display_thing(name):
+            return 'missing', dict(name=name), 404
+
+        response = self.client().get('/things/foo', headers=JSON)
+
+        assert_that(response.status_code, is_(404))
+        assert_that(json.loads(response.data), is_(dict(name='foo')))
+
+    def test_validated_at_registration(self):
+        self.assertRaises(HipflaskException, route, self.blueprint, '/things', view_name=' ')
+
+
+class IndexedViewsRouteTests(RoutesTestCase):
+    def setUp(self):
+        super(IndexedViewsRouteTests, self).setUp()
+        self.app.config['VIEW_INDEX_ENABLED'] = True
+        self.app.config['ENVIORNMENT'] = 'PRODUCTION'
+        self.app.jinja_loader = DictLoader({'thing.html': '<p>{{ thing }}</p>'})
+
+    def client(self):
+        client = super(IndexedViewsRouteTests, self).client()
+        index_views(self.app)
+        return client
+
+    def test_indexed(self):
+        @route(self.blueprint, '/things/<name>', view_name='thing')
+        def display_thing(name):
+            return dict(thing=name)
+
+        response = self.client().get('/things/foo', headers=HTML)
+
+        assert_that(response.data, is_('<p>foo</p>'))
+        assert_that('thing' in self.app.view_resolver, is_(True))
+
+    def test_indexed_on_first_request(self):
+        @route(self.blueprint, '/things/<name>')
+        def display_thing(name):
+            return 'thing', dict(thing=name)
+
+        # as without index_views
+        client = super(IndexedViewsRouteTests, self).client()
+        response = client.get('/things/foo', headers=HTML)
+
+        assert_that(response.data, is_('<p>foo</p>'))
+        assert_that(self.app.view_resolver.indexed, is_(True))
+
+    def test_missing_view_reported_at_boot(self):
+        @route(self.blueprint, '/gone', view_name='gone')
+        def display_gone():
+            return {}
+
+        self.assertRaises(CannotFindViewException, self.client)
+
+    def test_not_indexed_during_development(self):
+        self.app.config['ENVIORNMENT'] = 'DEVELOPMENT'
+
+        @route(self.blueprint, '/gone', view_name='gone')
+        def display_gone():
+            return {}
+
+        self.client()
+
+
+class CachedRouteTests(RoutesTestCase):
+    def setUp(self):
+        super(CachedRouteTests, self).setUp()
+        self.app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+        self.calls = []
+
+        @route(self.blueprint, '/things/<name>', cache=dict(tags=('thing:{name}',)))
+        def display_thing(name):
+            self.calls.append(name)
+            return 'thing', dict(thing=name)
+
+    def test_cached(self):
+        client = self.client()
+        first = client.get('/things/foo', headers=JSON)
+        second = client.get('/things/foo', headers=JSON)
+
+        assert_that(self.calls, is_(['foo']))
+        assert_that(first.headers['X-Cache'], is_('MISS'))
+        assert_that(second.headers['X-Cache'], is_('HIT'))
+        assert_that(json.loads(second.data), is_(dict(thing='foo')))
+        assert_that(self.app.response_cache.info().hits, is_(1))
+
+    def test_keyed_on_view_args(self):
+        client = self.client()
+        client.get('/things/foo', headers=JSON)
+        client.get('/things/bar', headers=JSON)
+
+        assert_that(self.calls, is_(['foo', 'bar']))
+
+    def test_invalidated(self):
+        client = self.client()
+        client.get('/things/foo', headers=JSON)
+        self.app.response_cache.invalidate('thing:foo')
+        client.get('/things/foo', headers=JSON)
+
+        assert_that(self.calls, is_(['foo', 'foo']))
+
+    def test_head_shares_cache_with_get(self):
+        client = self.client()
+        client.head('/things/foo', headers=JSON)
+        response = client.get('/things/foo', headers=JSON)
+
+        assert_that(self.calls, is_(['foo']))
+        assert_that(json.loads(response.data), is_(dict(thing='foo')))
+
+    def test_only_success_is_cached(self):
+        @route(self.blueprint, '/broken', cache=True)
+        def display_broken():
+            self.calls.append('broken')
+            return 'broken', {}, 404
+
+        client = self.client()
+        client.get('/broken', headers=JSON)
+        client.get('/broken', headers=JSON)
+
+        assert_that(self.calls, is_(['broken', 'broken']))
+
+
+class CountingResponsifier(object):
+    def __init__(self, responsifier):
+        self.responsifier = responsifier
+        self.calls = 0
+
+    def negotiate_content_type(self, accept_header):
+        return self.responsifier.negotiate_content_type(accept_header)
+
+    def responsify(self, *args, **kwargs):
+        self.calls += 1
+        return self.responsifier.responsify(*args, **kwargs)
+
+
+class ConditionalRouteTests(RoutesTestCase):
+    UPDATED = datetime.datetime(2014, 7, 1, 12, 30, 5, 500)
+
+    def setUp(self):
+        super(ConditionalRouteTests, self).setUp()
+        self.app.config['AUTOMATIC_ETAGS'] = True
+
+        @route(self.blueprint, '/things/<name>')
+        def display_thing(name):
+            return 'thing', dict(thing=name)
+
+        @route(self.blueprint, '/versioned/<name>')
+        def display_versioned_thing(name):
+            return dict(view_name='thing', model=dict(thing=name), version=3, last_modified=self.UPDATED)
+
+    def client(self):
+        client = super(ConditionalRouteTests, self).client()
+        self.responsifier = self.app.responsifier = CountingResponsifier(self.app.responsifier)
+        return client
+
+    def test_etag_from_body(self):
+        client = self.client()
+        first = client.get('/things/foo', headers=JSON)
+        second = client.get('/things/foo', headers=dict(JSON, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(first.status_code, is_(200))
+        assert_that(first.headers['ETag'], is_('"{}"'.format(hashlib.sha1(first.data).hexdigest())))
+        assert_that(first.headers['Vary'], is_('Accept'))
+        assert_that(second.status_code, is_(304))
+        assert_that(second.data, is_(''))
+
+    def test_etag_depends_on_model(self):
+        client = self.client()
+        foo = client.get('/things/foo', headers=JSON)
+        bar = client.get('/things/bar', headers=dict(JSON, **{'If-None-Match': foo.headers['ETag']}))
+
+        assert_that(bar.status_code, is_(200))
+        assert_that(bar.headers['ETag'], is_not(foo.headers['ETag']))
+
+    def test_etag_from_version(self):
+        client = self.client()
+        first = client.get('/versioned/foo', headers=JSON)
+        second = client.get('/versioned/foo', headers=dict(JSON, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(second.status_code, is_(304))
+        assert_that(second.headers['ETag'], is_(first.headers['ETag']))
+        assert_that(self.responsifier.calls, is_(1))
+
+    def test_if_modified_since(self):
+        client = self.client()
+        first = client.get('/versioned/foo', headers=JSON)
+        second = client.get('/versioned/foo', headers=dict(JSON, **{'If-Modified-Since': first.headers['Last-Modified']}))
+
+        assert_that(first.headers['Last-Modified'], is_('Tue, 01 Jul 2014 12:30:05 GMT'))
+        assert_that(second.status_code, is_(304))
+
+    def test_etag_from_view_response(self):
+        @route(self.blueprint, '/viewed/<name>')
+        def display_viewed_thing(name):
+            return ViewResponse('thing', dict(thing=name), version=3, last_modified=self.UPDATED)
+
+        client = self.client()
+        first = client.get('/viewed/foo', headers=JSON)
+        second = client.get('/viewed/foo', headers=dict(JSON, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(first.headers['ETag'], is_(client.get('/versioned/foo', headers=JSON).headers['ETag']))
+        assert_that(second.status_code, is_(304))
+
+    def test_etag_depends_on_more_than_model(self):
+        release = ['1']
+        self.app.context_processor(lambda: dict(release=release[0]))
+        self.app.jinja_loader = DictLoader({'thing.html': '<p data-release="{{ release }}">{{ thing }}</p>'})
+        client = self.client()
+        first = client.get('/things/foo', headers=HTML)
+        # as after a deploy
+        release[0] = '2'
+        second = client.get('/things/foo', headers=dict(HTML, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(second.status_code, is_(200))
+        assert_that(second.headers['ETag'], is_not(first.headers['ETag']))
+
+    def test_etag_for_object_model(self):
+        @route(self.blueprint, '/objects/<name>')
+        def display_object(name):
+            return 'thing', dict(thing=object())
+
+        self.app.jinja_loader = DictLoader({'thing.html': '<p>{{ thing.__class__.__name__ }}</p>'})
+        client = self.client()
+        first = client.get('/objects/foo', headers=HTML)
+        second = client.get('/objects/foo', headers=dict(HTML, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(second.status_code, is_(304))
+
+    def test_without_automatic_etags(self):
+        self.app.config['AUTOMATIC_ETAGS'] = False
+        response = self.client().get('/things/foo', headers=JSON)
+
+        assert_that('ETag' in response.headers, is_(False))
+
+    def test_cached_response_is_conditional(self):
+        self.app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+
+        @route(self.blueprint, '/cached/<name>', cache=True)
+        def display_cached_thing(name):
+            return 'thing', dict(thing=name)
+
+        client = self.client()
+        first = client.get('/cached/foo', headers=JSON)
+        client.get('/cached/foo', headers=JSON)
+        third = client.get('/cached/foo', headers=dict(JSON, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(third.status_code, is_(304))
+        assert_that(third.headers['X-Cache'], is_('HIT'))
+
+
+class CompressedRouteTests(RoutesTestCase):
+    def setUp(self):
+        super(CompressedRouteTests, self).setUp()
+        self.app.config.update(COMPRESSION_ENABLED=True, COMPRESSION_MIN_SIZE=10, AUTOMATIC_ETAGS=True)
+
+        @route(self.blueprint, '/things/<name>', cache=True)
+        def display_thing(name):
+            return 'thing', dict(thing=name * 10)
+
+    def test_compressed(self):
+        self.app.config['RESPONSE_CACHE_BACKEND'] = 'memory'
+        client = self.client()
+        gzipped = client.get('/things/foo', headers=dict(JSON, **{'Accept-Encoding': 'gzip'}))
+        plain = client.get('/things/foo', headers=JSON)
+
+        assert_that(gzipped.headers['Content-Encoding'], is_('gzip'))
+        assert_that(gzipped.get_etag()[1], is_(True))
+        assert_that(json.loads(zlib.decompress(gzipped.data, zlib.MAX_WBITS | 16)), is_(dict(thing='foo' * 10)))
+        assert_that(plain.headers['X-Cache'], is_('MISS'))
+        assert_that(json.loads(plain.data), is_(dict(thing='foo' * 10)))
+
+    def test_compressed_response_is_conditional(self):
+        client = self.client()
+        headers = dict(JSON, **{'Accept-Encoding': 'gzip'})
+        first = client.get('/things/foo', headers=headers)
+        second = client.get('/things/foo', headers=dict(headers, **{'If-None-Match': first.headers['ETag']}))
+
+        assert_that(second.status_code, is_(304))
+
+
+class TimedRouteTests(RoutesTestCase):
+    def setUp(self):
+        super(TimedRouteTests, self).setUp()
+        self.app.config.update(TIMING_ENABLED=True, TIMING_ENDPOINT='/_internal/timings', TIMING_ENDPOINT_ENABLED=True)
+
+        @route(self.blueprint, '/things/<name>')
+        def display_thing(name):
+            return 'thing', dict(thing=name)
+
+    def test_server_timing(self):
+        response = self.client().get('/things/foo', headers=JSON)
+        stages = [timing.split(';')[0] for timing in response.headers['Server-Timing'].split(', ')]
+
+        assert_that(stages, is_(['handler', 'deconstruct', 'conditional', 'negotiate', 'render', 'total']))
+
+    def test_histograms(self):
+        client = self.client()
+        client.get('/things/foo', headers=JSON)
+        client.get('/things/bar', headers=JSON)
+        response = client.get('/_internal/timings', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+        timings = json.loads(response.data)['timings']
+
+        assert_that(timings, has_length(1))
+        assert_that(timings[0]['endpoint'], is_('routes_tests.display_thing'))
+        assert_that(timings[0]['content_type'], is_('application/json'))
+        assert_that(timings[0]['stages']['total']['count'], is_(2))
+
+    def test_histograms_only_for_loopback(self):
+        response = self.client().get('/_internal/timings', environ_base={'REMOTE_ADDR': '10.0.0.1'})
+
+        assert_that(response.status_code, is_(404))
+
+    def test_histograms_not_served_by_default(self):
+        self.app.config['TIMING_ENDPOINT_ENABLED'] = False
+        client = self.client()
+        response = client.get('/_internal/timings', environ_base={'REMOTE_ADDR': '127.0.0.1'})
+
+        assert_that(response.status_code, is_(404))
+        assert_that('Server-Timing' in client.get('/things/foo', headers=JSON).headers, is_(True))
+
+    def test_untimed(self):
+        self.app.config['TIMING_ENABLED'] = False
+        response = self.client().get('/things/foo', headers=JSON)
+
+        assert_that('Server-Timing' in response.headers, is_(False))
+
+
+class AsyncRouteTests(RoutesTestCase):
+    def setUp(self):
+        super(AsyncRouteTests, self).setUp()
+        self.executor = Executor(workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        super(AsyncRouteTests, self).tearDown()
+
+    def test_async_route_with_coroutine(self):
+        @async_route(self.blueprint, '/things/<name>')
+        def display_thing(name):
+            upper, lower = yield [self.executor.submit(name.upper), self.executor.submit(name.lower)]
+            raise Return(('thing', dict(upper=upper, lower=lower), 201))
+
+        response = self.client().get('/things/Foo', headers=JSON)
+
+        assert_that(response.status_code, is_(201))
+        assert_that(json.loads(response.data), is_(dict(upper='FOO', lower='foo')))
+
+    def test_async_route_with_plain_handler(self):
+        @async_route(self.blueprint, '/things')
+        def display_things():
+            return 'things', dict(things=[])
+
+        response = self.client().get('/things', headers=JSON)
+
+        assert_that(json.loads(response.data), is_(dict(things=[])))
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from hamcrest import *
+from hipflask.support.caching import LruCache, hit_rate, memoized
+
+
+class LruCacheTests(unittest.TestCase):
+    def test_ctor_with_zero_maxsize(self):
+        assert_that(calling(LruCache).with_args(0), raises(AssertionError))
+
+    def test_get_missing(self):
+        cache = LruCache()
+        assert_that(cache.get('foo'), none())
+        assert_that(cache.get('foo', 3), is_(3))
+
+    def test_put_and_get(self):
+        cache = LruCache()
+        cache.put('foo', 3)
+        assert_that(cache.get('foo'), is_(3))
+
+    def test_put_returns_value(self):
+        assert_that(LruCache().put('foo', 3), is_(3))
+
+    def test_evicts_least_recently_used(self):
+        cache = LruCache(2)
+        cache.put('foo', 1)
+        cache.put('bar', 2)
+        cache.get('foo')
+        cache.put('baz', 3)
+
+        assert_that('foo' in cache, is_(True))
+        assert_that('bar' in cache, is_(False))
+        assert_that('baz' in cache, is_(True))
+        assert_that(cache.info().evictions, is_(1))
+
+    def test_counters(self):
+        cache = LruCache()
+        cache.put('foo', 1)
+        cache.get('foo')
+        cache.get('bar')
+
+        info = cache.info()
+        assert_that(info.hits, is_(1))
+        assert_that(info.misses, is_(1))
+        assert_that(info.currsize, is_(1))
+        assert_that(hit_rate(info), is_(0.5))
+
+    def test_discard(self):
+        cache = LruCache()
+        cache.put('foo', 1)
+        cache.discard('foo')
+        cache.discard('bar')
+        assert_that(cache, has_length(0))
+
+    def test_hit_rate_without_lookups(self):
+        assert_that(hit_rate(LruCache().info()), is_(0.0))
+
+
+class MemoizedTests(unittest.TestCase):
+    def setUp(self):
+        super(MemoizedTests, self).setUp()
+        self.calls = []
+
+        @memoized(maxsize=2)
+        def double(x):
+            self.calls.append(x)
+            return x * 2
+
+        self.double = double
+
+    def test_remembers_results(self):
+        assert_that([self.double(1), self.double(1)], is_([2, 2]))
+        assert_that(self.calls, is_([1]))
+
+    def test_starts_over_when_full(self):
+        for x in (1, 2, 3, 1):
+            self.double(x)
+        assert_that(self.calls, is_([1, 2, 3, 1]))
+
+    def test_remembers_results_by_type(self):
+        assert_that([self.double(1), self.double(1.0)], is_([2, 2.0]))
+        assert_that(self.double(1.0), is_(instance_of(float)))
+        assert_that(self.calls, is_([1, 1.0]))
+
+    def test_cache_clear(self):
+        self.double(1)
+        self.double.cache_clear()
+        self.double(1)
+        assert_that(self.calls, is_([1, 1]))
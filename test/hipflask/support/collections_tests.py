@@ -3,7 +3,7 @@
 import unittest
 
 from hamcrest import *
-from hipflask.support.collections import copy_and_update
+from hipflask.support.collections import copy_and_update, LayeredMapping
 
 
 class CopyAndUpdateTests(unittest.TestCase):
@@ -39,3 +39,32 @@ class CopyAndUpdateTests(unittest.TestCase):
         assert_that(result, not_none())
         assert_that(result, has_key('foo'))
         assert_that(result, has_length(1))
+
+
+class LayeredMappingTests(unittest.TestCase):
+    def test_foremost_wins(self):
+        layered = LayeredMapping(dict(foo=1), dict(foo=2, bar=3))
+
+        assert_that(layered['foo'], is_(1))
+        assert_that(layered['bar'], is_(3))
+        assert_that(layered.get('baz', 4), is_(4))
+        assert_that('bar' in layered, is_(True))
+        assert_that('baz' in layered, is_(False))
+
+    def test_missing(self):
+        with self.assertRaises(KeyError):
+            LayeredMapping(dict(foo=1), {})['bar']
+
+    def test_keys(self):
+        layered = LayeredMapping(dict(foo=1), dict(foo=2, bar=3))
+
+        assert_that(sorted(layered), is_(['bar', 'foo']))
+        assert_that(len(layered), is_(2))
+        assert_that(dict(layered), is_(dict(foo=1, bar=3)))
+
+    def test_no_copy(self):
+        model = dict(foo=1)
+        layered = LayeredMapping({}, model)
+        model['foo'] = 2
+
+        assert_that(layered['foo'], is_(2))
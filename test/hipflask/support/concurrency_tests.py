@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import unittest
+
+from hamcrest import *
+from hipflask.support.concurrency import Executor, Return, run_coroutine, resolve, is_coroutine_function
+
+
+class ExecutorTests(unittest.TestCase):
+    def setUp(self):
+        super(ExecutorTests, self).setUp()
+        self.executor = Executor(workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        super(ExecutorTests, self).tearDown()
+
+    def test_ctor_with_no_workers(self):
+        assert_that(calling(Executor).with_args(workers=0), raises(AssertionError))
+
+    def test_submit(self):
+        future = self.executor.submit(lambda x, y=0: x + y, 1, y=2)
+        assert_that(future.get(1), is_(3))
+
+    def test_submit_runs_on_another_thread(self):
+        future = self.executor.submit(threading.current_thread)
+        assert_that(future.get(1), is_not(same_instance(threading.current_thread())))
+
+
+class RunCoroutineTests(unittest.TestCase):
+    def setUp(self):
+        super(RunCoroutineTests, self).setUp()
+        self.executor = Executor(workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        super(RunCoroutineTests, self).tearDown()
+
+    def test_returns_value(self):
+        def coroutine():
+            one = yield self.executor.submit(lambda: 1)
+            raise Return(one + 1)
+
+        assert_that(run_coroutine(coroutine()), is_(2))
+
+    def test_gathers_lists_of_futures(self):
+        def coroutine():
+            results = yield [self.executor.submit(lambda: 1), self.executor.submit(lambda: 2)]
+            raise Return(results)
+
+        assert_that(run_coroutine(coroutine()), is_([1, 2]))
+
+    def test_sends_back_plain_values(self):
+        def coroutine():
+            value = yield 'foo'
+            raise Return(value)
+
+        assert_that(run_coroutine(coroutine()), is_('foo'))
+
+    def test_returns_none_when_finished(self):
+        def coroutine():
+            yield self.executor.submit(lambda: 1)
+
+        assert_that(run_coroutine(coroutine()), none())
+
+    def test_throws_errors_into_coroutine(self):
+        def fail():
+            raise ValueError('bang')
+
+        def coroutine():
+            try:
+                yield self.executor.submit(fail)
+            except ValueError as e:
+                raise Return(str(e))
+
+        assert_that(run_coroutine(coroutine()), is_('bang'))
+
+    def test_propagates_unhandled_errors(self):
+        def fail():
+            raise ValueError('bang')
+
+        def coroutine():
+            yield self.executor.submit(fail)
+
+        assert_that(calling(run_coroutine).with_args(coroutine()), raises(ValueError))
+
+    def test_resolve_plain_values(self):
+        assert_that(resolve([1, 2]), is_([1, 2]))
+
+    def test_is_coroutine_function(self):
+        def coroutine():
+            yield
+
+        assert_that(is_coroutine_function(coroutine), is_(True))
+        assert_that(is_coroutine_function(lambda: None), is_(False))
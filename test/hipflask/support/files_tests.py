@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from hamcrest import *
+from hipflask.support.files import write_atomically, read_manifest, write_manifest
+
+
+class FilesTestCase(unittest.TestCase):
+    def setUp(self):
+        super(FilesTestCase, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'manifest.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+        super(FilesTestCase, self).tearDown()
+
+    def test_write_atomically(self):
+        write_atomically(self.path, 'first')
+        write_atomically(self.path, 'second')
+
+        with open(self.path, 'rb') as stream:
+            assert_that(stream.read(), is_('second'))
+        assert_that(os.listdir(self.directory), contains('manifest.json'))
+
+    def test_write_atomically_leaves_nothing_behind(self):
+        os.mkdir(self.path)
+
+        self.assertRaises(OSError, write_atomically, self.path, 'content')
+        assert_that(os.listdir(self.directory), contains('manifest.json'))
+
+    def test_manifest_round_trip(self):
+        write_manifest(self.path, 1, 'packages', {'a': [1, 2]})
+
+        assert_that(read_manifest(self.path, 1, 'packages'), is_({'a': [1, 2]}))
+
+    def test_manifest_of_another_version(self):
+        write_manifest(self.path, 1, 'packages', {'a': [1, 2]})
+
+        assert_that(read_manifest(self.path, 2, 'packages'), is_({}))
+
+    def test_unreadable_manifest(self):
+        with open(self.path, 'w') as stream:
+            stream.write('{not json')
+
+        assert_that(read_manifest(self.path, 1, 'packages'), is_({}))
+
+    def test_no_manifest(self):
+        write_manifest(None, 1, 'packages', {'a': [1, 2]})
+
+        assert_that(read_manifest(None, 1, 'packages'), is_({}))
+        assert_that(read_manifest(self.path, 1, 'packages'), is_({}))
+
+    def test_unwritable_manifest(self):
+        os.mkdir(self.path)
+
+        write_manifest(self.path, 1, 'packages', {'a': [1, 2]})
+        assert_that(os.listdir(self.directory), contains('manifest.json'))
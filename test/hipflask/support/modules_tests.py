@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from hamcrest import *
+import simplejson as json
+from hipflask.support.modules import ModuleIndex, scan_modules, module_files
+
+PACKAGE_NAME = 'hipflask_modules_tests'
+
+
+def is_number(item):
+    return isinstance(item, int) and not isinstance(item, bool)
+
+
+def is_greeting(item):
+    return item == 'hello'
+
+
+class ModulesTestCase(unittest.TestCase):
+    def setUp(self):
+        super(ModulesTestCase, self).setUp()
+
+        self.directory = tempfile.mkdtemp()
+        self.package_path = [os.path.join(self.directory, PACKAGE_NAME)]
+        os.mkdir(self.package_path[0])
+        self.write_module('__init__', '')
+        self.write_module('numbers', 'ONE = 1\nTWO = 2\n')
+        self.write_module('words', 'GREETING = "hello"\n')
+        sys.path.insert(0, self.directory)
+
+    def tearDown(self):
+        sys.path.remove(self.directory)
+        for name in list(sys.modules):
+            if name.startswith(PACKAGE_NAME):
+                del sys.modules[name]
+        shutil.rmtree(self.directory)
+
+        super(ModulesTestCase, self).tearDown()
+
+    def write_module(self, name, source):
+        with open(os.path.join(self.package_path[0], '{}.py'.format(name)), 'w') as stream:
+            stream.write(source)
+
+
+class ScanModulesTests(ModulesTestCase):
+    def test_module_files(self):
+        files = dict(module_files(PACKAGE_NAME, self.package_path))
+        assert_that(files, has_length(2))
+        assert_that(files['hipflask_modules_tests.words'], ends_with('words.py'))
+
+    def test_scan_modules_indexes_all_categories(self):
+        index = scan_modules(PACKAGE_NAME, self.package_path, dict(numbers=is_number, greeting=is_greeting))
+
+        assert_that(index['hipflask_modules_tests.numbers'], is_(dict(numbers=['ONE', 'TWO'], greeting=[])))
+        assert_that(index['hipflask_modules_tests.words'], is_(dict(numbers=[], greeting=['GREETING'])))
+
+
+class ModuleIndexTests(ModulesTestCase):
+    def setUp(self):
+        super(ModuleIndexTests, self).setUp()
+        self.manifest = os.path.join(self.directory, 'manifest.json')
+
+    def module_index(self):
+        return ModuleIndex(dict(numbers=is_number, greeting=is_greeting), manifest=self.manifest)
+
+    def test_ctor_with_no_predicates(self):
+        assert_that(calling(ModuleIndex).with_args({}), raises(AssertionError))
+
+    def test_find(self):
+        numbers = ModuleIndex(dict(numbers=is_number)).find(PACKAGE_NAME, self.package_path, 'numbers')
+        assert_that([item for item, _ in numbers], is_([1, 2]))
+
+    def test_find_with_unknown_category(self):
+        module_index = ModuleIndex(dict(numbers=is_number))
+        assert_that(calling(module_index.find).with_args(PACKAGE_NAME, self.package_path, 'greeting'),
+                    raises(AssertionError))
+
+    def test_find_writes_manifest(self):
+        self.module_index().find(PACKAGE_NAME, self.package_path, 'numbers')
+
+        with open(self.manifest) as stream:
+            manifest = json.load(stream)
+        index = manifest['packages'][PACKAGE_NAME]['index']
+        assert_that(index['hipflask_modules_tests.words']['greeting'], is_(['GREETING']))
+
+    def test_find_reads_manifest(self):
+        module_index = lambda: ModuleIndex(dict(numbers=is_number), manifest=self.manifest)
+        module_index().find(PACKAGE_NAME, self.package_path, 'numbers')
+        del sys.modules['hipflask_modules_tests.words']
+
+        numbers = module_index().find(PACKAGE_NAME, self.package_path, 'numbers')
+
+        assert_that([item for item, _ in numbers], is_([1, 2]))
+        assert_that('hipflask_modules_tests.words' in sys.modules, is_(False))
+
+    def test_find_rescans_changed_modules(self):
+        self.module_index().find(PACKAGE_NAME, self.package_path, 'numbers')
+        self.write_module('numbers', 'THREE = 3\n')
+        path = os.path.join(self.package_path[0], 'numbers.py')
+        os.utime(path, (0, 0))
+        del sys.modules['hipflask_modules_tests.numbers']
+
+        numbers = self.module_index().find(PACKAGE_NAME, self.package_path, 'numbers')
+
+        assert_that([item for item, _ in numbers], is_([3]))
+
+    def test_find_ignores_unreadable_manifest(self):
+        with open(self.manifest, 'w') as stream:
+            stream.write('not JSON')
+
+        greeting = self.module_index().find(PACKAGE_NAME, self.package_path, 'greeting')
+
+        assert_that([item for item, _ in greeting], is_(['hello']))
@@ -1,12 +1,17 @@
 # -*- coding: utf-8 -*-
 
+import socket
 import unittest
 
 # noinspection PyPackageRequirements
 from bson.objectid import ObjectId
 # noinspection PyPackageRequirements
 from bson.errors import InvalidId
-from hipflask.support.mongo import ToObjectIdMapper, ObjectIdToStringMapper
+from hamcrest import *
+from pymongo.thread_util import BoundedSemaphore
+from hipflask.support.concurrency import Executor
+from hipflask.support.mongo import ToObjectIdMapper, ObjectIdToStringMapper, MongoPoolMetrics, InstrumentedPool, \
+    InstrumentedSemaphore, AsyncMongoRepositoryMixin, munge_id, munge_ids
 
 OBJECT_ID_STRING_VALID = '52b06645a337b7276fee4a8f'
 OBJECT_ID_STRING_INVALID = 'an invalid ObjectId'
@@ -38,6 +43,28 @@ class ToObjectIdMapperTests(unittest.TestCase):
         oid = self.mapper.map(ObjectId(OBJECT_ID_STRING_VALID))
         self.assertIsNotNone(oid)
 
+    def test_map_many(self):
+        oid = ObjectId()
+        oids = self.mapper.map_many([OBJECT_ID_STRING_VALID, oid, unicode(OBJECT_ID_STRING_VALID.upper())])
+        assert_that(oids, is_([ObjectId(OBJECT_ID_STRING_VALID), oid, ObjectId(OBJECT_ID_STRING_VALID)]))
+        assert_that(oids[1], is_(same_instance(oid)))
+
+    def test_map_many_with_nothing(self):
+        assert_that(self.mapper.map_many(iter([])), is_([]))
+
+    def test_map_many_with_invalid_ObjectId(self):
+        self.assertRaises(InvalidId, self.mapper.map_many, [OBJECT_ID_STRING_VALID, OBJECT_ID_STRING_INVALID])
+
+    def test_map_many_with_none(self):
+        self.assertRaises(TypeError, self.mapper.map_many, [OBJECT_ID_STRING_VALID, None])
+
+    def test_map_many_with_commas(self):
+        self.assertRaises(InvalidId, self.mapper.map_many, ['0' * 24 + ',' + '1' * 24])
+        self.assertRaises(InvalidId, self.mapper.map_many, [OBJECT_ID_STRING_VALID, '0' * 12 + ',' + '1' * 11])
+
+    def test_map_many_with_non_ascii_bytes_among_unicode(self):
+        self.assertRaises(InvalidId, self.mapper.map_many, [unicode(OBJECT_ID_STRING_VALID), '\xe9' * 24])
+
 
 class ObjectIdToStringMapperTests(unittest.TestCase):
     def setUp(self):
@@ -63,3 +90,127 @@ class ObjectIdToStringMapperTests(unittest.TestCase):
 
     def test_map_with_invalid_ObjectId(self):
         self.assertRaises(TypeError, self.mapper.map, OBJECT_ID_STRING_INVALID)
+
+    def test_map_many(self):
+        strings = self.mapper.map_many([ObjectId(OBJECT_ID_STRING_VALID), None, OBJECT_ID_STRING_VALID])
+        assert_that(strings, is_([OBJECT_ID_STRING_VALID, None, OBJECT_ID_STRING_VALID]))
+        assert_that(strings[0], is_(instance_of(unicode)))
+
+    def test_map_many_with_invalid_ObjectId(self):
+        self.assertRaises(TypeError, self.mapper.map_many, [OBJECT_ID_STRING_VALID, OBJECT_ID_STRING_INVALID])
+
+    def test_map_many_with_commas(self):
+        self.assertRaises(TypeError, self.mapper.map_many, ['0' * 24 + ',' + '1' * 24])
+        self.assertRaises(TypeError, self.mapper.map_many, [OBJECT_ID_STRING_VALID, '0' * 12 + ',' + '1' * 11])
+
+    def test_map_many_with_non_ascii_bytes_among_unicode(self):
+        self.assertRaises(TypeError, self.mapper.map_many, [unicode(OBJECT_ID_STRING_VALID), '\xe9' * 24])
+
+
+class MungeIdTests(unittest.TestCase):
+    def test_munge_id(self):
+        document = dict(id=OBJECT_ID_STRING_VALID, name='foo')
+        munge_id(document, None)
+        assert_that(document, is_(dict(_id=ObjectId(OBJECT_ID_STRING_VALID), name='foo')))
+
+    def test_munge_ids(self):
+        documents = [dict(id=OBJECT_ID_STRING_VALID), dict(name='foo'), dict(id=None)]
+        munge_ids(documents)
+        assert_that(documents, is_([dict(_id=ObjectId(OBJECT_ID_STRING_VALID)), dict(name='foo'), dict()]))
+
+    def test_munge_ids_with_plain_function(self):
+        documents = [dict(id=1)]
+        munge_ids(documents, lambda _id: _id + 1)
+        assert_that(documents, is_([dict(_id=2)]))
+
+
+class InstrumentedSemaphoreTests(unittest.TestCase):
+    def setUp(self):
+        super(InstrumentedSemaphoreTests, self).setUp()
+        self.metrics = MongoPoolMetrics()
+        self.semaphore = InstrumentedSemaphore(BoundedSemaphore(1), self.metrics)
+
+    def test_acquire_without_waiting(self):
+        assert_that(self.semaphore.acquire(True, 0.01), is_(True))
+        assert_that(self.metrics.waits, is_(0))
+
+    def test_acquire_with_timeout(self):
+        self.semaphore.acquire()
+        assert_that(self.semaphore.acquire(True, 0.01), is_(False))
+
+        snapshot = self.metrics.snapshot()
+        assert_that(snapshot['waits'], is_(1))
+        assert_that(snapshot['wait_timeouts'], is_(1))
+        assert_that(snapshot['wait_time'], greater_than(0.0))
+
+    def test_acquire_without_blocking(self):
+        self.semaphore.acquire()
+        assert_that(self.semaphore.acquire(False), is_(False))
+        assert_that(self.metrics.waits, is_(0))
+
+
+class InstrumentedPoolTests(unittest.TestCase):
+    def setUp(self):
+        super(InstrumentedPoolTests, self).setUp()
+        self.metrics = MongoPoolMetrics()
+        self.pool = InstrumentedPool(('localhost', 27017), 10, None, None, False, False,
+                                     metrics=self.metrics)
+        self.sockets = socket.socketpair()
+        self.pool.create_connection = lambda: self.sockets[0]
+
+    def tearDown(self):
+        for sock in self.sockets:
+            sock.close()
+        super(InstrumentedPoolTests, self).tearDown()
+
+    def test_checkout_and_checkin(self):
+        sock_info = self.pool.get_socket()
+        assert_that(self.metrics.snapshot()['in_use'], is_(1))
+
+        self.pool.maybe_return_socket(sock_info)
+        snapshot = self.metrics.snapshot()
+        assert_that(snapshot['checkouts'], is_(1))
+        assert_that(snapshot['checkins'], is_(1))
+        assert_that(snapshot['in_use'], is_(0))
+        assert_that(snapshot['sockets_created'], is_(1))
+
+    def test_reuses_pooled_sockets(self):
+        self.pool.maybe_return_socket(self.pool.get_socket())
+        self.pool.maybe_return_socket(self.pool.get_socket())
+
+        snapshot = self.metrics.snapshot()
+        assert_that(snapshot['checkouts'], is_(2))
+        assert_that(snapshot['sockets_created'], is_(1))
+
+
+# noinspection PyClassHasNoInit
+class StubCollection():
+    name = 'things'
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find_one(self, spec):
+        return next((document for document in self.documents if document['name'] == spec['name']), None)
+
+
+class AsyncMongoRepositoryMixinTests(unittest.TestCase):
+    def setUp(self):
+        super(AsyncMongoRepositoryMixinTests, self).setUp()
+        self.executor = Executor(workers=1)
+        self.db = dict(things=StubCollection([dict(name='foo'), dict(name='bar')]))
+        self.repository = AsyncMongoRepositoryMixin(self.db, self.executor)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        super(AsyncMongoRepositoryMixinTests, self).tearDown()
+
+    def test_ctor_with_no_executor(self):
+        assert_that(calling(AsyncMongoRepositoryMixin).with_args(self.db, None), raises(AssertionError))
+
+    def test_operations_return_futures(self):
+        future = self.repository.things.find_one(dict(name='bar'))
+        assert_that(future.get(1), is_(dict(name='bar')))
+
+    def test_attributes_pass_through(self):
+        assert_that(self.repository.things.name, is_('things'))
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from flask import Flask
+from hamcrest import *
+from injector import Injector, Module, provides, singleton
+from jinja2 import DictLoader
+from pymongo import MongoClient
+from pymongo.database import Database
+from hipflask.support.prefork import warm, forget_singletons, PreforkServer
+
+
+class Connection(object):
+    created = 0
+
+    def __init__(self):
+        Connection.created += 1
+        self.connected = True
+
+    def disconnect(self):
+        self.connected = False
+
+
+class ConnectionModule(Module):
+    @provides(Connection, scope=singleton)
+    def provide_connection(self):
+        return Connection()
+
+
+class DatabaseModule(Module):
+    @provides(Database, scope=singleton)
+    def provide_database(self):
+        # never connects
+        return MongoClient(_connect=False)['prefork_tests']
+
+
+class PreforkTestCase(unittest.TestCase):
+    def setUp(self):
+        super(PreforkTestCase, self).setUp()
+
+        self.app = Flask(__name__)
+        self.app.jinja_loader = DictLoader({'index.html': 'Hello'})
+        self.app.extensions['Injector'] = Injector([ConnectionModule(), DatabaseModule()])
+        self.injector = self.app.extensions['Injector']
+        Connection.created = 0
+
+
+class WarmTests(PreforkTestCase):
+    def test_warm_resolves_eagerly(self):
+        warm(self.app, (Connection,))
+        assert_that(Connection.created, is_(1))
+
+    def test_warm_compiles_templates(self):
+        warm(self.app)
+        assert_that(self.app.jinja_env.cache, has_length(1))
+
+
+class ForgetSingletonsTests(PreforkTestCase):
+    def test_forget_singletons(self):
+        before = self.injector.get(Connection)
+        forget_singletons(self.app, (Connection,))
+        after = self.injector.get(Connection)
+
+        assert_that(after, is_not(same_instance(before)))
+        assert_that(self.injector.get(Connection), same_instance(after))
+
+
+class PreforkServerTests(PreforkTestCase):
+    def test_ctor_with_no_workers(self):
+        assert_that(calling(PreforkServer).with_args(self.app, workers=0), raises(AssertionError))
+
+    def test_release_disconnects_fork_unsafe(self):
+        server = PreforkServer(self.app, fork_unsafe=(Connection,))
+        connection = self.injector.get(Connection)
+
+        server._release()
+
+        assert_that(connection.connected, is_(False))
+        assert_that(self.injector.get(Connection), is_not(same_instance(connection)))
+
+    def test_release_database(self):
+        server = PreforkServer(self.app, fork_unsafe=(Database,))
+        database = self.injector.get(Database)
+
+        server._release()
+
+        assert_that(self.injector.get(Database), is_not(same_instance(database)))
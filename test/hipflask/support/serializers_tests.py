@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import unittest
+
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+from hamcrest import *
+import simplejson as json
+from hipflask.support.mongo import MongoJsonEncoder
+from hipflask.support.serializers import JsonEncoders, FastJsonSerializer, SimpleJsonSerializer, \
+    json_serializer_for
+
+OBJECT_ID = '52b06645a337b7276fee4a8f'
+
+DOCUMENT = dict(_id=ObjectId(OBJECT_ID),
+                created=datetime.datetime(2014, 7, 1, 12, 30, 5),
+                born=datetime.date(1977, 5, 25),
+                names=[u'Shirley', 'Valentine'],
+                count=3)
+
+
+class JsonEncodersTests(unittest.TestCase):
+    def test_dispatch_on_registered_type(self):
+        encoders = JsonEncoders({ObjectId: unicode})
+        assert_that(encoders(ObjectId(OBJECT_ID)), is_(OBJECT_ID))
+
+    def test_dispatch_on_subclass_of_registered_type(self):
+        encoders = JsonEncoders({datetime.date: datetime.date.isoformat})
+        assert_that(encoders(AnniversaryDate(2014, 7, 1)), is_('2014-07-01'))
+        assert_that(encoders.encoder_for(AnniversaryDate), is_(datetime.date.isoformat))
+
+    def test_dispatch_on_unregistered_type(self):
+        encoders = JsonEncoders()
+        assert_that(calling(encoders).with_args(object()), raises(TypeError))
+
+    def test_register_chains(self):
+        encoders = JsonEncoders()
+        assert_that(encoders.register(ObjectId, unicode), is_(encoders))
+
+    def test_register_requires_encoder(self):
+        assert_that(calling(JsonEncoders().register).with_args(ObjectId, None), raises(AssertionError))
+
+
+class FastJsonSerializerTests(unittest.TestCase):
+    def test_same_semantics_as_mongo_json_encoder(self):
+        expected = json.loads(MongoJsonEncoder().encode(DOCUMENT))
+        actual = json.loads(FastJsonSerializer().dumps(DOCUMENT))
+        assert_that(actual, is_(expected))
+
+    def test_dumps_is_compact(self):
+        assert_that(FastJsonSerializer().dumps(dict(foo=[1, 2])), is_('{"foo":[1,2]}'))
+
+    def test_dumps_pretty(self):
+        assert_that(FastJsonSerializer().dumps(dict(foo=1), pretty=True), contains_string('\n'))
+
+    def test_dumps_with_unsupported_value(self):
+        assert_that(calling(FastJsonSerializer().dumps).with_args(object()), raises(TypeError))
+
+
+class SimpleJsonSerializerTests(unittest.TestCase):
+    def test_same_semantics_as_mongo_json_encoder(self):
+        expected = MongoJsonEncoder().encode(DOCUMENT)
+        assert_that(SimpleJsonSerializer().dumps(DOCUMENT), is_(expected))
+
+
+class JsonSerializerForTests(unittest.TestCase):
+    def test_fast(self):
+        assert_that(json_serializer_for('fast'), instance_of(FastJsonSerializer))
+
+    def test_simple(self):
+        assert_that(json_serializer_for('simple'), instance_of(SimpleJsonSerializer))
+
+    def test_unknown(self):
+        assert_that(calling(json_serializer_for).with_args('ujson'), raises(ValueError))
+
+
+class AnniversaryDate(datetime.date):
+    pass
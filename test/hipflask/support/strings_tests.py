@@ -4,7 +4,8 @@ import unittest
 
 from hamcrest import *
 from hipflask import HipflaskException
-from hipflask.support.strings import safe_string, is_stringy, has_text, message_from
+from hipflask.support.strings import safe_string, is_stringy, has_text, message_from, convert_keys, \
+    convert_keys_many, camelcase_to_underscore, underscore_to_camelcase
 
 
 # noinspection PyPep8Naming
@@ -76,3 +77,86 @@ class StringsTests(unittest.TestCase):
         ex = HipflaskException(HipflaskException(expected_message))
         message = message_from(ex)
         assert_that(message, is_(expected_message))
+
+
+class ConvertKeysTests(unittest.TestCase):
+    def document(self):
+        return {'firstName': 'Jo', 'homeAddress': {'postCode': 'E1'},
+                'phoneNumbers': [{'areaCode': '020'}, 'unlisted', ['nestedList']],
+                'pastNames': ({'givenName': 'Jay'},)}
+
+    def expected(self):
+        return {'first_name': 'Jo', 'home_address': {'post_code': 'E1'},
+                'phone_numbers': [{'area_code': '020'}, 'unlisted', ['nestedList']],
+                'past_names': [{'given_name': 'Jay'}]}
+
+    def test_camelcase_to_underscore(self):
+        assert_that(camelcase_to_underscore('homeAddress'), is_('home_address'))
+
+    def test_underscore_to_camelcase(self):
+        assert_that(underscore_to_camelcase('home_address'), is_('homeAddress'))
+
+    def test_convert_keys(self):
+        document = self.document()
+        converted = convert_keys(document, camelcase_to_underscore)
+
+        assert_that(converted, is_(self.expected()))
+        assert_that(document, is_(self.document()))
+
+    def test_convert_keys_skip_conversion(self):
+        converted = convert_keys({'homeAddress': {'postCode': 'E1'}}, camelcase_to_underscore,
+                                 skip_conversion=lambda key: key == 'homeAddress')
+        assert_that(converted, is_({'homeAddress': {'post_code': 'E1'}}))
+
+    def test_convert_keys_in_place(self):
+        document = self.document()
+        address = document['homeAddress']
+        converted = convert_keys(document, camelcase_to_underscore, in_place=True)
+
+        assert_that(converted, is_(same_instance(document)))
+        assert_that(converted['home_address'], is_(same_instance(address)))
+        assert_that(converted, is_(self.expected()))
+
+    def test_convert_keys_in_place_converts_shared_dicts_once(self):
+        shared = {'areaCode': '020'}
+        converted = convert_keys({'home': shared, 'work': shared}, lambda key: key + '_',
+                                 in_place=True)
+        assert_that(converted, is_({'home_': {'areaCode_': '020'}, 'work_': {'areaCode_': '020'}}))
+
+    def test_convert_keys_copies_shared_dicts_once(self):
+        shared = {'areaCode': '020'}
+        converted = convert_keys({'home': shared, 'work': [shared]}, camelcase_to_underscore)
+
+        assert_that(converted['home'], is_({'area_code': '020'}))
+        assert_that(converted['work'][0], is_(same_instance(converted['home'])))
+
+    def test_convert_keys_with_cycle(self):
+        for in_place in (False, True):
+            document = {'homeAddress': {'postCode': 'E1'}}
+            document['homeAddress']['resident'] = document
+            converted = convert_keys(document, camelcase_to_underscore, in_place=in_place)
+
+            assert_that(converted['home_address']['post_code'], is_('E1'))
+            assert_that(converted['home_address']['resident'], is_(same_instance(converted)))
+
+    def test_key_conversions_keep_their_type(self):
+        assert_that(camelcase_to_underscore('fooBar'), is_(instance_of(str)))
+        assert_that(camelcase_to_underscore(u'fooBar'), is_(instance_of(unicode)))
+        assert_that(camelcase_to_underscore('fooBar'), is_(instance_of(str)))
+
+    def test_convert_keys_deeply_nested(self):
+        document = leaf = {}
+        for _ in range(5000):
+            leaf['childNode'] = {}
+            leaf = leaf['childNode']
+        converted = convert_keys(document, camelcase_to_underscore)
+
+        depth = 0
+        while converted:
+            converted = converted['child_node']
+            depth += 1
+        assert_that(depth, is_(5000))
+
+    def test_convert_keys_many(self):
+        converted = convert_keys_many(iter([self.document(), {'postCode': 'E1'}]), camelcase_to_underscore)
+        assert_that(list(converted), is_([self.expected(), {'post_code': 'E1'}]))
@@ -158,3 +158,46 @@ class CodedErrorsTests(unittest.TestCase):
         self.assertEqual(2, len(name_errors))
         self.assertEqual(first, name_errors[0])
         self.assertEqual(second, name_errors[1])
+
+
+class CompactErrorsTests(unittest.TestCase):
+    def test_errors_are_slotted(self):
+        error = CodedError(1, message='one')
+        field_error = FieldError('name', error)
+
+        assert_that(hasattr(error, '__dict__'), is_(False))
+        assert_that(hasattr(field_error, '__dict__'), is_(False))
+        assert_that(hasattr(CodedErrors(), '__dict__'), is_(False))
+
+    def test_strings_are_interned(self):
+        first = FieldError(''.join(['na', 'me']), CodedError('invalid', message=''.join(['o', 'ne'])))
+        second = FieldError('name', CodedError('invalid', message='one'))
+
+        assert_that(first.field_name, is_(same_instance(second.field_name)))
+        assert_that(first.message, is_(same_instance(second.message)))
+
+    def test_errors_are_classified_by_type(self):
+        field_error = FieldError('name', CodedError(1, message='one'))
+        global_error = CodedError(2, message='two')
+        errors = CodedErrors().add_global_error(field_error).add_field_error(global_error)
+
+        assert_that(errors.errors, is_((field_error, global_error)))
+        assert_that(errors.field_errors, is_([field_error]))
+        assert_that(errors.global_errors, is_([global_error]))
+        assert_that(errors.has_field_errors_for('name'), is_(True))
+
+    def test_errors_are_read_only(self):
+        errors = CodedErrors().add_global_error(CodedError(1, message='one'))
+
+        self.assertRaises(AttributeError, getattr, errors.errors, 'append')
+        self.assertRaises(AttributeError, setattr, errors, 'errors', [])
+        assert_that(errors.length, is_(1))
+        assert_that(errors.global_errors, has_length(1))
+
+    def test_buckets_are_not_exposed(self):
+        errors = CodedErrors().add_field_error(FieldError('name', CodedError(1, message='one')))
+        errors.field_errors.pop()
+        errors.field_errors_for('name').pop()
+
+        assert_that(errors.field_errors, has_length(1))
+        assert_that(errors.field_errors_for('name'), has_length(1))
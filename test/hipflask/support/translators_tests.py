@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from hamcrest import *
+from hipflask.support.strings import camelcase_to_underscore, convert_keys
+from hipflask.support.translators import compile_translator, shape_of, KeyTranslators
+
+ORDER = {'orderId': None,
+         'shippingAddress': {'postCode': None},
+         'lineItems': [{'productId': None}]}
+
+
+def order():
+    return {'orderId': 1,
+            'shippingAddress': {'postCode': 'E1'},
+            'lineItems': [{'productId': 2}, 'giftWrap', ({'productId': 3},)]}
+
+
+class CompileTranslatorTests(unittest.TestCase):
+    def test_translates_like_convert_keys(self):
+        translator = compile_translator(ORDER, camelcase_to_underscore)
+        assert_that(translator(order()), is_(convert_keys(order(), camelcase_to_underscore)))
+
+    def test_falls_back_for_unknown_keys(self):
+        translator = compile_translator(ORDER, camelcase_to_underscore)
+        translated = translator({'orderId': 1, 'billingAddress': {'postCode': 'E1'}})
+        assert_that(translated, is_({'order_id': 1, 'billing_address': {'post_code': 'E1'}}))
+
+    def test_falls_back_for_values_that_do_not_fit(self):
+        translator = compile_translator(ORDER, camelcase_to_underscore)
+        translated = translator({'shippingAddress': None, 'lineItems': ({'productId': 2},)})
+        assert_that(translated, is_({'shipping_address': None, 'line_items': [{'product_id': 2}]}))
+
+    def test_falls_back_for_a_dict_where_a_scalar_is_expected(self):
+        translator = compile_translator({'orderId': None, 'note': None}, camelcase_to_underscore)
+        document = {'orderId': 1, 'note': {'authorName': 'x'}}
+        assert_that(translator(document), is_({'order_id': 1, 'note': {'author_name': 'x'}}))
+        assert_that(translator(document), is_(convert_keys(document, camelcase_to_underscore)))
+
+    def test_falls_back_for_a_list_of_dicts_where_a_scalar_is_expected(self):
+        translator = compile_translator({'notes': None}, camelcase_to_underscore)
+        document = {'notes': ({'authorName': 'x'}, 'plain', [{'authorName': 'y'}])}
+        assert_that(translator(document), is_({'notes': [{'author_name': 'x'}, 'plain', [{'authorName': 'y'}]]}))
+        assert_that(translator(document), is_(convert_keys(document, camelcase_to_underscore)))
+
+    def test_skip_conversion(self):
+        translator = compile_translator(ORDER, camelcase_to_underscore,
+                                        skip_conversion=lambda key: key in ('shippingAddress', 'unknownKey'))
+        translated = translator({'shippingAddress': {'postCode': 'E1'}, 'unknownKey': {'postCode': 'E1'}})
+        assert_that(translated, is_({'shippingAddress': {'post_code': 'E1'}, 'unknownKey': {'post_code': 'E1'}}))
+
+    def test_invalid_shape(self):
+        self.assertRaises(ValueError, compile_translator, {'lineItems': ['productId']}, camelcase_to_underscore)
+
+
+class ShapeOfTests(unittest.TestCase):
+    def test_infers_shape(self):
+        document = {'orderId': 1, 'shippingAddress': {'postCode': 'E1'},
+                    'lineItems': [{'productId': 2}, {'unitPrice': 1.5}], 'tags': ['gift']}
+        assert_that(shape_of(document), is_({'orderId': None, 'shippingAddress': {'postCode': None},
+                                             'lineItems': [{'productId': None, 'unitPrice': None}],
+                                             'tags': None}))
+
+
+class KeyTranslatorsTests(unittest.TestCase):
+    def setUp(self):
+        super(KeyTranslatorsTests, self).setUp()
+        self.translators = KeyTranslators(camelcase_to_underscore)
+
+    def test_register(self):
+        translator = self.translators.register('order', ORDER)
+
+        assert_that('order' in self.translators, is_(True))
+        assert_that(self.translators['order'], is_(same_instance(translator)))
+
+    def test_translate(self):
+        self.translators.register('order', ORDER)
+        assert_that(self.translators.translate('order', {'orderId': 1}), is_({'order_id': 1}))
+
+    def test_translate_unregistered_shape(self):
+        assert_that(self.translators.translate('customer', {'firstName': 'Jo'}), is_({'first_name': 'Jo'}))
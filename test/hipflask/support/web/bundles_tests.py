@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from flask_assets import Environment, Bundle
+from hamcrest import *
+from hipflask.support.web.bundles import BundleBuilder, BuildCache
+from hipflask.support.web.static import AssetManifest
+
+
+class BundleBuilderTests(unittest.TestCase):
+    def setUp(self):
+        super(BundleBuilderTests, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        for filename in ('vendor.css', 'custom.css', 'custom.js'):
+            self.write(filename, '/* {} */'.format(filename))
+
+        self.app = Flask(__name__, static_folder=self.directory)
+        self.environment = Environment(self.app)
+        self.environment.versions = 'hash'
+        self.environment.register('css_all',
+                                  Bundle('vendor.css', output='css/vendor.%(version)s.css'),
+                                  Bundle('custom.css', output='css/custom.%(version)s.css'))
+        self.environment.register('js_all', Bundle('*.js'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(BundleBuilderTests, self).tearDown()
+
+    def write(self, filename, content):
+        with open(os.path.join(self.directory, filename), 'w') as stream:
+            stream.write(content)
+
+    def build(self, force=False, workers=1):
+        builder = BundleBuilder(self.app,
+                                manifest=AssetManifest(os.path.join(self.directory, 'bundles.json')),
+                                cache=BuildCache(os.path.join(self.directory, 'build.json')),
+                                workers=workers)
+        return builder.build(['css_all', 'js_all'], force=force)
+
+    def test_build(self):
+        outcomes = self.build()
+
+        assert_that([outcome.built for outcome in outcomes], is_([True, True, True]))
+        files = AssetManifest(os.path.join(self.directory, 'bundles.json')).files_for('css_all')
+        assert_that(files, contains(matches_regexp(r'^css/vendor\.\w{8}\.css$'),
+                                    matches_regexp(r'^css/custom\.\w{8}\.css$')))
+        for filename in files + ['custom.js']:
+            assert_that(os.path.isfile(os.path.join(self.directory, filename + '.gz')), is_(True))
+
+    def test_unchanged_inputs_are_not_built_again(self):
+        first = self.build()
+        second = self.build()
+
+        assert_that([outcome.built for outcome in second], is_([False, False, False]))
+        assert_that([outcome.files for outcome in second], is_([outcome.files for outcome in first]))
+
+    def test_changed_inputs_are_built_again(self):
+        first = self.build()
+        self.write('custom.css', '/* changed */')
+        second = self.build()
+
+        assert_that([outcome.built for outcome in second], is_([False, True, False]))
+        assert_that(second[1].files, is_not(first[1].files))
+
+    def test_forced(self):
+        self.build()
+
+        assert_that([outcome.built for outcome in self.build(force=True)], is_([True, True, True]))
+
+    def test_missing_source_fails_the_build(self):
+        os.remove(os.path.join(self.directory, 'vendor.css'))
+
+        self.assertRaises(IOError, self.build)
+        assert_that(os.path.exists(os.path.join(self.directory, 'css')), is_(False))
+
+    def test_built_in_parallel(self):
+        outcomes = self.build(workers=2)
+
+        assert_that([outcome.built for outcome in outcomes], is_([True, True, True]))
+        assert_that(os.listdir(os.path.join(self.directory, 'css')), has_length(4))
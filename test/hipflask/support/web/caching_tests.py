@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from hamcrest import *
+from hipflask.support.web.caching import CachePolicy, cache_policy, ResponseCache, MemoryBackend, \
+    SharedMemoryBackend, create_response_cache
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CachePolicyTests(unittest.TestCase):
+    def test_cache_policy(self):
+        assert_that(cache_policy(None), none())
+        assert_that(cache_policy(False), none())
+        assert_that(cache_policy(True), instance_of(CachePolicy))
+        assert_that(cache_policy(dict(ttl=5)).ttl, is_(5))
+
+    def test_tags_for(self):
+        policy = CachePolicy(tags=('things', 'thing:{name}'))
+        assert_that(policy.tags_for(dict(name='foo')), is_(['things', 'thing:foo']))
+
+
+class BackendTestsMixin(object):
+    def test_put_and_get(self):
+        self.backend.put('key', ('entry',))
+        assert_that(self.backend.get('key'), is_(('entry',)))
+        assert_that(self.backend, has_length(1))
+
+    def test_discard(self):
+        self.backend.put('key', ('entry',))
+        self.backend.discard('key')
+        self.backend.discard('missing')
+        assert_that(self.backend.get('key'), none())
+
+    def test_invalidate(self):
+        assert_that(self.backend.version_of('things'), is_(0))
+        self.backend.invalidate('things')
+        assert_that(self.backend.version_of('things'), is_(1))
+
+    def test_evicts_least_recently_used(self):
+        for n in range(self.backend.maxsize + 1):
+            self.backend.put('key{}'.format(n), (n,))
+        assert_that(self.backend, has_length(self.backend.maxsize))
+        assert_that(self.backend.get('key0'), none())
+        assert_that(self.backend.evictions, is_(1))
+
+
+class MemoryBackendTests(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        super(MemoryBackendTests, self).setUp()
+        self.backend = MemoryBackend(maxsize=2)
+
+
+class SharedMemoryBackendTests(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        super(SharedMemoryBackendTests, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.backend = SharedMemoryBackend(self.directory, maxsize=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(SharedMemoryBackendTests, self).tearDown()
+
+    def test_shared_between_instances(self):
+        self.backend.put('key', ('entry',))
+        self.backend.invalidate('things')
+
+        other = SharedMemoryBackend(self.directory)
+        assert_that(other.get('key'), is_(('entry',)))
+        assert_that(other.version_of('things'), is_(1))
+
+    def test_stores_plain_values(self):
+        entry = (1060.0, [('things', 1)], 200, [('Content-Type', 'text/html')], '<p>thing</p>')
+        self.backend.put('key', entry)
+
+        assert_that(self.backend.get('key'), is_(entry))
+
+    def test_ignores_unreadable_entry(self):
+        with open(os.path.join(self.directory, 'key'), 'wb') as stream:
+            # a pickle, say, that would run code on loading
+            stream.write("cos\nsystem\n(S'true'\ntR.")
+
+        assert_that(self.backend.get('key'), none())
+
+    def test_creates_private_directory(self):
+        directory = os.path.join(self.directory, 'cache')
+        SharedMemoryBackend(directory)
+
+        assert_that(os.stat(directory).st_mode & 0o777, is_(0o700))
+
+    def test_refuses_directory_writable_by_others(self):
+        os.chmod(self.directory, 0o777)
+
+        self.assertRaises(OSError, SharedMemoryBackend, self.directory)
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        super(ResponseCacheTests, self).setUp()
+        self.app = Flask(__name__)
+        self.clock = Clock()
+        self.cache = ResponseCache(MemoryBackend(), ttl=10, clock=self.clock)
+
+    def put(self, policy):
+        with self.app.test_request_context('/things/foo'):
+            self.cache.put('key', self.app.response_class('thing'), policy)
+
+    def get(self):
+        with self.app.test_request_context('/things/foo'):
+            return self.cache.get('key')
+
+    def test_get(self):
+        self.put(CachePolicy())
+        response = self.get()
+
+        assert_that(response.status_code, is_(200))
+        assert_that(response.get_data(), is_('thing'))
+        assert_that(self.cache.info().hits, is_(1))
+
+    def test_expires(self):
+        self.put(CachePolicy(ttl=5))
+        self.clock.now += 5
+
+        assert_that(self.get(), none())
+        assert_that(self.cache.info().misses, is_(1))
+        assert_that(self.cache.info().currsize, is_(0))
+
+    def test_invalidate(self):
+        self.put(CachePolicy(tags=('things',)))
+        self.cache.invalidate('things')
+
+        assert_that(self.get(), none())
+
+    def test_key_varies(self):
+        policy = CachePolicy(vary=('Accept-Language',))
+        keys = set()
+        for path, language in (('/things/foo', 'en'), ('/things/foo', 'fr'), ('/things/foo?page=2', 'en')):
+            with self.app.test_request_context(path, headers={'Accept-Language': language}):
+                keys.add(self.cache.key_for(policy))
+        assert_that(keys, has_length(3))
+
+
+class CreateResponseCacheTests(unittest.TestCase):
+    def test_create_response_cache(self):
+        cache = create_response_cache(dict(RESPONSE_CACHE_BACKEND='memory', RESPONSE_CACHE_SIZE=5))
+        assert_that(cache.backend, instance_of(MemoryBackend))
+        assert_that(cache.info().maxsize, is_(5))
+
+    def test_create_response_cache_without_backend(self):
+        assert_that(create_response_cache({}), none())
+
+    def test_create_response_cache_with_unknown_backend(self):
+        self.assertRaises(ValueError, create_response_cache, dict(RESPONSE_CACHE_BACKEND='redis'))
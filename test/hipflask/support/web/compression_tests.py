@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import zlib
+
+from flask import Flask, Response
+from hamcrest import *
+from hipflask.support.web.compression import best_encoding, compress_response, CompressingResponsifier, \
+    serve_precompressed_static, write_precompressed
+
+BODY = 'thing ' * 200
+
+
+def gunzip(data):
+    return zlib.decompress(data, zlib.MAX_WBITS | 16)
+
+
+class BestEncodingTests(unittest.TestCase):
+    def test_best_encoding(self):
+        assert_that(best_encoding('gzip, deflate'), is_('gzip'))
+        assert_that(best_encoding('gzip;q=0.5, deflate, br'), is_('deflate'))
+        assert_that(best_encoding('*'), is_('gzip'))
+
+    def test_best_encoding_when_none_is_acceptable(self):
+        assert_that(best_encoding(None), none())
+        assert_that(best_encoding('identity'), none())
+        assert_that(best_encoding('gzip;q=0'), none())
+
+
+class CompressResponseTests(unittest.TestCase):
+    def test_compress(self):
+        response = compress_response(Response(BODY, mimetype='text/html'), 'gzip')
+
+        assert_that(response.headers['Content-Encoding'], is_('gzip'))
+        assert_that(response.headers['Vary'], is_('Accept-Encoding'))
+        assert_that(gunzip(response.get_data()), is_(BODY))
+        assert_that(int(response.headers['Content-Length']), is_(len(response.get_data())))
+
+    def test_compress_with_deflate(self):
+        response = compress_response(Response(BODY, mimetype='application/json'), 'deflate')
+
+        assert_that(zlib.decompress(response.get_data()), is_(BODY))
+
+    def test_compress_streamed(self):
+        response = compress_response(Response(iter([BODY, '', BODY]), mimetype='application/json'), 'gzip')
+
+        assert_that('Content-Length' in response.headers, is_(False))
+        assert_that(gunzip(''.join(response.response)), is_(BODY * 2))
+
+    def test_not_compressed_when_small(self):
+        response = compress_response(Response('thing', mimetype='text/html'), 'gzip')
+
+        assert_that('Content-Encoding' in response.headers, is_(False))
+        assert_that(response.headers['Vary'], is_('Accept-Encoding'))
+
+    def test_not_compressed_when_incompressible(self):
+        response = compress_response(Response(BODY, mimetype='image/png'), 'gzip')
+
+        assert_that(response.get_data(), is_(BODY))
+        assert_that('Vary' in response.headers, is_(False))
+
+    def test_not_compressed_without_encoding(self):
+        response = compress_response(Response(BODY, mimetype='text/html'), None)
+
+        assert_that(response.get_data(), is_(BODY))
+
+    def test_etag_is_weakened(self):
+        response = Response(BODY, mimetype='text/html')
+        response.set_etag('thing')
+        compress_response(response, 'gzip')
+
+        assert_that(response.get_etag(), is_(('thing', True)))
+
+
+class CompressingResponsifierTests(unittest.TestCase):
+    class Responsifier(object):
+        def responsify(self, response_data, *args, **kwargs):
+            return Response(response_data, mimetype='text/html')
+
+        def negotiate_content_type(self, accept_header):
+            return 'text/html'
+
+    def setUp(self):
+        super(CompressingResponsifierTests, self).setUp()
+        self.app = Flask(__name__)
+        self.responsifier = CompressingResponsifier(self.Responsifier(), min_size=10)
+
+    def test_responsify(self):
+        with self.app.test_request_context('/', headers={'Accept-Encoding': 'deflate'}):
+            response = self.responsifier.responsify(BODY)
+
+        assert_that(response.headers['Content-Encoding'], is_('deflate'))
+
+    def test_negotiation_is_remembered(self):
+        assert_that(self.responsifier.negotiate_encoding('identity'), none())
+        assert_that(self.responsifier.negotiate_encoding('identity'), none())
+        assert_that(self.responsifier.negotiated.info().hits, is_(1))
+
+    def test_negotiate_content_type(self):
+        assert_that(self.responsifier.negotiate_content_type('*/*'), is_('text/html'))
+
+
+class PrecompressedStaticTests(unittest.TestCase):
+    def setUp(self):
+        super(PrecompressedStaticTests, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.app = Flask(__name__, static_folder=self.directory, static_url_path='/static')
+        with open(os.path.join(self.directory, 'thing.css'), 'wb') as stream:
+            stream.write(BODY)
+        serve_precompressed_static(self.app)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(PrecompressedStaticTests, self).tearDown()
+
+    def get(self, **headers):
+        return self.app.test_client().get('/static/thing.css', headers=headers)
+
+    def test_write_precompressed(self):
+        path = write_precompressed(os.path.join(self.directory, 'thing.css'))
+
+        assert_that(gzip.open(path).read(), is_(BODY))
+
+    def test_serves_precompressed(self):
+        write_precompressed(os.path.join(self.directory, 'thing.css'))
+        response = self.get(**{'Accept-Encoding': 'gzip'})
+
+        assert_that(response.mimetype, is_('text/css'))
+        assert_that(response.headers['Content-Encoding'], is_('gzip'))
+        assert_that(response.headers['Vary'], is_('Accept-Encoding'))
+        assert_that(gunzip(response.data), is_(BODY))
+
+    def test_serves_uncompressed_when_gzip_is_not_acceptable(self):
+        write_precompressed(os.path.join(self.directory, 'thing.css'))
+        response = self.get()
+
+        assert_that('Content-Encoding' in response.headers, is_(False))
+        assert_that(response.headers['Vary'], is_('Accept-Encoding'))
+        assert_that(response.data, is_(BODY))
+
+    def test_serves_uncompressed_without_variant(self):
+        response = self.get(**{'Accept-Encoding': 'gzip'})
+
+        assert_that('Content-Encoding' in response.headers, is_(False))
+        assert_that('Vary' in response.headers, is_(False))
+        assert_that(response.data, is_(BODY))
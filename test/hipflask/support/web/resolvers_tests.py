@@ -3,6 +3,7 @@
 import unittest
 
 from hamcrest import *
+from jinja2 import DictLoader, Environment, TemplateSyntaxError
 from hipflask.support.web.resolvers import *
 
 
@@ -92,3 +93,55 @@ class SimpleMappingBasedViewResolverTests(unittest.TestCase):
         with self.assertRaises(CannotFindViewException):
             resolver = SimpleMappingBasedViewResolver(dict(foo=''))
             resolver.resolve_view(view_name='foo')
+
+
+class IndexedViewResolverTests(unittest.TestCase):
+    def setUp(self):
+        super(IndexedViewResolverTests, self).setUp()
+        self.environment = Environment(loader=DictLoader({'login.html': 'Log in, {{ name }}',
+                                                          'users/profile.html': 'Profile',
+                                                          'robots.txt': 'Disallow: /'}))
+
+    def test_index(self):
+        resolver = IndexedViewResolver().index(self.environment)
+
+        assert_that(resolver.views, is_({'login': 'login.html', 'users/profile': 'users/profile.html'}))
+        assert_that(len(resolver), is_(2))
+
+    def test_index_with_custom_suffix(self):
+        resolver = IndexedViewResolver(suffix='.txt').index(self.environment)
+
+        assert_that(resolver.views, is_({'robots': 'robots.txt'}))
+
+    def test_resolve_view(self):
+        resolver = IndexedViewResolver().index(self.environment)
+
+        assert_that(resolver.resolve_view(view_name='users/profile'), is_('users/profile.html'))
+
+    def test_template_for(self):
+        resolver = IndexedViewResolver().index(self.environment)
+
+        assert_that(resolver.template_for('login').render(name='Shirley'), is_('Log in, Shirley'))
+
+    def test_resolve_view_missing(self):
+        resolver = IndexedViewResolver().index(self.environment)
+
+        with self.assertRaises(CannotFindViewException):
+            resolver.resolve_view(view_name='not_here')
+        with self.assertRaises(CannotFindViewException):
+            resolver.template_for('not_here')
+
+    def test_resolve_view_with_none_logical_view_name(self):
+        with self.assertRaises(CannotFindViewException):
+            IndexedViewResolver().index(self.environment).resolve_view(view_name=None)
+
+    def test_missing(self):
+        resolver = IndexedViewResolver().index(self.environment)
+
+        assert_that(resolver.missing(['login', 'not_here', 'gone', 'not_here']), is_(['gone', 'not_here']))
+
+    def test_index_compiles_every_template(self):
+        self.environment.loader.mapping['broken.html'] = '{% if %}'
+
+        with self.assertRaises(TemplateSyntaxError):
+            IndexedViewResolver().index(self.environment)
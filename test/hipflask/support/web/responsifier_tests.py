@@ -1,8 +1,20 @@
 # -*- coding: utf-8 -*-
 
+import datetime
+import sys
+import traceback
 import unittest
 
-from hipflask import ContentNegotiatingResponsifier
+# noinspection PyPackageRequirements
+from bson.objectid import ObjectId
+from flask import Flask, Blueprint, template_rendered, signals_available
+from jinja2 import DictLoader
+from hamcrest import *
+import simplejson as json
+from hipflask import ContentNegotiatingResponsifier, StreamingJsonResponsifier, SimpleJsonResponsifier, \
+    TemplatedResponsifier, SimpleSuffixBasedViewResolver, IndexedViewResolver
+from hipflask.support.web import responsifiers
+from hipflask.support.web.responsifiers import is_streamable, buffered, model_digest
 
 
 class ContentNegotiatingResponsifierTests(unittest.TestCase):
@@ -13,3 +25,255 @@ class ContentNegotiatingResponsifierTests(unittest.TestCase):
     def test_ctor_with_empty_responsifiers_mapping(self):
         with self.assertRaises(AssertionError):
             ContentNegotiatingResponsifier(dict())
+
+    def test_find_responsifier_for_html(self):
+        responsifier = ContentNegotiatingResponsifier(dict(html=HTML, json=JSON))
+        self.assertIs(HTML, responsifier.find_responsifier_for('application/xhtml+xml'))
+
+    def test_find_responsifier_for_json(self):
+        responsifier = ContentNegotiatingResponsifier(dict(html=HTML, json=JSON))
+        self.assertIs(JSON, responsifier.find_responsifier_for('text/javascript'))
+
+    def test_find_responsifier_for_plain_text(self):
+        responsifier = ContentNegotiatingResponsifier(dict(html=HTML, json=JSON))
+        self.assertIs(JSON, responsifier.find_responsifier_for('text/plain'))
+
+    def test_find_responsifier_for_unsupported_type(self):
+        responsifier = ContentNegotiatingResponsifier(dict(html=HTML, json=JSON))
+        self.assertIsNone(responsifier.find_responsifier_for('image/png'))
+
+    def test_find_responsifier_for_unregistered_kind(self):
+        responsifier = ContentNegotiatingResponsifier(dict(json=JSON))
+        self.assertIsNone(responsifier.find_responsifier_for('text/html'))
+
+    def test_negotiate_picks_best_content_type(self):
+        responsifier = ContentNegotiatingResponsifier(dict(html=HTML, json=JSON))
+        self.assertIs(JSON, responsifier.negotiate('application/json, text/plain, */*'))
+        self.assertIs(HTML, responsifier.negotiate('text/html,application/xhtml+xml;q=0.9,*/*;q=0.8'))
+
+    def test_negotiate_remembers_accept_header(self):
+        responsifier = ContentNegotiatingResponsifier(dict(html=HTML, json=JSON))
+        responsifier.negotiate('application/json')
+        responsifier.negotiate('application/json')
+        responsifier.negotiate('image/png')
+
+        info = responsifier.cache_info()
+        self.assertEqual(1, info.hits)
+        self.assertEqual(2, info.misses)
+        self.assertEqual(2, info.currsize)
+
+
+class SimpleJsonResponsifierTests(unittest.TestCase):
+    def test_responsify(self):
+        with Flask(__name__).test_request_context():
+            model = dict(_id=ObjectId(OBJECT_ID), when=datetime.date(2014, 7, 1))
+            response = SimpleJsonResponsifier().responsify(model)
+
+            assert_that(response.mimetype, is_('application/json'))
+            assert_that(json.loads(response.get_data()), is_(dict(_id=OBJECT_ID, when='2014-07-01')))
+
+
+class StreamingJsonResponsifierTests(unittest.TestCase):
+    def test_ctor_with_zero_chunk_size(self):
+        with self.assertRaises(AssertionError):
+            StreamingJsonResponsifier(chunk_size=0)
+
+    def test_iterencode_streams_iterators(self):
+        documents = (dict(_id=ObjectId(OBJECT_ID), n=n) for n in range(3))
+        content = ''.join(StreamingJsonResponsifier().iterencode(dict(documents=documents)))
+
+        assert_that(json.loads(content), is_(dict(documents=[dict(_id=OBJECT_ID, n=0),
+                                                             dict(_id=OBJECT_ID, n=1),
+                                                             dict(_id=OBJECT_ID, n=2)])))
+
+    def test_iterencode_with_plain_values(self):
+        model = dict(name='foo', tags=['bar'], when=datetime.date(2014, 7, 1), empty=iter([]))
+        content = ''.join(StreamingJsonResponsifier().iterencode(model))
+
+        assert_that(json.loads(content), is_(dict(name='foo', tags=['bar'], when='2014-07-01', empty=[])))
+
+    def test_responsify_streams_response(self):
+        with Flask(__name__).test_request_context():
+            response = StreamingJsonResponsifier(chunk_size=1).responsify(dict(numbers=iter(range(3))))
+
+            assert_that(response.is_streamed, is_(True))
+            assert_that(response.mimetype, is_('application/json'))
+            assert_that(json.loads(response.get_data()), is_(dict(numbers=[0, 1, 2])))
+
+    def test_responsify_delegates_to_fallback(self):
+        responsifier = StreamingJsonResponsifier(fallback=StubResponsifier())
+        assert_that(responsifier.responsify(dict(numbers=[0, 1, 2])), is_(FALLBACK_RESPONSE))
+
+    def test_is_streamable(self):
+        assert_that(is_streamable(iter([])), is_(True))
+        assert_that(is_streamable(x for x in ()), is_(True))
+        assert_that(is_streamable([]), is_(False))
+        assert_that(is_streamable(()), is_(False))
+        assert_that(is_streamable({}), is_(False))
+        assert_that(is_streamable(u'foo'), is_(False))
+        assert_that(is_streamable(None), is_(False))
+
+    def test_buffered_coalesces_fragments(self):
+        chunks = list(buffered(iter(['a', 'b', 'cd', 'e']), 2))
+        assert_that(chunks, is_(['ab', 'cd', 'e']))
+
+
+class TemplatedResponsifierTests(unittest.TestCase):
+    def setUp(self):
+        super(TemplatedResponsifierTests, self).setUp()
+        self.app = Flask(__name__)
+        self.app.jinja_loader = DictLoader({'greeting.html': 'Hello {{ name }}{{ punctuation }}'})
+
+    def test_responsify_without_caching(self):
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver())
+        with self.app.test_request_context():
+            response = responsifier.responsify(dict(name='Shirley'), view_name='greeting', punctuation='!')
+
+            assert_that(response.get_data(), is_('Hello Shirley!'))
+            assert_that(responsifier.cache_info(), none())
+
+    def test_responsify_layers_the_context(self):
+        self.app.jinja_loader = DictLoader({'layers.html': '{{ name }} {{ punctuation }} {{ processed }} {{ shadowed }} '
+                                                           '{{ config.DEBUG }} {% include "partial.html" %}',
+                                            'partial.html': '({{ name }})'})
+        self.app.context_processor(lambda: dict(processed='processed', shadowed='processor'))
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver())
+        with self.app.test_request_context():
+            response = responsifier.responsify(dict(name='Shirley', punctuation='?', shadowed='model'),
+                                               view_name='layers', punctuation='!')
+
+            assert_that(response.get_data(), is_('Shirley ! processed model False (Shirley)'))
+
+    def test_responsify_with_blueprint_context_processor(self):
+        blueprint = Blueprint('things', __name__)
+        blueprint.context_processor(lambda: dict(punctuation='?'))
+        blueprint.add_url_rule('/things', 'things', lambda: None)
+        self.app.register_blueprint(blueprint)
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver())
+        with self.app.test_request_context('/things'):
+            response = responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+
+            assert_that(response.get_data(), is_('Hello Shirley?'))
+        with self.app.test_request_context('/'):
+            response = responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+
+            assert_that(response.get_data(), is_('Hello Shirley'))
+
+    def test_responsify_traceback_shows_the_template(self):
+        self.app.jinja_loader = DictLoader({'broken.html': 'Hello\n{{ 1 // 0 }}'})
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver())
+        with self.app.test_request_context():
+            try:
+                responsifier.responsify({}, view_name='broken')
+                self.fail('The template should not render.')
+            except ZeroDivisionError:
+                filename, line, _, _ = traceback.extract_tb(sys.exc_info()[2])[-1]
+
+            assert_that(filename, is_('<template>'))
+            assert_that(line, is_(2))
+
+    @unittest.skipUnless(signals_available, 'blinker is not installed')
+    def test_responsify_sends_template_rendered_with_a_dict(self):
+        self.app.context_processor(lambda: dict(punctuation='!'))
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver())
+        sent = []
+        with template_rendered.connected_to(lambda sender, template, context: sent.append(context), self.app):
+            with self.app.test_request_context():
+                responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+
+        assert_that(type(sent[0]), is_(dict))
+        assert_that(sent[0], has_entries(name='Shirley', punctuation='!', view_name='greeting'))
+
+    def test_responsify_caches_compiled_templates(self):
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver(), cache_size=2)
+        with self.app.test_request_context():
+            responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+            response = responsifier.responsify(dict(name='Valentine'), view_name='greeting')
+
+            assert_that(response.get_data(), is_('Hello Valentine'))
+            templates = responsifier.cache_info()['templates']
+            assert_that(templates.hits, is_(1))
+            assert_that(templates.misses, is_(1))
+            assert_that(responsifier.cache_info()['rendered'].misses, is_(0))
+
+    def test_responsify_caches_rendered_output_of_cacheable_views(self):
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver(), cache_size=2,
+                                             cacheable_views=('greeting',))
+        with self.app.test_request_context():
+            responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+            responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+            response = responsifier.responsify(dict(name='Valentine'), view_name='greeting')
+
+            assert_that(response.get_data(), is_('Hello Valentine'))
+            rendered = responsifier.cache_info()['rendered']
+            assert_that(rendered.hits, is_(1))
+            assert_that(rendered.misses, is_(2))
+
+    def test_responsify_never_caches_rendered_output_of_models_that_are_not_json(self):
+        responsifier = TemplatedResponsifier(SimpleSuffixBasedViewResolver(), cache_size=2,
+                                             cacheable_views=('greeting',))
+        with self.app.test_request_context():
+            responsifier.responsify(dict(name=Named('Shirley')), view_name='greeting')
+            response = responsifier.responsify(dict(name=Named('Valentine')), view_name='greeting')
+
+            assert_that(response.get_data(), is_('Hello Valentine'))
+            assert_that(responsifier.cache_info()['rendered'].currsize, is_(0))
+
+    def test_responsify_with_indexed_views(self):
+        resolver = IndexedViewResolver().index(self.app.jinja_env)
+        responsifier = TemplatedResponsifier(resolver)
+        with self.app.test_request_context():
+            response = responsifier.responsify(dict(name='Shirley'), view_name='greeting')
+
+            assert_that(response.get_data(), is_('Hello Shirley'))
+            assert_that(responsifier.cache_info(), none())
+
+    def test_model_digest_is_stable(self):
+        assert_that(model_digest(dict(foo=1, bar=[2])), is_(model_digest(dict(bar=[2], foo=1))))
+        assert_that(model_digest(dict(foo=1)), is_not(model_digest(dict(foo=2))))
+
+    def test_model_digest_of_objects(self):
+        assert_that(model_digest(dict(foo=Named('Shirley'))), none())
+
+
+class Named(object):
+    # the same repr for every instance, as many have
+    def __repr__(self):
+        return '<Named>'
+
+    def __str__(self):
+        return self.name
+
+    def __init__(self, name):
+        self.name = name
+
+
+class UnlayeredTemplatedResponsifierTests(TemplatedResponsifierTests):
+    """
+    As C{TemplatedResponsifierTests}, through C{Template.render}, as on a Jinja2 without the internals layered
+    rendering relies on.
+    """
+
+    def setUp(self):
+        super(UnlayeredTemplatedResponsifierTests, self).setUp()
+        self.layered_rendering = responsifiers.LAYERED_RENDERING
+        responsifiers.LAYERED_RENDERING = False
+
+    def tearDown(self):
+        responsifiers.LAYERED_RENDERING = self.layered_rendering
+        super(UnlayeredTemplatedResponsifierTests, self).tearDown()
+
+
+# noinspection PyClassHasNoInit
+class StubResponsifier():
+    # noinspection PyUnusedLocal
+    def responsify(self, *args, **kwargs):
+        return FALLBACK_RESPONSE
+
+
+OBJECT_ID = '52b06645a337b7276fee4a8f'
+FALLBACK_RESPONSE = 'fallback'
+
+
+HTML = StubResponsifier()
+JSON = StubResponsifier()
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+from hamcrest import *
+from hipflask.support.web.static import AssetManifest, asset_urls, serve_immutable_static
+
+
+class StaticTestCase(unittest.TestCase):
+    def setUp(self):
+        super(StaticTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.manifest_path = os.path.join(self.directory, 'bundles.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super(StaticTestCase, self).tearDown()
+
+
+class AssetManifestTests(StaticTestCase):
+    def test_record(self):
+        manifest = AssetManifest()
+        manifest.record('css_all', ['css/vendor.min.1a2b3c4d.css'])
+
+        assert_that(manifest.files_for('css_all'), is_(['css/vendor.min.1a2b3c4d.css']))
+        assert_that(manifest.files_for('js_all'), none())
+        assert_that('css/vendor.min.1a2b3c4d.css' in manifest, is_(True))
+        assert_that('css/vendor.min.css' in manifest, is_(False))
+
+    def test_persisted(self):
+        manifest = AssetManifest(self.manifest_path)
+        manifest.record('css_all', ['css/vendor.min.1a2b3c4d.css'])
+        manifest.save()
+
+        loaded = AssetManifest(self.manifest_path)
+        assert_that(loaded.files_for('css_all'), is_(['css/vendor.min.1a2b3c4d.css']))
+        assert_that('css/vendor.min.1a2b3c4d.css' in loaded, is_(True))
+
+    def test_unreadable(self):
+        with open(self.manifest_path, 'w') as stream:
+            stream.write('{')
+
+        assert_that(AssetManifest(self.manifest_path), has_length(0))
+
+
+class ImmutableStaticTests(StaticTestCase):
+    def setUp(self):
+        super(ImmutableStaticTests, self).setUp()
+        self.app = Flask(__name__, static_folder=self.directory, static_url_path='/static')
+        for filename in ('thing.1a2b3c4d.css', 'thing.css'):
+            with open(os.path.join(self.directory, filename), 'w') as stream:
+                stream.write('body {}')
+        self.app.asset_manifest = AssetManifest()
+        self.app.asset_manifest.record('css_all', ['thing.1a2b3c4d.css'])
+        serve_immutable_static(self.app)
+
+    def test_asset_urls(self):
+        with self.app.test_request_context():
+            assert_that(asset_urls('css_all'), is_(['/static/thing.1a2b3c4d.css']))
+
+    def test_immutable(self):
+        response = self.app.test_client().get('/static/thing.1a2b3c4d.css')
+
+        assert_that(response.headers['Cache-Control'], contains_string('immutable'))
+        assert_that(response.cache_control.max_age, is_(365 * 24 * 60 * 60))
+
+    def test_not_immutable_unless_in_manifest(self):
+        response = self.app.test_client().get('/static/thing.css')
+
+        assert_that(response.headers['Cache-Control'], is_not(contains_string('immutable')))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from hamcrest import *
+from hipflask.support.web.timing import stage, RequestTimings, Histogram, TimingHistograms, _local
+
+
+class StageTests(unittest.TestCase):
+    def tearDown(self):
+        _local.timings = None
+        super(StageTests, self).tearDown()
+
+    def test_untimed(self):
+        with stage('render'):
+            pass
+
+    def test_timed(self):
+        timings = _local.timings = RequestTimings()
+        with stage('render'):
+            pass
+        with stage('resolve'):
+            pass
+        with stage('render'):
+            pass
+
+        assert_that([name for name, _ in timings.items()], is_(['render', 'resolve']))
+        assert_that(timings.stages['render'], greater_than_or_equal_to(0.0))
+
+
+class RequestTimingsTests(unittest.TestCase):
+    def test_server_timing(self):
+        timings = RequestTimings()
+        timings.add('handler', 0.0015)
+        timings.add('render', 0.002)
+        timings.add('handler', 0.0005)
+
+        assert_that(timings.server_timing(), is_('handler;dur=2.000, render;dur=2.000'))
+
+
+class HistogramTests(unittest.TestCase):
+    def test_quantiles(self):
+        histogram = Histogram()
+        for milliseconds in [0.05] * 90 + [3] * 9 + [5000]:
+            histogram.add(milliseconds / 1000.0)
+
+        assert_that(histogram.count, is_(100))
+        assert_that(histogram.quantile(0.5), is_(0.1))
+        assert_that(histogram.quantile(0.95), is_(5))
+        assert_that(histogram.quantile(1), close_to(5000, 0.001))
+
+    def test_empty(self):
+        assert_that(Histogram().quantile(0.5), none())
+
+
+class TimingHistogramsTests(unittest.TestCase):
+    def test_record(self):
+        histograms = TimingHistograms()
+        timings = RequestTimings()
+        timings.add('render', 0.001)
+        histograms.record('index.display_homepage', 'text/html', timings)
+        histograms.record('index.display_homepage', 'text/html', timings)
+
+        snapshot = histograms.snapshot()
+        assert_that(snapshot, has_length(1))
+        assert_that(snapshot[0]['endpoint'], is_('index.display_homepage'))
+        assert_that(snapshot[0]['stages']['render']['count'], is_(2))
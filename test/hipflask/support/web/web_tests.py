@@ -3,6 +3,7 @@
 import unittest
 
 from hamcrest import *
+from hipflask.support import HipflaskException
 from hipflask.support.web import *
 
 
@@ -42,3 +43,52 @@ class SetHeaderContentTypeTests(unittest.TestCase):
                     'The "Content-Type" must be added to the headers.')
         content_type = self.response.headers[HEADER_CONTENT_TYPE]
         assert_that(content_type, is_(expected_content_type))
+
+
+class DeconstructTests(unittest.TestCase):
+    def test_string(self):
+        assert_that(deconstruct('things'), is_(('things', {}, 200)))
+
+    def test_tuple(self):
+        assert_that(deconstruct(('things', dict(a=1), 201)), is_(('things', dict(a=1), 201)))
+
+    def test_dict(self):
+        assert_that(deconstruct(dict(view_name='things', model=dict(a=1))), is_(('things', dict(a=1), 200)))
+
+    def test_subclass(self):
+        class Things(tuple):
+            pass
+
+        assert_that(deconstruct(Things(('things', dict(a=1)))), is_(('things', dict(a=1), 200)))
+
+    def test_view_response(self):
+        response_data = ViewResponse('things', dict(a=1), 201)
+
+        assert_that(deconstruct(response_data), is_(('things', dict(a=1), 201)))
+
+    def test_blank_view_name(self):
+        for view_name in ('', '  ', u'\t'):
+            self.assertRaises(HipflaskException, deconstruct, view_name)
+            self.assertRaises(HipflaskException, deconstruct, (view_name, {}))
+
+
+class ViewResponseTests(unittest.TestCase):
+    def test_defaults(self):
+        response_data = ViewResponse('things')
+
+        assert_that(response_data.view_name, is_('things'))
+        assert_that(response_data.model, is_({}))
+        assert_that(response_data.status_code, is_(200))
+        assert_that(response_data.version, is_(None))
+
+    def test_validated_on_construction(self):
+        self.assertRaises(HipflaskException, ViewResponse, ' ')
+        self.assertRaises(HipflaskException, ViewResponse, None)
+
+    def test_view_responder(self):
+        respond_with = view_responder('things')
+
+        assert_that(deconstruct(respond_with(dict(a=1), 404)), is_(('things', dict(a=1), 404)))
+
+    def test_view_responder_validates_up_front(self):
+        self.assertRaises(HipflaskException, view_responder, '')